@@ -1,162 +1,361 @@
 import logging
-import csv
+import queue
+import threading
 
-from io import StringIO
-from rdl.column_transformers.StringTransformers import ToUpper
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from contextlib import closing, contextmanager
+from rdl.copy_writers.CopyBinaryEncoder import CopyBinaryEncoder
+from rdl.copy_writers.CopyCsvEncoder import CopyCsvEncoder
+from rdl.copy_writers.CopyStream import CopyStream
+from rdl.copy_writers.CopyTextEncoder import CopyTextEncoder
 from rdl.shared import Providers
 from rdl.shared.Utils import prevent_senstive_data_logging
 
 
 class BatchDataLoader(object):
+    COPY_FORMATS = ["csv", "binary"]
+
     def __init__(
         self,
         source_db,
-        source_table_config,
-        target_schema,
-        target_table,
-        columns,
+        model_plan,
         data_load_tracker,
-        batch_config,
         target_db,
-        full_refresh,
         change_tracking_info,
+        copy_format="csv",
         logger=None,
     ):
         self.logger = logger or logging.getLogger(__name__)
-        self.source_table_config = source_table_config
-        self.columns = columns
+        self.model_plan = model_plan
+        self.source_table_config = model_plan.source_table_config
+        self.columns = model_plan.columns
         self.source_db = source_db
-        self.target_schema = target_schema
-        self.target_table = target_table
+        self.target_schema = model_plan.target_schema
+        self.target_table = model_plan.stage_table
         self.data_load_tracker = data_load_tracker
-        self.batch_config = batch_config
+        self.batch_config = model_plan.batch_config
         self.target_db = target_db
-        self.full_refresh = full_refresh
+        self.full_refresh = model_plan.full_refresh
         self.change_tracking_info = change_tracking_info
+        # without column transformers there is nothing to do to a batch but copy it, so its rows are encoded
+        # straight into COPY rather than going through a data frame and a csv
+        self.transform_plan = model_plan.transform_plan
+        self.direct_copy = (
+            self.batch_config.get("direct_copy", True)
+            and not self.transform_plan.has_column_transformers
+        )
+        self.copy_format = self.batch_config.get("copy_format", copy_format)
+        if self.copy_format not in BatchDataLoader.COPY_FORMATS:
+            raise ValueError(
+                f"Unknown copy_format '{self.copy_format}', choose from {BatchDataLoader.COPY_FORMATS}"
+            )
+        self.load_connection = None
+        self.load_connection_lock = threading.Lock()
+        self.load_freeze = False
 
-    # Imports rows, returns True if >0 rows were found
-    def load_batch(self, batch_key_tracker):
-        batch_tracker = self.data_load_tracker.start_batch()
+    # Truncates the stage table and loads every batch written within the context into it with COPY FREEZE, all in
+    # one transaction, so the rows are written frozen rather than left for autovacuum to rewrite. Nothing is visible
+    # until the context completes, and everything is rolled back if it fails. Savepoints can't be used to keep
+    # batches, as COPY FREEZE requires the table to be truncated in the current subtransaction.
+    @contextmanager
+    def frozen_load(self):
+        sql = f"TRUNCATE TABLE {self.model_plan.qualified_stage_table};"
+        with self.single_transaction_load(sql, freeze=True):
+            yield
 
-        self.logger.debug(
-            f"ImportBatch Starting from previous_batch_key: '{batch_key_tracker.bookmarks}'. "
-            f"Full Refresh: '{self.full_refresh}', "
-            f"sync_version: '{self.change_tracking_info.sync_version}', "
-            f"last_sync_version: '{self.change_tracking_info.last_sync_version}'."
+    # Creates the temporary stage table of a temporary_stage model plan, as a copy of the load table that's dropped
+    # when the transaction commits, and loads every batch written within the context into it. The context yields
+    # the load's connection, so the stage table can be upserted from in the same transaction, with no stage table
+    # created or dropped in the catalog for good. With column level change tracking, it also gets the CHANGED_COLUMNS
+    # audit column, and every column but the primary key can be null.
+    @contextmanager
+    def temporary_stage_load(self):
+        sql = (
+            f"CREATE TEMPORARY TABLE {self.model_plan.stage_table} "
+            f"(LIKE {self.target_schema}.{self.model_plan.load_table} INCLUDING DEFAULTS) ON COMMIT DROP;"
         )
+        if self.model_plan.column_change_tracking:
+            alterations = [
+                f"ADD COLUMN {Providers.AuditColumnsNames.CHANGED_COLUMNS} text"
+            ] + [
+                f"ALTER COLUMN {column['destination']['name']} DROP NOT NULL"
+                for column in self.columns
+                if not column["destination"].get("primary_key", False)
+                and not column["destination"]["nullable"]
+            ]
+            sql += f" ALTER TABLE {self.model_plan.stage_table} {', '.join(alterations)};"
+        with self.single_transaction_load(sql) as connection:
+            yield connection
 
-        data_frame = self.source_db.get_table_data_frame(
-            self.source_table_config,
-            self.columns,
-            self.batch_config,
-            batch_tracker,
-            batch_key_tracker,
-            self.full_refresh,
-            self.change_tracking_info,
-        )
+    # Runs setup_sql and then every COPY written within the context over one connection, in one transaction that's
+    # committed when the context completes and rolled back if it fails.
+    @contextmanager
+    def single_transaction_load(self, setup_sql, freeze=False):
+        raw = self.target_db.raw_connection()
+        try:
+            curs = raw.cursor()
+            self.logger.debug(f"Starting single transaction load, executing '{setup_sql}'")
+            curs.execute(setup_sql)
+            self.load_connection = raw
+            self.load_freeze = freeze
+            yield raw
+            raw.commit()
+            self.logger.debug("Completed single transaction load")
+        except BaseException:
+            raw.rollback()
+            raise
+        finally:
+            self.load_connection = None
+            self.load_freeze = False
+            raw.close()
 
-        if data_frame is None or len(data_frame) == 0:
-            self.logger.debug("There are no more rows to import.")
-            batch_tracker.load_skipped_due_to_zero_rows()
-            batch_key_tracker.has_more_data = False
+    # Imports all remaining batches of the batch_key_tracker. Unless pipelining is disabled, the next batch is
+    # extracted on a separate thread while the current one is written, with at most `pipeline_depth` extracted
+    # batches waiting to be written. The extracted batches are written by `parallel_writers` writers, each with
+    # its own destination connection and COPY, and each batch committed on its own as before.
+    def load_batches(self, batch_key_tracker):
+        pipeline_depth = self.batch_config.get("pipeline_depth", 1)
+        parallel_writers = self.batch_config.get("parallel_writers", 1)
+        if pipeline_depth < 1:
+            with closing(self.extract_batches(batch_key_tracker)) as extracted_batches:
+                for extracted_batch in extracted_batches:
+                    self.write_batch(*extracted_batch)
             return
 
-        # replacing unicode null characters because postgres doesn't support null characters in text fields
-        # https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.replace.html
-        data_frame = data_frame.replace(regex=r"\x00", value="")
+        extracted_batches = queue.Queue(maxsize=pipeline_depth)
+        stop_extracting = threading.Event()
 
-        data_frame = self.attach_column_transformers(data_frame)
-        self.write_data_frame_to_table(data_frame)
-        batch_tracker.load_completed_successfully()
+        def put_extracted(item):
+            while not stop_extracting.is_set():
+                try:
+                    extracted_batches.put(item, timeout=1)
+                    return
+                except queue.Full:
+                    continue
+
+        def extract_batches():
+            try:
+                with closing(self.extract_batches(batch_key_tracker)) as batches:
+                    for extracted_batch in batches:
+                        if stop_extracting.is_set():
+                            return
+                        put_extracted(extracted_batch)
+                put_extracted(None)
+            except BaseException as exception:
+                put_extracted(exception)
+
+        extractor = threading.Thread(
+            target=extract_batches,
+            name=f"extract-{self.target_schema}.{self.target_table}",
+            daemon=True,
+        )
+
+        def write_batches():
+            while not stop_extracting.is_set():
+                try:
+                    extracted_batch = extracted_batches.get(timeout=1)
+                except queue.Empty:
+                    continue
+                if extracted_batch is None or isinstance(extracted_batch, BaseException):
+                    # the extractor has stopped, so there is room to hand the end on to the other writers
+                    extracted_batches.put(extracted_batch)
+                    if extracted_batch is None:
+                        return
+                    raise extracted_batch
+                self.write_batch(*extracted_batch)
+
+        extractor.start()
+        try:
+            if parallel_writers <= 1:
+                write_batches()
+                return
+
+            with ThreadPoolExecutor(
+                max_workers=parallel_writers,
+                thread_name_prefix=f"write-{self.target_schema}.{self.target_table}",
+            ) as executor:
+                writers = [executor.submit(write_batches) for _ in range(parallel_writers)]
+                wait(writers, return_when=FIRST_EXCEPTION)
+                # let the other writers stop after their current batch
+                stop_extracting.set()
+                for writer in writers:
+                    writer.result()
+        finally:
+            stop_extracting.set()
+            extractor.join()
+
+    # Yields the extracted batches, advancing the bookmarks past each of them
+    def extract_batches(self, batch_key_tracker):
+        if self.full_refresh and self.batch_config.get("full_refresh_mode") == "stream":
+            stream_table_batches = (
+                self.source_db.stream_table_rows
+                if self.direct_copy
+                else self.source_db.stream_table_data_frames
+            )
+            batches = stream_table_batches(
+                self.source_table_config,
+                self.columns,
+                self.batch_config,
+                self.data_load_tracker,
+                batch_key_tracker,
+                self.change_tracking_info,
+            )
+        elif (
+            not self.full_refresh
+            and self.batch_config.get("incremental_mode") == "changed_keys_first"
+            # watermarked tables have no change table to copy the keys out of
+            and "watermark" not in self.source_table_config
+        ):
+            stream_changed_table_batches = (
+                self.source_db.stream_changed_table_rows
+                if self.direct_copy
+                else self.source_db.stream_changed_table_data_frames
+            )
+            batches = stream_changed_table_batches(
+                self.source_table_config,
+                self.columns,
+                self.batch_config,
+                self.data_load_tracker,
+                batch_key_tracker,
+                self.change_tracking_info,
+            )
+        else:
+            batches = self.__get_table_batches(batch_key_tracker)
+
+        source_column_indexes = self.model_plan.source_column_indexes
+        with closing(batches):
+            for batch_tracker, batch in batches:
+                if batch is None or len(batch) == 0:
+                    self.logger.debug("There are no more rows to import.")
+                    batch_tracker.load_skipped_due_to_zero_rows()
+                    batch_key_tracker.has_more_data = False
+                    return
+
+                for primary_key in batch_key_tracker.primary_keys:
+                    if self.direct_copy:
+                        last_key = batch[-1][source_column_indexes[primary_key]]
+                    else:
+                        last_key = batch.iloc[-1][primary_key]
+                    batch_key_tracker.set_bookmark(primary_key, int(last_key))
+
+                yield batch_tracker, batch, dict(batch_key_tracker.bookmarks)
+
+    def __get_table_batches(self, batch_key_tracker):
+        get_table_batch = (
+            self.source_db.get_table_rows
+            if self.direct_copy
+            else self.source_db.get_table_data_frame
+        )
+        while batch_key_tracker.has_more_data:
+            batch_tracker = self.data_load_tracker.start_batch()
+
+            self.logger.debug(
+                f"ImportBatch Starting from previous_batch_key: '{batch_key_tracker.bookmarks}'. "
+                f"Full Refresh: '{self.full_refresh}', "
+                f"sync_version: '{self.change_tracking_info.sync_version}', "
+                f"last_sync_version: '{self.change_tracking_info.last_sync_version}'."
+            )
 
-        for primary_key in batch_key_tracker.primary_keys:
-            batch_key_tracker.set_bookmark(
-                primary_key, int(data_frame.iloc[-1][primary_key])
+            batch = get_table_batch(
+                self.source_table_config,
+                self.columns,
+                self.batch_config,
+                batch_tracker,
+                batch_key_tracker,
+                self.full_refresh,
+                self.change_tracking_info,
             )
+            yield batch_tracker, batch
+
+    def write_batch(self, batch_tracker, batch, bookmarks):
+        batch_tracker.load_started_successfully()
+
+        if self.direct_copy:
+            self.write_rows_to_table(batch)
+        else:
+            self.write_data_frame_to_table(
+                self.transform_plan.apply(batch, batch_tracker)
+            )
+        batch_tracker.load_completed_successfully()
 
         self.logger.info(
-            f"Batch keys '{batch_key_tracker.bookmarks}' completed. {batch_tracker.get_statistics()}"
+            f"Batch keys '{bookmarks}' completed. {batch_tracker.get_statistics()}"
         )
 
     @prevent_senstive_data_logging
-    def write_data_frame_to_table(self, data_frame):
-        qualified_target_table = f"{self.target_schema}.{self.target_table}"
-        self.logger.debug(f"Starting write to table '{qualified_target_table}'")
-        data = StringIO()
-        # quoting: Due to \r existing in strings in MSSQL we must quote anything that's non numeric just to be safe
-        # line_terminator: ensure \n is used even on windows machines as prod runs on *nix with \n
-        # na_rep: Due to us quoting everything non-numeric, our null's must be represented by something special, as the
-        # default null representation (nothing), once quoted, is equivalent to an empty string
-        data_frame.to_csv(
-            data,
-            header=False,
-            index=False,
-            na_rep="\\N",
-            float_format="%.16g",
-            quotechar='"',
-            quoting=csv.QUOTE_NONNUMERIC,
-            line_terminator="\n",
-        )
-        # Float_format is used to truncate any insignificant digits. Unfortunately it gives us an artificial limitation
+    def write_rows_to_table(self, rows):
+        source_column_names = self.model_plan.source_column_names
+        encoder = self.create_encoder(source_column_names)
+        # the rows are encoded a chunk at a time as COPY reads them, so the batch is never held as text in full
+        self.copy_to_table(source_column_names, encoder, encoder.encode_rows(rows))
 
-        data.seek(0)
-        raw = self.target_db.raw_connection()
-        curs = raw.cursor()
+    def create_encoder(self, source_column_names):
+        destination_types = [
+            self.model_plan.get_destination_type(source_column_name)
+            for source_column_name in source_column_names
+        ]
+        if self.copy_format == "binary":
+            return CopyBinaryEncoder(destination_types)
+        return CopyTextEncoder(destination_types)
+
+    def copy_to_table(self, source_column_names, encoder, data):
+        qualified_target_table = self.model_plan.qualified_stage_table
+        self.logger.debug(f"Starting write to table '{qualified_target_table}'")
 
-        # log CSV on debug
+        # log COPY data on debug
         if self.logger.getEffectiveLevel() == logging.DEBUG:
-            with open(f"{qualified_target_table}.csv", "w", encoding="utf-8") as f:
-                f.write(data.getvalue())
-
-        column_array = list(
-            map(
-                lambda source_colum_name: self.get_destination_column_name(
-                    source_colum_name
-                ),
-                data_frame.columns,
+            data = BatchDataLoader.__write_through(
+                data, f"{qualified_target_table}.{encoder.FILE_EXTENSION}"
             )
-        )
-        column_list = ",".join(map(str, column_array))
 
-        # FORCE_NULL: ensure quoted fields are checked for NULLs as by default they are assumed to be non-null
-        # specify null as \N so that psql doesn't assume empty strings are nulls
-        sql = (
-            f"COPY {qualified_target_table}({column_list}) FROM STDIN "
-            f"with (format csv, "
-            f"null '\\N', "
-            f"FORCE_NULL ({column_list}))"
-        )
+        if self.load_connection is not None:
+            sql = self.model_plan.get_copy_statement(
+                source_column_names, encoder, freeze=self.load_freeze
+            )
+            self.logger.debug(f"Writing to table using command '{sql}'")
+
+            # parallel readers share the one connection of the load, which can only run one COPY at a time
+            with self.load_connection_lock:
+                curs = self.load_connection.cursor()
+                curs.copy_expert(
+                    sql=sql, file=CopyStream(data), size=CopyStream.BUFFER_SIZE
+                )
+
+            self.logger.debug(f"Completed write to table '{qualified_target_table}'")
+            return
+
+        sql = self.model_plan.get_copy_statement(source_column_names, encoder)
         self.logger.debug(f"Writing to table using command '{sql}'")
 
-        curs.copy_expert(sql=sql, file=data)
+        raw = self.target_db.raw_connection()
+        try:
+            curs = raw.cursor()
+            curs.copy_expert(
+                sql=sql, file=CopyStream(data), size=CopyStream.BUFFER_SIZE
+            )
 
-        self.logger.debug(f"Completed write to table '{qualified_target_table}'")
+            self.logger.debug(f"Completed write to table '{qualified_target_table}'")
 
-        curs.connection.commit()
-        return
+            curs.connection.commit()
+        finally:
+            # hands the connection back to the pool, rolling back the batch if it wasn't committed
+            raw.close()
 
-    def get_destination_column_name(self, source_column_name):
-        for column in self.columns:
-            if column["source_name"] == source_column_name:
-                return column["destination"]["name"]
+    @staticmethod
+    def __write_through(chunks, file_name):
+        with open(file_name, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                yield chunk
 
-        # Audit columns - map them straight through
-        if source_column_name.startswith(
-            Providers.AuditColumnsNames.audit_column_prefix
-        ):
-            return source_column_name
-
-        message = f"A source column with name '{source_column_name}' was not found in the column configuration"
-        raise ValueError(message)
-
-    def attach_column_transformers(self, data_frame):
-        self.logger.debug("Attaching column transformers")
-        for column in self.columns:
-            if "column_transformer" in column:
-                # transformer = Utils.create_type_instance(column['column_transformer'])
-                transformer = ToUpper.execute
-                data_frame[column["source_name"]] = data_frame[
-                    column["source_name"]
-                ].map(transformer)
-                # print (data_frame)
-        return data_frame
+    @prevent_senstive_data_logging
+    def write_data_frame_to_table(self, data_frame):
+        source_column_names = list(data_frame.columns)
+        if self.copy_format == "binary":
+            encoder = self.create_encoder(source_column_names)
+        else:
+            encoder = CopyCsvEncoder()
+        # the data frame is encoded a chunk at a time as COPY reads it, rather than into one csv string up front
+        self.copy_to_table(
+            source_column_names, encoder, encoder.encode_data_frame(data_frame)
+        )
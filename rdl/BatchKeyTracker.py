@@ -1,11 +1,28 @@
 class BatchKeyTracker(object):
-    def __init__(self, primary_keys):
+    def __init__(self, primary_keys, key_range=None):
         self.primary_keys = primary_keys
         self.has_more_data = True
         self.bookmarks = {}
+        # (lower exclusive, upper inclusive) bounds on the leading primary key, or None for the whole table
+        self.key_range = key_range
 
         for primary_key in primary_keys:
             self.bookmarks[primary_key] = 0
 
     def set_bookmark(self, key, value):
         self.bookmarks[key] = value
+
+    @staticmethod
+    def split_key_range(min_key, max_key, range_count):
+        if min_key is None or max_key is None or range_count <= 1:
+            return [None]
+
+        lower_bound = min_key - 1
+        range_size = -(-(max_key - lower_bound) // range_count)  # ceiling division
+
+        key_ranges = []
+        while lower_bound < max_key:
+            upper_bound = min(lower_bound + range_size, max_key)
+            key_ranges.append((lower_bound, upper_bound))
+            lower_bound = upper_bound
+        return key_ranges
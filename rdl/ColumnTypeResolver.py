@@ -1,20 +1,26 @@
 import citext
+import pandas
 from sqlalchemy import DateTime, Numeric, Integer, BigInteger, Boolean
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.dialects.postgresql import UUID
 
 
 class ColumnTypeResolver(object):
+    # datetimes are kept as python objects, as sql server's date range doesn't fit in pandas' datetime64[ns]
     PANDAS_TYPE_MAP = {
-        "string": str,
-        "datetime": str,
-        "json": str,
-        "numeric": float,
-        "guid": str,
-        "bigint": int,
-        "boolean": bool,
+        "string": object,
+        "datetime": object,
+        "json": object,
+        "numeric": "float64",
+        "guid": object,
+        "int": "int32",
+        "bigint": "int64",
+        "boolean": "bool",
     }
 
+    # the dtypes to use instead when the column is nullable. there is no nullable boolean dtype in pandas.
+    NULLABLE_PANDAS_TYPE_MAP = {"int": "Int32", "bigint": "Int64", "boolean": object}
+
     POSTGRES_TYPE_MAP = {
         "string": citext.CIText,
         "datetime": DateTime,
@@ -30,13 +36,9 @@ class ColumnTypeResolver(object):
         return self.POSTGRES_TYPE_MAP[column["type"]]
 
     def resolve_pandas_type(self, column):
-        if column["type"] == "int":
-            if column["nullable"]:
-                return object
-            else:
-                return int
-        else:
-            return self.PANDAS_TYPE_MAP[column["type"]]
+        if column["nullable"] and column["type"] in self.NULLABLE_PANDAS_TYPE_MAP:
+            return self.NULLABLE_PANDAS_TYPE_MAP[column["type"]]
+        return self.PANDAS_TYPE_MAP[column["type"]]
 
     def create_column_type_dictionary(self, columns):
         types = {}
@@ -45,3 +47,20 @@ class ColumnTypeResolver(object):
                 column["destination"]
             )
         return types
+
+    # Builds a batch with the configured columns typed as per their destination type, rather than as the object
+    # columns pandas would otherwise default to for anything that can hold a null.
+    def create_data_frame(self, records, column_names, columns):
+        data_frame = pandas.DataFrame.from_records(
+            records, columns=column_names, coerce_float=True
+        )
+        return data_frame.astype(
+            {
+                source_name: pandas_type
+                for source_name, pandas_type in self.create_column_type_dictionary(
+                    columns
+                ).items()
+                if source_name in data_frame.columns and pandas_type is not object
+            },
+            copy=False,
+        )
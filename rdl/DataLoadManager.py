@@ -2,6 +2,10 @@ import json
 import uuid
 import logging
 import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from contextlib import nullcontext
 from datetime import datetime
 from pathlib import Path
 from json import JSONDecodeError
@@ -10,6 +14,8 @@ from rdl.BatchDataLoader import BatchDataLoader
 from rdl.DestinationTableManager import DestinationTableManager
 from rdl.data_load_tracking.DataLoadTracker import DataLoadTracker
 from rdl.BatchKeyTracker import BatchKeyTracker
+from rdl.ModelPlan import ModelPlan
+from rdl.ModelScheduler import ModelScheduler
 from rdl.shared import Constants
 from rdl.shared.Utils import SensitiveDataError
 
@@ -21,6 +27,10 @@ class DataLoadManager(object):
         source_db,
         target_db,
         data_load_tracker_repository,
+        parallelism=1,
+        copy_format="csv",
+        source_db_factory=None,
+        target_db_factory=None,
         logger=None,
     ):
         self.logger = logger or logging.getLogger(__name__)
@@ -28,6 +38,14 @@ class DataLoadManager(object):
         self.source_db = source_db
         self.target_db = target_db
         self.data_load_tracker_repository = data_load_tracker_repository
+        self.parallelism = max(parallelism, 1)
+        self.copy_format = copy_format
+        self.source_db_factory = source_db_factory
+        self.target_db_factory = target_db_factory
+        self.worker_connections = threading.local()
+        self.worker_target_dbs = []
+        self.create_schema_lock = threading.Lock()
+        self.preflight_source_table_infos = {}
         self.model_pattern = "**/{model_name}.json"
         self.all_model_pattern = self.model_pattern.format(model_name="*")
 
@@ -68,20 +86,301 @@ class DataLoadManager(object):
 
         all_model_names = sorted(list(all_model_files.keys()))
         total_number_of_models = len(all_model_names)
-        model_number = 0
-        for model_name in all_model_names:
-            (model_file, request_full_refresh) = all_model_files[model_name]
-            model_number += (
-                1
-            )  # avoid all_model_names.index(model_name) due to linear time-complexity in list length
-            self.start_single_import(
-                model_file, request_full_refresh, model_number, total_number_of_models
+        last_successful_data_load_executions = (
+            self.data_load_tracker_repository.get_last_successful_data_load_executions(
+                all_model_names
             )
+        )
+
+        if self.skip_unchanged_source(
+            all_model_files, last_successful_data_load_executions
+        ):
+            return self.data_load_tracker_repository.complete_execution(
+                self.execution_id, total_number_of_models
+            )
+
+        self.logger.info(
+            f"Processing {total_number_of_models} models with parallelism={self.parallelism}"
+        )
+
+        if self.parallelism > 1:
+            # with concurrent workers the run is bounded by its longest models, so start those first
+            model_scheduler = ModelScheduler(self.data_load_tracker_repository)
+            model_costs = model_scheduler.estimate_costs(
+                DataLoadManager.get_expected_full_refresh_by_model_name(
+                    all_model_files, last_successful_data_load_executions
+                )
+            )
+            all_model_names = ModelScheduler.order_by_cost(model_costs)
+            predicted_execution_time_ms = ModelScheduler.fill_unknown_costs(model_costs)
+            predicted_makespan_ms = ModelScheduler.predict_makespan(
+                all_model_names, predicted_execution_time_ms, self.parallelism
+            )
+            self.logger.info(
+                f"Scheduled models longest first, predicted makespan {predicted_makespan_ms / 1000:.1f}s"
+            )
+
+        self.preflight_source_table_infos = self.preflight(
+            all_model_files, last_successful_data_load_executions
+        )
+
+        actual_execution_time_ms = {}
+        execution_started = time.monotonic()
+        models_processed = 0
+        first_exception = None
+        with ThreadPoolExecutor(
+            max_workers=self.parallelism,
+            initializer=self.open_worker_connections if self.parallelism > 1 else None,
+        ) as executor:
+            futures = []
+            model_number = 0
+            for model_name in all_model_names:
+                (model_file, request_full_refresh) = all_model_files[model_name]
+                model_number += (
+                    1
+                )  # avoid all_model_names.index(model_name) due to linear time-complexity in list length
+                futures.append(
+                    executor.submit(
+                        self.start_timed_single_import,
+                        actual_execution_time_ms,
+                        model_file,
+                        request_full_refresh,
+                        model_number,
+                        total_number_of_models,
+                    )
+                )
+
+            # stop handing out new models as soon as one fails, but let the ones in flight finish
+            _, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in not_done:
+                future.cancel()
+            wait(not_done)
+
+            for future in futures:
+                if future.cancelled():
+                    continue
+                models_processed += 1
+                if first_exception is None and future.exception() is not None:
+                    first_exception = future.exception()
+
+        self.dispose_worker_connections()
+
+        if self.parallelism > 1:
+            model_scheduler.report(
+                predicted_execution_time_ms,
+                actual_execution_time_ms,
+                predicted_makespan_ms,
+                (time.monotonic() - execution_started) * 1000,
+                self.parallelism,
+            )
+
+        if first_exception is not None:
+            self.data_load_tracker_repository.fail_execution(
+                self.execution_id, models_processed
+            )
+            raise first_exception
 
         return self.data_load_tracker_repository.complete_execution(
             self.execution_id, total_number_of_models
         )
 
+    # When nothing has changed anywhere in the source database since every model was last loaded, and none of them is
+    # due a full refresh, records every model as skipped in one go rather than checking each of their tables in turn.
+    # Sources without a database wide change tracking version always have their models checked one by one, as do
+    # the models of any run with a watermarked model, whose changes the change tracking version doesn't count.
+    def skip_unchanged_source(self, all_model_files, last_successful_data_load_executions):
+        sync_version = self.source_db.get_current_sync_version()
+        if not sync_version:
+            return False
+
+        model_configs = {}
+        model_checksums = {}
+        for model_name, (model_file, _) in all_model_files.items():
+            with open(str(model_file.absolute().resolve())) as f:
+                model_file_contents = f.read()
+            model_configs[model_name] = json.loads(model_file_contents)
+            model_checksums[model_name] = hashlib.md5(
+                model_file_contents.encode("utf-8")
+            ).hexdigest()
+            if "watermark" in model_configs[model_name]["source_table"]:
+                return False
+
+        existing_tables = DestinationTableManager(self.target_db).get_existing_tables(
+            {model_config["target_schema"] for model_config in model_configs.values()}
+        )
+        for model_name, (_, request_full_refresh) in all_model_files.items():
+            model_config = model_configs[model_name]
+            last_successful_data_load_execution = last_successful_data_load_executions.get(
+                model_name
+            )
+            # every model must be skippable just as it would be when loaded on its own
+            full_refresh_reason, full_refresh = DataLoadManager.is_full_refresh(
+                user_requested=request_full_refresh,
+                destination_table_exists=(
+                    model_config["target_schema"],
+                    model_config["load_table"],
+                )
+                in existing_tables,
+                last_successful_execution_exists=last_successful_data_load_execution
+                is not None,
+                model_changed=last_successful_data_load_execution is not None
+                and last_successful_data_load_execution.model_checksum
+                != model_checksums[model_name],
+                change_tracking_requests_full_load=False,
+            )
+            if full_refresh:
+                self.logger.debug(
+                    f"Not skipping the unchanged source, {model_name} is due a full refresh for reason "
+                    f"'{full_refresh_reason}'"
+                )
+                return False
+            if last_successful_data_load_execution.sync_version != sync_version:
+                return False
+
+        self.data_load_tracker_repository.create_skipped_execution_models(
+            self.execution_id, model_checksums, sync_version
+        )
+        self.logger.info(
+            f"Skipped all {len(model_checksums)} models for reason "
+            f"'{Constants.IncrementalSkipReason.SOURCE_UNCHANGED}' (version '{sync_version}')"
+        )
+        return True
+
+    # Reads the columns and change tracking info of every model's source table before any model is loaded, in one
+    # round trip for sources that can, rather than a couple per model. Keyed by model name, each is kept along with
+    # the last sync version it was read for and the model's full refresh break even. If anything goes wrong, the
+    # models read their own as they're loaded, and report whatever it was then.
+    def preflight(self, all_model_files, last_successful_data_load_executions):
+        try:
+            model_configs = {}
+            for model_name, (model_file, _) in all_model_files.items():
+                with open(str(model_file.absolute().resolve())) as f:
+                    model_configs[model_name] = json.load(f)
+            model_names = list(model_configs.keys())
+            last_sync_versions = {
+                model_name: last_successful_data_load_executions[model_name].sync_version
+                if model_name in last_successful_data_load_executions
+                else 0
+                for model_name in model_names
+            }
+
+            cost_based_model_names = [
+                model_name
+                for model_name in model_names
+                if model_configs[model_name]["batch"].get("cost_based_full_refresh", False)
+                and model_name in last_successful_data_load_executions
+            ]
+            full_refresh_break_evens = {}
+            if cost_based_model_names:
+                table_row_counts = self.source_db.get_table_row_counts(
+                    [
+                        model_configs[model_name]["source_table"]
+                        for model_name in cost_based_model_names
+                    ]
+                )
+                statistics = self.data_load_tracker_repository.get_model_execution_statistics(
+                    cost_based_model_names
+                )
+                for model_name, table_row_count in zip(
+                    cost_based_model_names, table_row_counts
+                ):
+                    full_refresh_break_evens[
+                        model_name
+                    ] = ModelScheduler.get_full_refresh_break_even(
+                        table_row_count,
+                        statistics.get((model_name, True)),
+                        statistics.get((model_name, False)),
+                    )
+
+            source_table_infos = self.source_db.get_table_infos(
+                [
+                    (
+                        model_configs[model_name]["source_table"],
+                        last_sync_versions[model_name],
+                        DataLoadManager.get_changed_row_count_limit(
+                            model_configs[model_name],
+                            full_refresh_break_evens.get(model_name),
+                        ),
+                    )
+                    for model_name in model_names
+                ]
+            )
+        except Exception as exception:
+            self.logger.warning(
+                f"Preflight of the source tables failed, reading them model by model: '{str(exception)}'"
+            )
+            return {}
+
+        return {
+            model_name: (
+                last_sync_versions[model_name],
+                source_table_info,
+                full_refresh_break_evens.get(model_name),
+            )
+            for model_name, source_table_info in zip(model_names, source_table_infos)
+        }
+
+    @staticmethod
+    def get_changed_row_count_limit(model_config, full_refresh_break_even):
+        # the changed rows are only counted as far as needed to tell whether they're a small or a large change
+        return max(
+            (
+                limit + 1
+                for limit in [
+                    model_config["batch"].get("small_change_threshold"),
+                    full_refresh_break_even,
+                ]
+                if limit is not None
+            ),
+            default=None,
+        )
+
+    @staticmethod
+    def get_expected_full_refresh_by_model_name(
+        all_model_files, last_successful_data_load_executions
+    ):
+        expected_full_refresh_by_model_name = {}
+        for model_name, (model_file, request_full_refresh) in all_model_files.items():
+            last_successful_data_load_execution = last_successful_data_load_executions.get(
+                model_name
+            )
+            expected_full_refresh_by_model_name[model_name] = (
+                request_full_refresh
+                or last_successful_data_load_execution is None
+                or last_successful_data_load_execution.model_checksum
+                != DataLoadManager.get_model_checksum(model_file)
+            )
+        return expected_full_refresh_by_model_name
+
+    def start_timed_single_import(self, actual_execution_time_ms, model_file, *args):
+        started = time.monotonic()
+        try:
+            self.start_single_import(model_file, *args)
+        finally:
+            actual_execution_time_ms[model_file.stem] = (
+                time.monotonic() - started
+            ) * 1000
+
+    def open_worker_connections(self):
+        # every worker thread gets its own source and destination connections so models never share a connection
+        if self.source_db_factory is not None:
+            self.worker_connections.source_db = self.source_db_factory()
+        if self.target_db_factory is not None:
+            self.worker_connections.target_db = self.target_db_factory()
+            self.worker_target_dbs.append(self.worker_connections.target_db)
+
+    # each worker's destination engine has a pool of its own, which is closed once the workers have shut down
+    def dispose_worker_connections(self):
+        for worker_target_db in self.worker_target_dbs:
+            worker_target_db.dispose()
+        self.worker_target_dbs = []
+
+    def get_worker_connections(self):
+        return (
+            getattr(self.worker_connections, "source_db", self.source_db),
+            getattr(self.worker_connections, "target_db", self.target_db),
+        )
+
     def start_single_import(
         self, model_file, requested_full_refresh, model_number, total_number_of_models
     ):
@@ -117,6 +416,8 @@ class DataLoadManager(object):
             )
             raise exception
 
+        source_db, target_db = self.get_worker_connections()
+
         last_sync_version = 0
         last_successful_data_load_execution = self.data_load_tracker_repository.get_last_successful_data_load_execution(
             model_name
@@ -125,9 +426,31 @@ class DataLoadManager(object):
         if last_successful_data_load_execution is not None:
             last_sync_version = last_successful_data_load_execution.sync_version
 
-        source_table_info = self.source_db.get_table_info(
-            model_config["source_table"], last_sync_version
+        small_change_threshold = model_config["batch"].get("small_change_threshold")
+        preflight_sync_version, source_table_info, full_refresh_break_even = self.preflight_source_table_infos.get(
+            model_name, (None, None, None)
         )
+        if source_table_info is None or preflight_sync_version != last_sync_version:
+            # a model can opt in to being fully refreshed whenever that's expected to be quicker than loading its
+            # changes
+            full_refresh_break_even = None
+            if (
+                model_config["batch"].get("cost_based_full_refresh", False)
+                and last_successful_data_load_execution is not None
+            ):
+                full_refresh_break_even = ModelScheduler(
+                    self.data_load_tracker_repository
+                ).estimate_full_refresh_break_even(
+                    model_name, source_db.get_table_row_count(model_config["source_table"])
+                )
+
+            source_table_info = source_db.get_table_info(
+                model_config["source_table"],
+                last_sync_version,
+                DataLoadManager.get_changed_row_count_limit(
+                    model_config, full_refresh_break_even
+                ),
+            )
         config_source_column_names = list(
             map(lambda col_config: col_config["source_name"], model_config["columns"])
         )
@@ -144,7 +467,7 @@ class DataLoadManager(object):
             )
             raise ValueError(message)
 
-        destination_table_manager = DestinationTableManager(self.target_db)
+        destination_table_manager = DestinationTableManager(target_db)
         change_tracking_info = source_table_info.change_tracking_info
 
         last_successful_execution_exists = (
@@ -162,12 +485,36 @@ class DataLoadManager(object):
             last_successful_execution_exists=last_successful_execution_exists,
             model_changed=model_changed,
             change_tracking_requests_full_load=change_tracking_info.force_full_load,
+            cheaper_than_incremental=DataLoadManager.is_large_change(
+                change_tracking_info, full_refresh_break_even
+            ),
         )
 
         if full_refresh:
             self.logger.info(
                 f"Performing full refresh for reason '{full_refresh_reason}'"
             )
+        temporary_stage = not full_refresh and DataLoadManager.is_small_change(
+            change_tracking_info, small_change_threshold
+        )
+        column_change_tracking = not full_refresh and change_tracking_info.tracks_column_changes(
+            model_config["batch"]
+        )
+        if (
+            not full_refresh
+            and model_config["batch"].get("column_change_tracking", False)
+            and not column_change_tracking
+        ):
+            self.logger.warning(
+                f"Column level change tracking is not enabled on the source table (TRACK_COLUMNS_UPDATED = OFF), "
+                f"loading every column of {model_name}'s changed rows"
+            )
+        model_plan = ModelPlan(
+            model_config,
+            full_refresh,
+            temporary_stage=temporary_stage,
+            column_change_tracking=column_change_tracking,
+        )
 
         data_load_tracker = DataLoadTracker(
             self.execution_id,
@@ -179,7 +526,9 @@ class DataLoadManager(object):
             change_tracking_info,
         )
         self.data_load_tracker_repository.create_execution_model(data_load_tracker)
-        destination_table_manager.create_schema(model_config["target_schema"])
+        # concurrent 'CREATE SCHEMA IF NOT EXISTS' statements for the same schema can still collide in postgres
+        with self.create_schema_lock:
+            destination_table_manager.create_schema(model_config["target_schema"])
 
         skip_incremental_reason, skip_incremental = DataLoadManager.check_skip_incremental(
             change_tracking_info
@@ -192,48 +541,89 @@ class DataLoadManager(object):
             self.data_load_tracker_repository.save_execution_model(data_load_tracker)
             return
 
-        self.logger.debug(
-            f"Recreating the staging table {model_config['target_schema']}."
-            f"{model_config['stage_table']}"
-        )
-        destination_table_manager.create_table(
-            model_config["target_schema"],
-            model_config["stage_table"],
-            model_config["columns"],
-            drop_first=True,
-        )
+        # a full refresh loads the stage table without its primary key, building it once all batches are in.
+        # it's also loaded unlogged, unless it's frozen, as making it logged would rewrite it unfrozen.
+        copy_freeze = full_refresh and model_config["batch"].get("copy_freeze", False)
+        unlogged = full_refresh and not copy_freeze
+
+        if temporary_stage:
+            self.logger.debug(
+                f"Staging {change_tracking_info.changed_row_count} changed rows in a temporary table"
+            )
+        else:
+            self.logger.debug(
+                f"Recreating the staging table {model_config['target_schema']}."
+                f"{model_config['stage_table']}"
+            )
+            destination_table_manager.create_table(
+                model_config["target_schema"],
+                model_config["stage_table"],
+                model_config["columns"],
+                drop_first=True,
+                primary_key=not full_refresh,
+                unlogged=unlogged,
+                row_hash=model_plan.skip_unchanged == "hash",
+                changed_columns=column_change_tracking,
+            )
 
         # Import the data.
         batch_data_loader = BatchDataLoader(
-            self.source_db,
-            model_config["source_table"],
-            model_config["target_schema"],
-            model_config["stage_table"],
-            model_config["columns"],
+            source_db,
+            model_plan,
             data_load_tracker,
-            model_config["batch"],
-            self.target_db,
-            full_refresh,
+            target_db,
             change_tracking_info,
+            copy_format=self.copy_format,
         )
 
-        batch_key_tracker = BatchKeyTracker(
-            model_config["source_table"]["primary_keys"]
-        )
-        while batch_key_tracker.has_more_data:
-            try:
-                batch_data_loader.load_batch(batch_key_tracker)
-            except SensitiveDataError as e:
-                data_load_tracker.data_load_failed(e.sensitive_error_args)
-                self.data_load_tracker_repository.save_execution_model(
-                    data_load_tracker
-                )
-                self.data_load_tracker_repository.fail_execution(
-                    self.execution_id, model_number
-                )
-                raise e
+        parallel_readers = 1
+        if full_refresh:
+            parallel_readers = model_config["batch"].get("parallel_readers", 1)
+        batch_key_trackers = [
+            BatchKeyTracker(model_config["source_table"]["primary_keys"], key_range)
+            for key_range in source_db.get_key_ranges(
+                model_config["source_table"], parallel_readers
+            )
+        ]
+        load_context = nullcontext()
+        if copy_freeze:
+            load_context = batch_data_loader.frozen_load()
+        elif temporary_stage:
+            load_context = batch_data_loader.temporary_stage_load()
+        try:
+            with load_context as load_connection:
+                DataLoadManager.load_key_ranges(batch_data_loader, batch_key_trackers)
+                if temporary_stage:
+                    # the temporary stage table only lasts as long as the load's transaction
+                    self.logger.debug(
+                        "Incremental-load is set. Upserting from the temporary stage table to the load table."
+                    )
+                    started = datetime.now()
+                    inserted_row_count, updated_row_count = destination_table_manager.upsert_table_in_transaction(
+                        load_connection, model_plan.upsert_sql
+                    )
+                    data_load_tracker.upsert_completed(
+                        inserted_row_count, updated_row_count, datetime.now() - started
+                    )
+        except SensitiveDataError as e:
+            data_load_tracker.data_load_failed(e.sensitive_error_args)
+            self.data_load_tracker_repository.save_execution_model(data_load_tracker)
+            raise e
 
         if full_refresh:
+            self.logger.debug(
+                "Full-load is set. Building the primary key of the stage table."
+            )
+            destination_table_manager.create_primary_key(
+                model_config["target_schema"],
+                model_config["stage_table"],
+                model_config["columns"],
+            )
+            if unlogged:
+                destination_table_manager.set_logged(
+                    model_config["target_schema"], model_config["stage_table"]
+                )
+
             # Rename the stage table to the load table.
             self.logger.debug(
                 "Full-load is set. Renaming the stage table to the load table."
@@ -243,16 +633,27 @@ class DataLoadManager(object):
                 model_config["stage_table"],
                 model_config["load_table"],
             )
-        else:
+        elif not temporary_stage:
             self.logger.debug(
                 "Incremental-load is set. Upserting from the stage table to the load table."
             )
-            destination_table_manager.upsert_table(
-                model_config["target_schema"],
-                model_config["stage_table"],
-                model_config["load_table"],
-                model_config["columns"],
-            )
+            upsert_chunk_size = model_config["batch"].get("upsert_chunk_size")
+            if upsert_chunk_size is None:
+                started = datetime.now()
+                inserted_row_count, updated_row_count = destination_table_manager.upsert_table(
+                    model_plan.upsert_sql
+                )
+                data_load_tracker.upsert_completed(
+                    inserted_row_count, updated_row_count, datetime.now() - started
+                )
+            else:
+                DataLoadManager.upsert_chunks(
+                    destination_table_manager,
+                    model_plan,
+                    data_load_tracker,
+                    upsert_chunk_size,
+                    model_config["batch"].get("upsert_parallelism", 1),
+                )
 
             destination_table_manager.drop_table(
                 model_config["target_schema"], model_config["stage_table"]
@@ -260,10 +661,104 @@ class DataLoadManager(object):
         data_load_tracker.data_load_successful()
         self.logger.info(
             f"{model_number:0{max_model_number_len}d} of {total_number_of_models}"
-            f" COMPLETED {model_name}"
+            f" COMPLETED {model_name}. {data_load_tracker.get_statement_statistics()} "
+            f"{data_load_tracker.get_upsert_statistics()}"
         )
         self.data_load_tracker_repository.save_execution_model(data_load_tracker)
 
+    @staticmethod
+    def load_key_range(batch_data_loader, batch_key_tracker):
+        batch_data_loader.load_batches(batch_key_tracker)
+
+    @staticmethod
+    def load_key_ranges(batch_data_loader, batch_key_trackers):
+        if len(batch_key_trackers) == 1:
+            DataLoadManager.load_key_range(batch_data_loader, batch_key_trackers[0])
+            return
+
+        # each key range is read by its own reader and written by its own COPY into the same stage table
+        with ThreadPoolExecutor(max_workers=len(batch_key_trackers)) as executor:
+            futures = [
+                executor.submit(
+                    DataLoadManager.load_key_range, batch_data_loader, batch_key_tracker
+                )
+                for batch_key_tracker in batch_key_trackers
+            ]
+            done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+            if any(future.exception() is not None for future in done):
+                # let the other readers stop after their current batch
+                for batch_key_tracker in batch_key_trackers:
+                    batch_key_tracker.has_more_data = False
+            for future in futures:
+                future.result()
+
+    @staticmethod
+    def upsert_chunk(destination_table_manager, model_plan, data_load_tracker, chunk):
+        started = datetime.now()
+        inserted_row_count, updated_row_count = destination_table_manager.upsert_chunk(
+            model_plan.chunked_upsert_sql, chunk
+        )
+        execute_time = datetime.now() - started
+        data_load_tracker.upsert_completed(
+            inserted_row_count, updated_row_count, execute_time, chunk=chunk
+        )
+        logging.getLogger(__name__).debug(
+            f"UPSERT chunk {chunk} completed. Inserted: {inserted_row_count}; Updated: {updated_row_count}; "
+            f"Execution Time: {execute_time}"
+        )
+
+    @staticmethod
+    def upsert_chunks(
+        destination_table_manager, model_plan, data_load_tracker, chunk_size, parallelism
+    ):
+        # each chunk is committed on its own, so no one transaction holds the locks and WAL of the whole upsert.
+        # the chunks are disjoint ranges of the leading primary key, so concurrent chunks never touch the same rows.
+        chunks = destination_table_manager.get_upsert_chunks(
+            model_plan.target_schema,
+            model_plan.stage_table,
+            model_plan.upsert_chunk_key,
+            chunk_size,
+        )
+        with ThreadPoolExecutor(max_workers=max(parallelism, 1)) as executor:
+            futures = [
+                executor.submit(
+                    DataLoadManager.upsert_chunk,
+                    destination_table_manager,
+                    model_plan,
+                    data_load_tracker,
+                    chunk,
+                )
+                for chunk in chunks
+            ]
+            done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+            if any(future.exception() is not None for future in done):
+                for future in futures:
+                    future.cancel()
+            for future in futures:
+                if not future.cancelled():
+                    future.result()
+
+    @staticmethod
+    def get_model_checksum(model_file):
+        with open(str(model_file.absolute().resolve())) as model_file_contents:
+            return hashlib.md5(model_file_contents.read().encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def is_small_change(change_tracking_info, small_change_threshold):
+        return (
+            small_change_threshold is not None
+            and change_tracking_info.changed_row_count is not None
+            and change_tracking_info.changed_row_count <= small_change_threshold
+        )
+
+    @staticmethod
+    def is_large_change(change_tracking_info, full_refresh_break_even):
+        return (
+            full_refresh_break_even is not None
+            and change_tracking_info.changed_row_count is not None
+            and change_tracking_info.changed_row_count > full_refresh_break_even
+        )
+
     @staticmethod
     def check_skip_incremental(change_tracking_info):
         if (
@@ -287,6 +782,7 @@ class DataLoadManager(object):
         last_successful_execution_exists,
         model_changed,
         change_tracking_requests_full_load,
+        cheaper_than_incremental=False,
     ):
 
         if user_requested:
@@ -304,4 +800,7 @@ class DataLoadManager(object):
         if change_tracking_requests_full_load:
             return Constants.FullRefreshReason.INVALID_CHANGE_TRACKING, True
 
+        if cheaper_than_incremental:
+            return Constants.FullRefreshReason.CHEAPER_THAN_INCREMENTAL, True
+
         return Constants.FullRefreshReason.NOT_APPLICABLE, False
@@ -1,184 +1,422 @@
-import io
-import os
-import logging
-from rdl.ColumnTypeResolver import ColumnTypeResolver
-
-from sqlalchemy import MetaData, DateTime, Boolean, BigInteger
-from sqlalchemy.schema import Column, Table
-from sqlalchemy.sql import func
-from rdl.shared import Providers
-
-
-class DestinationTableManager(object):
-    def __init__(self, target_db, logger=None):
-        self.logger = logger or logging.getLogger(__name__)
-        self.target_db = target_db
-        self.column_type_resolver = ColumnTypeResolver()
-
-    def create_schema(self, schema_name):
-        self.target_db.execute(f"CREATE SCHEMA IF NOT EXISTS {schema_name}")
-
-    def table_exists(self, schema_name, table_name):
-        return self.target_db.dialect.has_table(self.target_db, table_name, schema_name)
-
-    def drop_table(self, schema_name, table_name):
-        metadata = MetaData()
-        self.logger.debug(f"Dropping table {schema_name}.{table_name}")
-
-        table = Table(table_name, metadata, schema=schema_name)
-        table.drop(self.target_db, checkfirst=True)
-
-        self.logger.debug(f"Dropped table {schema_name}.{table_name}")
-
-    def create_table(self, schema_name, table_name, columns_configuration, drop_first):
-        metadata = MetaData()
-
-        table = Table(table_name, metadata, schema=schema_name)
-
-        for column_configuration in columns_configuration:
-            table.append_column(self.create_column(column_configuration["destination"]))
-
-        table.append_column(
-            Column(
-                Providers.AuditColumnsNames.TIMESTAMP,
-                DateTime(timezone=True),
-                server_default=func.now(),
-            )
-        )
-
-        table.append_column(
-            Column(
-                Providers.AuditColumnsNames.IS_DELETED,
-                Boolean,
-                server_default="f",
-                default=False,
-            )
-        )
-
-        table.append_column(
-            Column(Providers.AuditColumnsNames.CHANGE_VERSION, BigInteger)
-        )
-
-        if drop_first:
-            self.logger.debug(f"Dropping table {schema_name}.{table_name}")
-            table.drop(self.target_db, checkfirst=True)
-            self.logger.debug(f"Dropped table {schema_name}.{table_name}")
-
-        self.logger.debug(f"Creating table {schema_name}.{table_name}")
-        table.create(self.target_db, checkfirst=False)
-        self.logger.debug(f"Created table {schema_name}.{table_name}")
-
-        return
-
-    def create_column(self, configuration):
-        return Column(
-            configuration["name"],
-            self.column_type_resolver.resolve_postgres_type(configuration),
-            primary_key=configuration.get("primary_key", False),
-            nullable=configuration["nullable"],
-        )
-
-    def rename_table(self, schema_name, source_table_name, target_table_name):
-
-        # Steps to efficiently rename a table.
-        # 1. Drop target_old if exists.
-        # 2. Begin transaction
-        # 3. Rename target to target_old if it exists.
-        # 4. Rename source to target
-        # 5. commit
-        # 6. Drop target_old if it exists.
-
-        old_load_table_name = f"{target_table_name}__old"
-
-        # Step 1
-        sql = f"DROP TABLE IF EXISTS {schema_name}.{old_load_table_name} CASCADE;  "
-        self.logger.debug(f"Table Rename, executing '{sql}'")
-        self.target_db.execute(sql)
-
-        # Step 2
-        sql_builder = io.StringIO()
-        sql_builder.write("BEGIN TRANSACTION; ")
-
-        # Step 3
-        sql_builder.write(
-            f"ALTER TABLE IF EXISTS {schema_name}.{target_table_name} RENAME TO {old_load_table_name}; "
-        )
-
-        # Step 4
-        sql_builder.write(
-            f"ALTER TABLE {schema_name}.{source_table_name} RENAME TO {target_table_name}; "
-        )
-
-        sql_builder.write("COMMIT TRANSACTION; ")
-        self.logger.debug(f"Table Rename, executing '{sql_builder.getvalue()}'")
-        self.target_db.execute(sql_builder.getvalue())
-
-        sql_builder.close()
-
-        sql = f"DROP TABLE IF EXISTS {schema_name}.{old_load_table_name} CASCADE "
-        self.logger.debug(f"Table Rename, executing '{sql}'")
-        self.target_db.execute(sql)
-
-    def upsert_table(
-        self, schema_name, source_table_name, target_table_name, columns_config
-    ):
-        column_array = list(
-            map(lambda column: column["destination"]["name"], columns_config)
-        )
-        column_list = ",".join(map(str, column_array))
-        column_list = column_list + f",{Providers.AuditColumnsNames.TIMESTAMP}"
-        column_list = column_list + f",{Providers.AuditColumnsNames.IS_DELETED}"
-        column_list = column_list + f",{Providers.AuditColumnsNames.CHANGE_VERSION}"
-
-        primary_key_column_array = [
-            column_config["destination"]["name"]
-            for column_config in columns_config
-            if "primary_key" in column_config["destination"]
-            and column_config["destination"]["primary_key"]
-        ]
-
-        primary_key_column_list = ",".join(map(str, primary_key_column_array))
-
-        sql_builder = io.StringIO()
-        sql_builder.write(
-            f"INSERT INTO {schema_name}.{target_table_name} ({column_list}) \n"
-        )
-        sql_builder.write(
-            f" SELECT {column_list} FROM {schema_name}.{source_table_name} \n"
-        )
-        sql_builder.write(f" ON CONFLICT({primary_key_column_list}) DO UPDATE SET ")
-
-        deleted_column = f"EXCLUDED.{Providers.AuditColumnsNames.IS_DELETED}"
-        for column_config in columns_config:
-            if (
-                "preserve_after_delete" in column_config["destination"]
-                and column_config["destination"]["preserve_after_delete"]
-            ):
-                col_name = column_config["destination"]["name"]
-                existing_column = f"{target_table_name}.{col_name}"
-                excluded_column = f"EXCLUDED.{col_name}"
-                sql_builder.write(
-                    f"{col_name} = CASE WHEN {deleted_column} = TRUE THEN {existing_column} ELSE {excluded_column} END, \n"
-                )
-            else:
-                sql_builder.write(
-                    "{0} = EXCLUDED.{0},\n".format(column_config["destination"]["name"])
-                )
-
-        sql_builder.write(
-            "{0} = EXCLUDED.{0},\n".format(Providers.AuditColumnsNames.TIMESTAMP)
-        )
-        sql_builder.write(
-            "{0} = EXCLUDED.{0},\n".format(Providers.AuditColumnsNames.IS_DELETED)
-        )
-        sql_builder.write(
-            "{0} = EXCLUDED.{0};\n".format(Providers.AuditColumnsNames.CHANGE_VERSION)
-        )
-
-        upsert_sql = sql_builder.getvalue()
-
-        self.logger.debug(f"UPSERT executing '{upsert_sql}'")
-        self.target_db.execute(upsert_sql)
-        self.logger.debug("UPSERT completed")
-
-        sql_builder.close()
+import io
+import os
+import logging
+from rdl.ColumnTypeResolver import ColumnTypeResolver
+
+from sqlalchemy import MetaData, DateTime, Boolean, BigInteger, Text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.schema import Column, Table
+from sqlalchemy.sql import func, text
+from rdl.shared import Providers
+
+
+class DestinationTableManager(object):
+    SKIP_UNCHANGED_MODES = ["hash", "compare"]
+    STAGE_ALIAS = "stage"
+    LOADED_ALIAS = "loaded"
+
+    def __init__(self, target_db, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.target_db = target_db
+        self.column_type_resolver = ColumnTypeResolver()
+
+    def create_schema(self, schema_name):
+        self.target_db.execute(f"CREATE SCHEMA IF NOT EXISTS {schema_name}")
+
+    def table_exists(self, schema_name, table_name):
+        return self.target_db.dialect.has_table(self.target_db, table_name, schema_name)
+
+    # The (schema name, table name) of every table in the given schemas, read in one query
+    def get_existing_tables(self, schema_names):
+        rows = self.target_db.execute(
+            text(
+                "SELECT table_schema, table_name FROM information_schema.tables "
+                "WHERE table_schema = ANY(:schema_names)"
+            ),
+            schema_names=list(schema_names),
+        ).fetchall()
+        return {(row["table_schema"], row["table_name"]) for row in rows}
+
+    def drop_table(self, schema_name, table_name):
+        metadata = MetaData()
+        self.logger.debug(f"Dropping table {schema_name}.{table_name}")
+
+        table = Table(table_name, metadata, schema=schema_name)
+        table.drop(self.target_db, checkfirst=True)
+
+        self.logger.debug(f"Dropped table {schema_name}.{table_name}")
+
+    # Bulk loads can create the table UNLOGGED and without its primary key, so loading it neither writes WAL nor
+    # maintains an index row by row. create_primary_key and set_logged then complete it once it's loaded.
+    # row_hash adds the ROW_HASH audit column that 'hash' upserts skip unchanged rows by. Bulk loads leave it null,
+    # so a row gets its hash the first time an upsert changes it, and is compared column by column until then.
+    # changed_columns adds the CHANGED_COLUMNS audit column of column level change tracking, and lets every column
+    # but the primary key be null.
+    def create_table(
+        self,
+        schema_name,
+        table_name,
+        columns_configuration,
+        drop_first,
+        primary_key=True,
+        unlogged=False,
+        row_hash=False,
+        changed_columns=False,
+    ):
+        metadata = MetaData()
+
+        table = Table(
+            table_name,
+            metadata,
+            schema=schema_name,
+            prefixes=["UNLOGGED"] if unlogged else [],
+        )
+
+        for column_configuration in columns_configuration:
+            destination = column_configuration["destination"]
+            if changed_columns and not destination.get("primary_key", False):
+                destination = dict(destination, nullable=True)
+            table.append_column(self.create_column(destination, primary_key=primary_key))
+
+        table.append_column(
+            Column(
+                Providers.AuditColumnsNames.TIMESTAMP,
+                DateTime(timezone=True),
+                server_default=func.now(),
+            )
+        )
+
+        table.append_column(
+            Column(
+                Providers.AuditColumnsNames.IS_DELETED,
+                Boolean,
+                server_default="f",
+                default=False,
+            )
+        )
+
+        table.append_column(
+            Column(Providers.AuditColumnsNames.CHANGE_VERSION, BigInteger)
+        )
+
+        if row_hash:
+            table.append_column(Column(Providers.AuditColumnsNames.ROW_HASH, UUID))
+
+        if changed_columns:
+            table.append_column(Column(Providers.AuditColumnsNames.CHANGED_COLUMNS, Text))
+
+        if drop_first:
+            self.logger.debug(f"Dropping table {schema_name}.{table_name}")
+            table.drop(self.target_db, checkfirst=True)
+            self.logger.debug(f"Dropped table {schema_name}.{table_name}")
+
+        self.logger.debug(f"Creating table {schema_name}.{table_name}")
+        table.create(self.target_db, checkfirst=False)
+        self.logger.debug(f"Created table {schema_name}.{table_name}")
+
+        return
+
+    def create_column(self, configuration, primary_key=True):
+        return Column(
+            configuration["name"],
+            self.column_type_resolver.resolve_postgres_type(configuration),
+            primary_key=primary_key and configuration.get("primary_key", False),
+            nullable=configuration["nullable"],
+        )
+
+    def create_primary_key(self, schema_name, table_name, columns_configuration):
+        primary_key_column_list = ",".join(
+            column_configuration["destination"]["name"]
+            for column_configuration in columns_configuration
+            if column_configuration["destination"].get("primary_key", False)
+        )
+
+        sql = f"ALTER TABLE {schema_name}.{table_name} ADD PRIMARY KEY ({primary_key_column_list});"
+        self.logger.debug(f"Building primary key, executing '{sql}'")
+        self.target_db.execute(sql)
+        self.logger.debug(f"Built primary key of {schema_name}.{table_name}")
+
+    def set_logged(self, schema_name, table_name):
+        sql = f"ALTER TABLE {schema_name}.{table_name} SET LOGGED;"
+        self.logger.debug(f"Making table logged, executing '{sql}'")
+        self.target_db.execute(sql)
+        self.logger.debug(f"Made table {schema_name}.{table_name} logged")
+
+    def rename_table(self, schema_name, source_table_name, target_table_name):
+
+        # Steps to efficiently rename a table.
+        # 1. Drop target_old if exists.
+        # 2. Begin transaction
+        # 3. Rename target to target_old if it exists.
+        # 4. Rename source to target
+        # 5. commit
+        # 6. Drop target_old if it exists.
+
+        old_load_table_name = f"{target_table_name}__old"
+
+        # Step 1
+        sql = f"DROP TABLE IF EXISTS {schema_name}.{old_load_table_name} CASCADE;  "
+        self.logger.debug(f"Table Rename, executing '{sql}'")
+        self.target_db.execute(sql)
+
+        # Step 2
+        sql_builder = io.StringIO()
+        sql_builder.write("BEGIN TRANSACTION; ")
+
+        # Step 3
+        sql_builder.write(
+            f"ALTER TABLE IF EXISTS {schema_name}.{target_table_name} RENAME TO {old_load_table_name}; "
+        )
+
+        # Step 4
+        sql_builder.write(
+            f"ALTER TABLE {schema_name}.{source_table_name} RENAME TO {target_table_name}; "
+        )
+
+        sql_builder.write("COMMIT TRANSACTION; ")
+        self.logger.debug(f"Table Rename, executing '{sql_builder.getvalue()}'")
+        self.target_db.execute(sql_builder.getvalue())
+
+        sql_builder.close()
+
+        sql = f"DROP TABLE IF EXISTS {schema_name}.{old_load_table_name} CASCADE "
+        self.logger.debug(f"Table Rename, executing '{sql}'")
+        self.target_db.execute(sql)
+
+    # With a chunk_key, the upsert only takes the stage rows whose chunk_key is in the range
+    # (:lower_bound, :upper_bound], either bound being null for an open ended range.
+    # With skip_unchanged, conflicting rows are only updated when they would change: 'hash' compares a hash of the
+    # row kept in the ROW_HASH audit column, 'compare' compares every column. The upsert returns the number of rows
+    # it inserted and updated. The stage table is in the target's schema unless a source_schema_name is given.
+    # With changed_columns, the stage rows only hold the columns their CHANGED_COLUMNS flags as changed, and the
+    # other columns are taken from the row already loaded.
+    @staticmethod
+    def build_upsert_sql(
+        schema_name,
+        source_table_name,
+        target_table_name,
+        columns_config,
+        chunk_key=None,
+        skip_unchanged=None,
+        source_schema_name=None,
+        changed_columns=False,
+    ):
+        if (
+            skip_unchanged is not None
+            and skip_unchanged not in DestinationTableManager.SKIP_UNCHANGED_MODES
+        ):
+            raise ValueError(
+                f"Unknown upsert_skip_unchanged '{skip_unchanged}', "
+                f"expected one of {DestinationTableManager.SKIP_UNCHANGED_MODES}"
+            )
+
+        column_array = list(
+            map(lambda column: column["destination"]["name"], columns_config)
+        )
+        audit_column_array = [
+            Providers.AuditColumnsNames.TIMESTAMP,
+            Providers.AuditColumnsNames.IS_DELETED,
+            Providers.AuditColumnsNames.CHANGE_VERSION,
+        ]
+        column_list = ",".join(map(str, column_array + audit_column_array))
+
+        primary_key_column_array = [
+            column_config["destination"]["name"]
+            for column_config in columns_config
+            if "primary_key" in column_config["destination"]
+            and column_config["destination"]["primary_key"]
+        ]
+
+        primary_key_column_list = ",".join(map(str, primary_key_column_array))
+
+        from_sql = f"{source_schema_name or schema_name}.{source_table_name}"
+        stage_prefix = ""
+        column_values = column_array
+        if changed_columns:
+            stage_alias = DestinationTableManager.STAGE_ALIAS
+            loaded_alias = DestinationTableManager.LOADED_ALIAS
+            stage_prefix = f"{stage_alias}."
+            column_values = DestinationTableManager.build_changed_column_values(
+                columns_config
+            )
+            join_on = " AND ".join(
+                f"{loaded_alias}.{column} = {stage_alias}.{column}"
+                for column in primary_key_column_array
+            )
+            from_sql += (
+                f" AS {stage_alias}"
+                f" LEFT JOIN {schema_name}.{target_table_name} AS {loaded_alias} ON {join_on}"
+            )
+            if chunk_key is not None:
+                chunk_key = f"{stage_prefix}{chunk_key}"
+        select_values = column_values + [
+            f"{stage_prefix}{column}" for column in audit_column_array
+        ]
+
+        if skip_unchanged == "hash":
+            column_list = column_list + f",{Providers.AuditColumnsNames.ROW_HASH}"
+            select_values.append(
+                DestinationTableManager.build_row_hash_sql(
+                    column_values
+                    + [f"{stage_prefix}{Providers.AuditColumnsNames.IS_DELETED}"]
+                )
+            )
+        select_list = ",".join(select_values)
+
+        # the value each column is updated to, from the conflicting stage row
+        deleted_column = f"EXCLUDED.{Providers.AuditColumnsNames.IS_DELETED}"
+        assignments = []
+        for column_config in columns_config:
+            col_name = column_config["destination"]["name"]
+            if (
+                "preserve_after_delete" in column_config["destination"]
+                and column_config["destination"]["preserve_after_delete"]
+            ):
+                existing_column = f"{target_table_name}.{col_name}"
+                excluded_column = f"EXCLUDED.{col_name}"
+                assignments.append(
+                    (
+                        column_config,
+                        f"CASE WHEN {deleted_column} = TRUE THEN {existing_column} ELSE {excluded_column} END",
+                    )
+                )
+            else:
+                assignments.append((column_config, f"EXCLUDED.{col_name}"))
+
+        sql_builder = io.StringIO()
+        sql_builder.write("WITH upserted AS ( \n")
+        sql_builder.write(
+            f"INSERT INTO {schema_name}.{target_table_name} ({column_list}) \n"
+        )
+        sql_builder.write(f" SELECT {select_list} FROM {from_sql} \n")
+        if chunk_key is not None:
+            sql_builder.write(
+                f" WHERE (:lower_bound IS NULL OR {chunk_key} > :lower_bound)"
+                f" AND (:upper_bound IS NULL OR {chunk_key} <= :upper_bound) \n"
+            )
+        sql_builder.write(f" ON CONFLICT({primary_key_column_list}) DO UPDATE SET ")
+
+        for column_config, value in assignments:
+            sql_builder.write(f"{column_config['destination']['name']} = {value},\n")
+
+        sql_builder.write(
+            "{0} = EXCLUDED.{0},\n".format(Providers.AuditColumnsNames.TIMESTAMP)
+        )
+        sql_builder.write(
+            "{0} = EXCLUDED.{0},\n".format(Providers.AuditColumnsNames.IS_DELETED)
+        )
+        sql_builder.write(
+            "{0} = EXCLUDED.{0}\n".format(Providers.AuditColumnsNames.CHANGE_VERSION)
+        )
+
+        if skip_unchanged is not None:
+            # citext compares case insensitively, so strings are compared as text to still pick up changes of case
+            existing_values = [
+                DestinationTableManager.as_comparable(
+                    column_config, f"{target_table_name}.{column_config['destination']['name']}"
+                )
+                for column_config, _ in assignments
+            ] + [f"{target_table_name}.{Providers.AuditColumnsNames.IS_DELETED}"]
+            new_values = [
+                DestinationTableManager.as_comparable(column_config, f"({value})")
+                for column_config, value in assignments
+            ] + [deleted_column]
+            columns_changed = (
+                f"({','.join(existing_values)}) IS DISTINCT FROM ({','.join(new_values)})"
+            )
+
+        if skip_unchanged == "hash":
+            row_hash_column = Providers.AuditColumnsNames.ROW_HASH
+            sql_builder.write(f",{row_hash_column} = EXCLUDED.{row_hash_column}\n")
+            # the rows a full refresh wrote have no hash yet, so they're compared column by column until they change
+            sql_builder.write(
+                f" WHERE CASE WHEN {target_table_name}.{row_hash_column} IS NULL THEN {columns_changed}"
+                f" ELSE {target_table_name}.{row_hash_column} IS DISTINCT FROM EXCLUDED.{row_hash_column} END\n"
+            )
+        elif skip_unchanged == "compare":
+            sql_builder.write(f" WHERE {columns_changed}\n")
+
+        # xmax is only zero for rows that were inserted rather than updated
+        sql_builder.write(" RETURNING (xmax = 0) AS inserted) \n")
+        sql_builder.write(
+            "SELECT count(*) FILTER (WHERE inserted) AS inserted_row_count, "
+            "count(*) FILTER (WHERE NOT inserted) AS updated_row_count FROM upserted;\n"
+        )
+
+        upsert_sql = sql_builder.getvalue()
+        sql_builder.close()
+        return upsert_sql
+
+    # The value of each column of a stage row whose CHANGED_COLUMNS flags which of its columns are set, in the order
+    # of the model's columns other than its primary key. A row that hasn't been loaded yet has all of them set.
+    @staticmethod
+    def build_changed_column_values(columns_config):
+        stage_alias = DestinationTableManager.STAGE_ALIAS
+        loaded_alias = DestinationTableManager.LOADED_ALIAS
+        changed_columns = f"{stage_alias}.{Providers.AuditColumnsNames.CHANGED_COLUMNS}"
+        values = []
+        position = 0
+        for column_config in columns_config:
+            col_name = column_config["destination"]["name"]
+            if column_config["destination"].get("primary_key", False):
+                values.append(f"{stage_alias}.{col_name}")
+                continue
+            position += 1
+            values.append(
+                f"CASE WHEN substring({changed_columns}, {position}, 1) = '0'"
+                f" THEN {loaded_alias}.{col_name} ELSE {stage_alias}.{col_name} END"
+            )
+        return values
+
+    # A hash of the values of a row, as a uuid to keep it to 16 bytes
+    @staticmethod
+    def build_row_hash_sql(row_values):
+        return f"md5(ROW({','.join(row_values)})::text)::uuid"
+
+    @staticmethod
+    def as_comparable(column_config, value):
+        if column_config["destination"]["type"] == "string":
+            return f"{value}::text"
+        return value
+
+    # The upsert starts with WITH rather than INSERT, which SQLAlchemy doesn't autocommit, so it's run in a
+    # transaction of its own that's committed once its counts are read
+    def upsert_table(self, upsert_sql):
+        self.logger.debug(f"UPSERT executing '{upsert_sql}'")
+        with self.target_db.begin() as connection:
+            row = connection.execute(upsert_sql).fetchone()
+        self.logger.debug("UPSERT completed")
+        return row["inserted_row_count"], row["updated_row_count"]
+
+    # Upserts over a raw connection, as part of the transaction it's in
+    def upsert_table_in_transaction(self, raw_connection, upsert_sql):
+        self.logger.debug(f"UPSERT executing '{upsert_sql}'")
+        curs = raw_connection.cursor()
+        curs.execute(upsert_sql)
+        inserted_row_count, updated_row_count = curs.fetchone()
+        self.logger.debug("UPSERT completed")
+        return inserted_row_count, updated_row_count
+
+    # Splits the table into ranges of its chunk_key holding about chunk_size rows each. Rows sharing a chunk_key
+    # value always end up in the same range.
+    def get_upsert_chunks(self, schema_name, table_name, chunk_key, chunk_size):
+        sql = (
+            f"SELECT DISTINCT {chunk_key} AS upper_bound FROM ( \n"
+            f" SELECT {chunk_key}, row_number() OVER (ORDER BY {chunk_key}) AS chunk_row \n"
+            f" FROM {schema_name}.{table_name}) AS numbered \n"
+            f"WHERE mod(chunk_row, {int(chunk_size)}) = 0 \n"
+            f"ORDER BY upper_bound;"
+        )
+        self.logger.debug(f"UPSERT chunking, executing '{sql}'")
+        upper_bounds = [row["upper_bound"] for row in self.target_db.execute(sql)]
+
+        lower_bounds = [None] + upper_bounds
+        return list(zip(lower_bounds, upper_bounds + [None]))
+
+    def upsert_chunk(self, chunked_upsert_sql, chunk):
+        lower_bound, upper_bound = chunk
+        with self.target_db.begin() as connection:
+            row = connection.execute(
+                text(chunked_upsert_sql), lower_bound=lower_bound, upper_bound=upper_bound
+            ).fetchone()
+            return row["inserted_row_count"], row["updated_row_count"]
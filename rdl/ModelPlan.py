@@ -0,0 +1,123 @@
+from rdl.DestinationTableManager import DestinationTableManager
+from rdl.column_transformers.TransformPlan import TransformPlan
+from rdl.shared import Providers
+
+
+class ModelPlan(object):
+    # Everything about loading a model that doesn't change from batch to batch, worked out once when the model is
+    # started rather than for every batch. A temporary_stage plan stages the model in a temporary table of the
+    # stage table's name rather than in the stage table itself. A column_change_tracking plan loads just the columns
+    # that changed, as flagged by the CHANGED_COLUMNS audit column.
+    TEMPORARY_SCHEMA = "pg_temp"
+
+    def __init__(
+        self,
+        model_config,
+        full_refresh,
+        temporary_stage=False,
+        column_change_tracking=False,
+    ):
+        self.model_config = model_config
+        self.source_table_config = model_config["source_table"]
+        self.columns = model_config["columns"]
+        self.batch_config = model_config["batch"]
+        self.full_refresh = full_refresh
+        self.target_schema = model_config["target_schema"]
+        self.stage_table = model_config["stage_table"]
+        self.load_table = model_config["load_table"]
+        self.temporary_stage = temporary_stage
+        self.stage_schema = (
+            ModelPlan.TEMPORARY_SCHEMA if temporary_stage else self.target_schema
+        )
+        self.qualified_stage_table = f"{self.stage_schema}.{self.stage_table}"
+
+        # the source columns of a batch, in the order the sources return them in
+        self.source_column_names = [column["source_name"] for column in self.columns]
+        self.destination_column_names = {
+            column["source_name"]: column["destination"]["name"] for column in self.columns
+        }
+        self.destination_types = {
+            column["source_name"]: column["destination"]["type"] for column in self.columns
+        }
+        if not full_refresh:
+            self.source_column_names += [
+                Providers.AuditColumnsNames.CHANGE_VERSION,
+                Providers.AuditColumnsNames.IS_DELETED,
+            ]
+            self.destination_types[Providers.AuditColumnsNames.CHANGE_VERSION] = "bigint"
+            self.destination_types[Providers.AuditColumnsNames.IS_DELETED] = "boolean"
+        self.column_change_tracking = column_change_tracking
+        if column_change_tracking:
+            self.source_column_names.append(Providers.AuditColumnsNames.CHANGED_COLUMNS)
+            self.destination_types[Providers.AuditColumnsNames.CHANGED_COLUMNS] = "string"
+
+        self.source_column_indexes = {
+            source_column_name: index
+            for index, source_column_name in enumerate(self.source_column_names)
+        }
+
+        self.transform_plan = TransformPlan(self.columns)
+        self.skip_unchanged = self.batch_config.get("upsert_skip_unchanged")
+        self.upsert_sql = DestinationTableManager.build_upsert_sql(
+            self.target_schema,
+            self.stage_table,
+            self.load_table,
+            self.columns,
+            skip_unchanged=self.skip_unchanged,
+            source_schema_name=self.stage_schema,
+            changed_columns=column_change_tracking,
+        )
+        # chunked upserts split the stage table by the destination column of the leading primary key
+        self.upsert_chunk_key = self.destination_column_names[
+            self.source_table_config["primary_keys"][0]
+        ]
+        self.chunked_upsert_sql = DestinationTableManager.build_upsert_sql(
+            self.target_schema,
+            self.stage_table,
+            self.load_table,
+            self.columns,
+            chunk_key=self.upsert_chunk_key,
+            skip_unchanged=self.skip_unchanged,
+            source_schema_name=self.stage_schema,
+            changed_columns=column_change_tracking,
+        )
+        self.copy_statements = {}
+
+    def get_destination_column_name(self, source_column_name):
+        destination_column_name = self.destination_column_names.get(source_column_name)
+        if destination_column_name is not None:
+            return destination_column_name
+
+        # Audit columns - map them straight through
+        if source_column_name.startswith(
+            Providers.AuditColumnsNames.audit_column_prefix
+        ):
+            return source_column_name
+
+        message = f"A source column with name '{source_column_name}' was not found in the column configuration"
+        raise ValueError(message)
+
+    def get_destination_type(self, source_column_name):
+        destination_type = self.destination_types.get(source_column_name)
+        if destination_type is not None:
+            return destination_type
+
+        message = f"A source column with name '{source_column_name}' was not found in the column configuration"
+        raise ValueError(message)
+
+    def get_copy_statement(self, source_column_names, encoder, freeze=False):
+        statement_key = (tuple(source_column_names), type(encoder), freeze)
+        statement = self.copy_statements.get(statement_key)
+        if statement is None:
+            column_list = ",".join(
+                self.get_destination_column_name(source_column_name)
+                for source_column_name in source_column_names
+            )
+            copy_options = encoder.get_copy_options(column_list)
+            if freeze:
+                copy_options.append("FREEZE")
+            statement = f"COPY {self.qualified_stage_table}({column_list}) FROM STDIN"
+            if copy_options:
+                statement += f" WITH ({', '.join(copy_options)})"
+            self.copy_statements[statement_key] = statement
+        return statement
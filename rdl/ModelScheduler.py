@@ -0,0 +1,107 @@
+import heapq
+import logging
+
+
+class ModelScheduler(object):
+    # without a history of both kinds of load, an incrementally loaded row is taken to cost this many times a fully
+    # reloaded one, as it's joined to the change table, staged and upserted rather than copied straight in
+    INCREMENTAL_ROW_COST_RATIO = 3
+
+    def __init__(self, data_load_tracker_repository, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.data_load_tracker_repository = data_load_tracker_repository
+
+    def estimate_costs(self, expected_full_refresh_by_model_name):
+        # the cost of a model is the average execution time of its recent successful loads of the same kind
+        # (full or incremental), as a full refresh of a table usually costs orders of magnitude more than an
+        # incremental load of it. rows processed is kept alongside to break ties between equally long models, and
+        # the time per row to weigh one kind of load against the other.
+        model_names = list(expected_full_refresh_by_model_name.keys())
+        statistics = self.data_load_tracker_repository.get_model_execution_statistics(
+            model_names
+        )
+
+        costs = {}
+        for model_name, expected_full_refresh in expected_full_refresh_by_model_name.items():
+            costs[model_name] = statistics.get((model_name, expected_full_refresh))
+
+        return costs
+
+    def estimate_full_refresh_break_even(self, model_name, table_row_count):
+        statistics = self.data_load_tracker_repository.get_model_execution_statistics(
+            [model_name]
+        )
+        return ModelScheduler.get_full_refresh_break_even(
+            table_row_count,
+            statistics.get((model_name, True)),
+            statistics.get((model_name, False)),
+        )
+
+    @staticmethod
+    def get_full_refresh_break_even(table_row_count, full_refresh_cost, incremental_cost):
+        # the number of changed rows above which reloading the whole table is expected to be quicker than loading
+        # just the changes, going by the average time per row of the model's recent loads of each kind
+        if table_row_count is None:
+            return None
+        full_refresh_ms_per_row = ModelScheduler.get_ms_per_row(full_refresh_cost)
+        incremental_ms_per_row = ModelScheduler.get_ms_per_row(incremental_cost)
+        if full_refresh_ms_per_row is None or incremental_ms_per_row is None:
+            return int(table_row_count / ModelScheduler.INCREMENTAL_ROW_COST_RATIO)
+        return int(table_row_count * full_refresh_ms_per_row / incremental_ms_per_row)
+
+    @staticmethod
+    def get_ms_per_row(cost):
+        if cost is None:
+            return None
+        return cost[2] or None
+
+    @staticmethod
+    def order_by_cost(costs):
+        # models without any history are assumed to be the most expensive ones, so they start first rather than
+        # surprising us at the end of the run.
+        def sort_key(model_name):
+            cost = costs[model_name]
+            if cost is None:
+                return (0, 0, 0, model_name)
+            execution_time_ms, rows_processed = cost[0], cost[1]
+            return (1, -execution_time_ms, -rows_processed, model_name)
+
+        return sorted(costs.keys(), key=sort_key)
+
+    @staticmethod
+    def fill_unknown_costs(costs):
+        known_execution_times = [cost[0] for cost in costs.values() if cost is not None]
+        default_execution_time_ms = max(known_execution_times, default=0)
+        return {
+            model_name: cost[0] if cost is not None else default_execution_time_ms
+            for model_name, cost in costs.items()
+        }
+
+    @staticmethod
+    def predict_makespan(ordered_model_names, execution_time_ms_by_model_name, worker_count):
+        # simulates handing the models out in order to whichever worker frees up first
+        worker_finish_times = [0] * max(worker_count, 1)
+        for model_name in ordered_model_names:
+            earliest_finish_time = heapq.heappop(worker_finish_times)
+            heapq.heappush(
+                worker_finish_times,
+                earliest_finish_time + execution_time_ms_by_model_name[model_name],
+            )
+        return max(worker_finish_times)
+
+    def report(self, predicted_execution_time_ms, actual_execution_time_ms, predicted_makespan_ms,
+               actual_makespan_ms, worker_count):
+        for model_name, actual_ms in sorted(
+            actual_execution_time_ms.items(), key=lambda item: -item[1]
+        ):
+            self.logger.debug(
+                f"Schedule report for {model_name}: "
+                f"predicted {predicted_execution_time_ms.get(model_name, 0) / 1000:.1f}s, "
+                f"actual {actual_ms / 1000:.1f}s"
+            )
+
+        self.logger.info(
+            f"Schedule report: predicted makespan {predicted_makespan_ms / 1000:.1f}s, "
+            f"actual makespan {actual_makespan_ms / 1000:.1f}s "
+            f"over {len(actual_execution_time_ms)} models with parallelism={worker_count}"
+        )
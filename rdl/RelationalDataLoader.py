@@ -2,6 +2,7 @@ import logging
 import argparse
 from datetime import datetime
 from sqlalchemy import create_engine
+from rdl.BatchDataLoader import BatchDataLoader
 from rdl.DataLoadManager import DataLoadManager
 from rdl.shared import Constants, Providers
 from rdl.data_load_tracking.DataLoadTrackerRepository import DataLoadTrackerRepository
@@ -40,7 +41,18 @@ class RelationalDataLoader:
         repository = DataLoadTrackerRepository(session_maker)
 
         data_load_manager = DataLoadManager(
-            self.args.configuration_folder, source_db, destination_db, repository
+            self.args.configuration_folder,
+            source_db,
+            destination_db,
+            repository,
+            parallelism=self.args.parallelism,
+            copy_format=self.args.copy_format,
+            source_db_factory=lambda: self.data_source_factory.create_source(
+                self.args.source_connection_string
+            ),
+            target_db_factory=lambda: create_engine(
+                self.args.destination_connection_string
+            ),
         )
         total_rows_processed = data_load_manager.start_imports(
             self.args.force_full_refresh_models
@@ -168,6 +180,24 @@ class RelationalDataLoader:
             help=f"Set the audit column prefix, used in the destination schema. Default is 'rdl_'. ",
         )
 
+        process_command_parser.add_argument(
+            "-n",
+            "--parallelism",
+            default=1,
+            type=self.positive_int,
+            help="The number of models to process concurrently. Each concurrent worker uses its own source "
+            "and destination connections. Default is 1.",
+        )
+
+        process_command_parser.add_argument(
+            "-c",
+            "--copy-format",
+            default="csv",
+            choices=BatchDataLoader.COPY_FORMATS,
+            help="The format batches are copied into the destination in, for models that don't set "
+            "'copy_format' in their batch settings. Default is 'csv'.",
+        )
+
         audit_command_parser = subparsers.add_parser(
             "audit", help="provides list of processed models since a given timestamp"
         )
@@ -217,6 +247,17 @@ class RelationalDataLoader:
 
         return parser.parse_args()
 
+    def positive_int(self, value):
+        try:
+            int_value = int(value)
+        except ValueError:
+            int_value = 0
+        if int_value < 1:
+            raise argparse.ArgumentTypeError(
+                f"Invalid value: '{value}', a positive integer is expected."
+            )
+        return int_value
+
     def str2bool(self, v):
         if v.lower() in ("yes", "true", "t", "y", "1"):
             return True
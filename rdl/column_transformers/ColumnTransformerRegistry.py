@@ -0,0 +1,47 @@
+from rdl.column_transformers.StringTransformers import (
+    ToUpper,
+    TrimWhiteSpace,
+    NullIfEmpty,
+    Truncate,
+    Mask,
+    Hash,
+)
+from rdl.shared.Utils import create_type_instance
+
+
+class ColumnTransformerRegistry(object):
+    TRANSFORMERS = {
+        "upper": ToUpper,
+        "trim": TrimWhiteSpace,
+        "null_if_empty": NullIfEmpty,
+        "truncate": Truncate,
+        "mask": Mask,
+        "hash": Hash,
+        # the names models used before the registry existed
+        "ToUpper": ToUpper,
+        "TrimWhiteSpace": TrimWhiteSpace,
+    }
+
+    # A column_transformer is either the name of a transformer, or an object with its `name` and the options it
+    # takes, eg {"name": "truncate", "length": 10}. Names that aren't registered are taken as the fully qualified
+    # name of a user supplied transformer class, eg "my_package.my_module.MyTransformer", which must have a
+    # `transform(series)` method.
+    @staticmethod
+    def create_transformer(column_transformer):
+        if isinstance(column_transformer, str):
+            name, options = column_transformer, {}
+        else:
+            options = dict(column_transformer)
+            name = options.pop("name")
+
+        transformer_class = ColumnTransformerRegistry.TRANSFORMERS.get(name)
+        if transformer_class is not None:
+            return name, transformer_class(**options)
+
+        if "." not in name:
+            message = (
+                f"Unknown column transformer '{name}', choose from "
+                f"{list(ColumnTransformerRegistry.TRANSFORMERS.keys())} or give the fully qualified name of a class"
+            )
+            raise ValueError(message)
+        return name, create_type_instance(name, **options)
@@ -1,11 +1,59 @@
+import hashlib
+
+
+# Each transformer transforms a whole column at once, leaving nulls as they are.
 class ToUpper:
     @staticmethod
-    def execute(text_in):
-        x = text_in.upper()
-        return x
+    def transform(series):
+        return series.str.upper()
 
 
 class TrimWhiteSpace:
     @staticmethod
-    def execute(text_in):
-        return text_in.strip()
+    def transform(series):
+        return series.str.strip()
+
+
+class NullIfEmpty:
+    @staticmethod
+    def transform(series):
+        return series.mask(series.str.len() == 0)
+
+
+class Truncate:
+    def __init__(self, length):
+        self.length = length
+
+    def transform(self, series):
+        return series.str.slice(0, self.length)
+
+
+class Mask:
+    # replaces all but the last `visible` characters, eg '************1234'
+    def __init__(self, visible=4, character="*"):
+        self.visible = visible
+        self.character = character
+
+    def transform(self, series):
+        if self.visible <= 0:
+            return series.str.replace(r"(?s).", self.character, regex=True)
+        return series.str.slice(0, -self.visible).str.replace(
+            r"(?s).", self.character, regex=True
+        ) + series.str.slice(-self.visible)
+
+
+class Hash:
+    # a salted hex digest, so values can still be joined on without being readable
+    def __init__(self, algorithm="sha256", salt=""):
+        self.algorithm = algorithm
+        self.salt = salt
+        # fails on an unknown algorithm when the model is read rather than on its first batch
+        hashlib.new(algorithm)
+
+    def transform(self, series):
+        return series.map(self.hash, na_action="ignore")
+
+    def hash(self, value):
+        return hashlib.new(
+            self.algorithm, f"{self.salt}{value}".encode("utf-8")
+        ).hexdigest()
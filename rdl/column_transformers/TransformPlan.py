@@ -0,0 +1,61 @@
+from datetime import datetime
+
+from rdl.column_transformers.ColumnTransformerRegistry import ColumnTransformerRegistry
+
+
+class TransformPlan(object):
+    # The transforms each column of a model goes through before it is written, worked out once per model rather than
+    # per batch. Null characters are only looked for in text columns, as postgres doesn't support them in text fields
+    # and no other column can hold them.
+    TEXT_TYPES = ["string", "json"]
+    STRIP_NULL_CHARACTERS = "strip_null_characters"
+
+    def __init__(self, columns):
+        self.column_transforms = []
+        for column in columns:
+            transforms = []
+            if column["destination"]["type"] in TransformPlan.TEXT_TYPES:
+                transforms.append(
+                    (
+                        TransformPlan.STRIP_NULL_CHARACTERS,
+                        TransformPlan.strip_null_characters,
+                    )
+                )
+            if "column_transformer" in column:
+                name, transformer = ColumnTransformerRegistry.create_transformer(
+                    column["column_transformer"]
+                )
+                transforms.append((name, transformer.transform))
+            if transforms:
+                self.column_transforms.append((column["source_name"], transforms))
+
+        self.has_column_transformers = any(
+            "column_transformer" in column for column in columns
+        )
+
+    # Transforms the columns of the data frame in place, timing each transform on the batch tracker
+    def apply(self, data_frame, batch_tracker):
+        for source_name, transforms in self.column_transforms:
+            original_series = data_frame[source_name]
+            series = original_series
+            for name, transform in transforms:
+                transform_started = datetime.now()
+                series = transform(series)
+                batch_tracker.transform_completed(name, datetime.now() - transform_started)
+            if series is not original_series:
+                data_frame[source_name] = series
+        return data_frame
+
+    @staticmethod
+    def strip_null_characters(series):
+        # most batches have no null characters at all, so only the values that do are copied
+        if series.dtype != object:
+            return series
+        contains_null = series.str.contains("\x00", regex=False, na=False)
+        if not contains_null.any():
+            return series
+        series = series.copy()
+        series[contains_null] = series[contains_null].str.replace(
+            "\x00", "", regex=False
+        )
+        return series
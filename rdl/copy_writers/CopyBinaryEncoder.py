@@ -0,0 +1,239 @@
+import json
+import struct
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from itertools import chain, repeat
+
+import numpy
+import pandas
+
+
+class CopyBinaryEncoder(object):
+    # Encodes batches into postgres' binary COPY format, see https://www.postgresql.org/docs/current/sql-copy.html
+    # Every field is sent in its type's binary representation, so postgres doesn't have to parse any text and
+    # numerics keep every digit of their source value. Each column is encoded as a whole, as per the postgres type
+    # its destination type maps to in ColumnTypeResolver.POSTGRES_TYPE_MAP.
+    HEADER = b"PGCOPY\n\xff\r\n\x00" + (0).to_bytes(4, "big") + (0).to_bytes(4, "big")
+    TRAILER = (-1).to_bytes(2, "big", signed=True)
+    NULL_FIELD = (-1).to_bytes(4, "big", signed=True)
+    ROWS_PER_CHUNK = 10000
+    FILE_EXTENSION = "bin"
+
+    TIMESTAMP_EPOCH = datetime(2000, 1, 1)
+    NUMERIC_POSITIVE = 0x0000
+    NUMERIC_NEGATIVE = 0x4000
+    NUMERIC_NAN = 0xC000
+    JSONB_VERSION = b"\x01"
+
+    def __init__(self, destination_types):
+        self.encoders = [
+            CopyBinaryEncoder.get_encoder(destination_type)
+            for destination_type in destination_types
+        ]
+        self.field_count = len(self.encoders).to_bytes(2, "big")
+
+    @staticmethod
+    def get_copy_options(column_list):
+        return ["FORMAT binary"]
+
+    @staticmethod
+    def get_encoder(destination_type):
+        return {
+            "string": CopyBinaryEncoder.encode_text,
+            "datetime": CopyBinaryEncoder.encode_timestamp,
+            "json": CopyBinaryEncoder.encode_jsonb,
+            "numeric": CopyBinaryEncoder.encode_numeric,
+            "guid": CopyBinaryEncoder.encode_uuid,
+            "int": CopyBinaryEncoder.encode_int4,
+            "bigint": CopyBinaryEncoder.encode_int8,
+            "boolean": CopyBinaryEncoder.encode_bool,
+        }[destination_type]
+
+    def encode_data_frame(self, data_frame):
+        yield CopyBinaryEncoder.HEADER
+        for start in range(0, len(data_frame), CopyBinaryEncoder.ROWS_PER_CHUNK):
+            chunk = data_frame.iloc[start : start + CopyBinaryEncoder.ROWS_PER_CHUNK]
+            yield self.encode_columns(
+                [chunk.iloc[:, index] for index in range(len(chunk.columns))]
+            )
+        yield CopyBinaryEncoder.TRAILER
+
+    def encode_rows(self, rows):
+        yield CopyBinaryEncoder.HEADER
+        for start in range(0, len(rows), CopyBinaryEncoder.ROWS_PER_CHUNK):
+            chunk = rows[start : start + CopyBinaryEncoder.ROWS_PER_CHUNK]
+            yield self.encode_columns(
+                [pandas.Series(values, dtype=object) for values in zip(*chunk)]
+            )
+        yield CopyBinaryEncoder.TRAILER
+
+    # Encodes every column into a list of its fields, then interleaves them into tuples
+    def encode_columns(self, columns):
+        encoded_columns = [
+            encoder(column, column.isna().values)
+            for encoder, column in zip(self.encoders, columns)
+        ]
+        row_count = len(columns[0]) if columns else 0
+        return b"".join(
+            chain.from_iterable(
+                zip(repeat(self.field_count, row_count), *encoded_columns)
+            )
+        )
+
+    @staticmethod
+    def encode_fixed_width(values, nulls, dtype):
+        fields = numpy.empty(len(values), dtype=[("length", ">i4"), ("value", dtype)])
+        fields["length"] = numpy.dtype(dtype).itemsize
+        fields["value"] = values
+        data = fields.tobytes()
+        field_size = fields.dtype.itemsize
+        encoded = [
+            data[offset : offset + field_size]
+            for offset in range(0, len(data), field_size)
+        ]
+        for index in numpy.flatnonzero(nulls):
+            encoded[index] = CopyBinaryEncoder.NULL_FIELD
+        return encoded
+
+    @staticmethod
+    def encode_variable_width(column, nulls, to_bytes):
+        return [
+            CopyBinaryEncoder.NULL_FIELD
+            if null
+            else CopyBinaryEncoder.prefix_length(to_bytes(value))
+            for value, null in zip(column.values, nulls)
+        ]
+
+    @staticmethod
+    def prefix_length(data):
+        return len(data).to_bytes(4, "big") + data
+
+    @staticmethod
+    def encode_int4(column, nulls):
+        return CopyBinaryEncoder.encode_fixed_width(
+            column.fillna(0).astype("int64").values, nulls, ">i4"
+        )
+
+    @staticmethod
+    def encode_int8(column, nulls):
+        return CopyBinaryEncoder.encode_fixed_width(
+            column.fillna(0).astype("int64").values, nulls, ">i8"
+        )
+
+    @staticmethod
+    def encode_bool(column, nulls):
+        return CopyBinaryEncoder.encode_fixed_width(
+            column.fillna(False).astype(bool).values, nulls, "?"
+        )
+
+    @staticmethod
+    def encode_timestamp(column, nulls):
+        # microseconds since 2000-01-01, computed in python as sql server's dates don't all fit in datetime64[ns]
+        microseconds = [
+            0 if null else CopyBinaryEncoder.to_timestamp_microseconds(value)
+            for value, null in zip(column.values, nulls)
+        ]
+        return CopyBinaryEncoder.encode_fixed_width(
+            numpy.array(microseconds, dtype="int64"), nulls, ">i8"
+        )
+
+    @staticmethod
+    def to_timestamp_microseconds(value):
+        if isinstance(value, str):
+            value = pandas.Timestamp(value)
+        if isinstance(value, pandas.Timestamp):
+            value = value.to_pydatetime()
+        if not isinstance(value, datetime) and isinstance(value, date):
+            value = datetime.combine(value, datetime.min.time())
+        # as with the text formats, a timestamp without time zone keeps the local time and drops the offset
+        value = value.replace(tzinfo=None)
+        return (value - CopyBinaryEncoder.TIMESTAMP_EPOCH) // timedelta(microseconds=1)
+
+    @staticmethod
+    def encode_text(column, nulls):
+        return CopyBinaryEncoder.encode_variable_width(
+            column, nulls, lambda value: str(value).replace("\x00", "").encode("utf-8")
+        )
+
+    @staticmethod
+    def encode_jsonb(column, nulls):
+        return CopyBinaryEncoder.encode_variable_width(
+            column,
+            nulls,
+            lambda value: CopyBinaryEncoder.JSONB_VERSION
+            + (value if isinstance(value, str) else json.dumps(value))
+            .replace("\x00", "")
+            .encode("utf-8"),
+        )
+
+    @staticmethod
+    def encode_uuid(column, nulls):
+        return CopyBinaryEncoder.encode_variable_width(
+            column,
+            nulls,
+            lambda value: value.bytes
+            if isinstance(value, uuid.UUID)
+            else uuid.UUID(str(value)).bytes,
+        )
+
+    @staticmethod
+    def encode_numeric(column, nulls):
+        return CopyBinaryEncoder.encode_variable_width(
+            column, nulls, CopyBinaryEncoder.to_numeric_bytes
+        )
+
+    @staticmethod
+    def to_numeric_bytes(value):
+        # a numeric is sent as its sign, display scale and base 10000 digits, the first of which is
+        # 10000 ^ weight. floats go through their shortest round tripping representation.
+        if not isinstance(value, Decimal):
+            value = Decimal(repr(value) if isinstance(value, float) else str(value))
+
+        if value.is_nan():
+            return CopyBinaryEncoder.pack_numeric(
+                [], 0, CopyBinaryEncoder.NUMERIC_NAN, 0
+            )
+        if value.is_infinite():
+            raise ValueError(f"Numeric value '{value}' can't be written to postgres")
+
+        sign, digits, exponent = value.as_tuple()
+        digits = "".join(map(str, digits))
+        if exponent >= 0:
+            integer_digits, fraction_digits = digits + "0" * exponent, ""
+        elif len(digits) > -exponent:
+            integer_digits, fraction_digits = digits[:exponent], digits[exponent:]
+        else:
+            integer_digits, fraction_digits = "", digits.rjust(-exponent, "0")
+
+        integer_digits = integer_digits.rjust(-(-len(integer_digits) // 4) * 4, "0")
+        fraction_digits = fraction_digits.ljust(-(-len(fraction_digits) // 4) * 4, "0")
+        groups = [
+            int(integer_digits[index : index + 4])
+            for index in range(0, len(integer_digits), 4)
+        ] + [
+            int(fraction_digits[index : index + 4])
+            for index in range(0, len(fraction_digits), 4)
+        ]
+        weight = len(integer_digits) // 4 - 1
+
+        while groups and groups[0] == 0:
+            groups.pop(0)
+            weight -= 1
+        while groups and groups[-1] == 0:
+            groups.pop()
+        if not groups:
+            weight = 0
+
+        return CopyBinaryEncoder.pack_numeric(
+            groups,
+            weight,
+            CopyBinaryEncoder.NUMERIC_NEGATIVE if sign else CopyBinaryEncoder.NUMERIC_POSITIVE,
+            max(0, -exponent),
+        )
+
+    @staticmethod
+    def pack_numeric(groups, weight, sign, display_scale):
+        return struct.pack(
+            f">hhHh{len(groups)}h", len(groups), weight, sign, display_scale, *groups
+        )
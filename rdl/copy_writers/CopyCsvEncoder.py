@@ -0,0 +1,46 @@
+import csv
+
+
+class CopyCsvEncoder(object):
+    # Encodes data frames into csv for COPY a chunk of rows at a time, sizing the chunks by the bytes the previous
+    # one took up, so encoding a batch takes about CHUNK_SIZE bytes at any time whatever the width of its rows.
+    CHUNK_SIZE = 1024 * 1024
+    FIRST_CHUNK_ROWS = 100
+    FILE_EXTENSION = "csv"
+
+    @staticmethod
+    def get_copy_options(column_list):
+        # FORCE_NULL: ensure quoted fields are checked for NULLs as by default they are assumed to be non-null
+        # specify null as \N so that psql doesn't assume empty strings are nulls
+        return ["format csv", "null '\\N'", f"FORCE_NULL ({column_list})"]
+
+    def encode_data_frame(self, data_frame):
+        start = 0
+        rows_per_chunk = CopyCsvEncoder.FIRST_CHUNK_ROWS
+        while start < len(data_frame):
+            chunk = CopyCsvEncoder.encode_chunk(
+                data_frame.iloc[start : start + rows_per_chunk]
+            )
+            start += rows_per_chunk
+            rows_per_chunk = max(
+                1, CopyCsvEncoder.CHUNK_SIZE * rows_per_chunk // max(len(chunk), 1)
+            )
+            yield chunk
+
+    @staticmethod
+    def encode_chunk(data_frame):
+        # quoting: Due to \r existing in strings in MSSQL we must quote anything that's non numeric just to be safe
+        # line_terminator: ensure \n is used even on windows machines as prod runs on *nix with \n
+        # na_rep: Due to us quoting everything non-numeric, our null's must be represented by something special, as
+        # the default null representation (nothing), once quoted, is equivalent to an empty string
+        # float_format: used to truncate any insignificant digits. Unfortunately it gives us an artificial limitation
+        return data_frame.to_csv(
+            None,
+            header=False,
+            index=False,
+            na_rep="\\N",
+            float_format="%.16g",
+            quotechar='"',
+            quoting=csv.QUOTE_NONNUMERIC,
+            line_terminator="\n",
+        ).encode("utf-8")
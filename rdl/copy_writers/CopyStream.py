@@ -0,0 +1,26 @@
+import io
+
+
+class CopyStream(io.RawIOBase):
+    # A read-only file object over an iterable of byte strings, so COPY can consume data as it is produced
+    # rather than from a buffer holding all of it.
+    BUFFER_SIZE = 65536
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.pending = memoryview(b"")
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.pending:
+            try:
+                self.pending = memoryview(next(self.chunks))
+            except StopIteration:
+                return 0
+
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
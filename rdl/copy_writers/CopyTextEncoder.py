@@ -0,0 +1,58 @@
+class CopyTextEncoder(object):
+    # Encodes rows into postgres' COPY text format, see https://www.postgresql.org/docs/current/sql-copy.html
+    # Only text columns can contain the delimiter, newlines or backslashes, so only they need escaping. Null
+    # characters are dropped as postgres doesn't support them in text fields.
+    NULL = "\\N"
+    DELIMITER = "\t"
+    ROWS_PER_CHUNK = 1000
+    FILE_EXTENSION = "txt"
+
+    TEXT_ESCAPES = str.maketrans(
+        {"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r", "\x00": None}
+    )
+    TEXT_TYPES = ["string", "json"]
+
+    def __init__(self, destination_types):
+        self.encoders = [
+            CopyTextEncoder.get_encoder(destination_type)
+            for destination_type in destination_types
+        ]
+
+    @staticmethod
+    def get_copy_options(column_list):
+        return []
+
+    @staticmethod
+    def get_encoder(destination_type):
+        if destination_type in CopyTextEncoder.TEXT_TYPES:
+            return CopyTextEncoder.encode_text
+        if destination_type == "boolean":
+            return CopyTextEncoder.encode_boolean
+        return str
+
+    @staticmethod
+    def encode_text(value):
+        return str(value).translate(CopyTextEncoder.TEXT_ESCAPES)
+
+    @staticmethod
+    def encode_boolean(value):
+        return "t" if value else "f"
+
+    def encode_row(self, row):
+        return (
+            CopyTextEncoder.DELIMITER.join(
+                CopyTextEncoder.NULL if value is None else encoder(value)
+                for encoder, value in zip(self.encoders, row)
+            )
+            + "\n"
+        )
+
+    def encode_rows(self, rows):
+        lines = []
+        for row in rows:
+            lines.append(self.encode_row(row))
+            if len(lines) == CopyTextEncoder.ROWS_PER_CHUNK:
+                yield "".join(lines).encode("utf-8")
+                lines = []
+        if lines:
+            yield "".join(lines).encode("utf-8")
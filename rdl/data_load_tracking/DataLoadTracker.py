@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from rdl.shared import Constants
 
 
@@ -23,6 +23,7 @@ class DataLoadTracker:
         self.full_refresh_reason = full_refresh_reason
         self.failure_reason = None
         self.batches = []
+        self.upsert_chunks = []
         self.total_row_count = 0
 
     def start_batch(self):
@@ -42,23 +43,81 @@ class DataLoadTracker:
         for batch in self.batches:
             self.total_row_count += batch.row_count
 
+    def upsert_completed(self, inserted_row_count, updated_row_count, execute_time, chunk=None):
+        self.upsert_chunks.append((chunk, inserted_row_count, updated_row_count, execute_time))
+
+    # Every staged row is either inserted, updated or, when the upsert skips unchanged rows, left as it was
+    def get_upsert_statistics(self):
+        if not self.upsert_chunks:
+            return ""
+        inserted_row_count = sum(chunk[1] for chunk in self.upsert_chunks)
+        updated_row_count = sum(chunk[2] for chunk in self.upsert_chunks)
+        unchanged_row_count = self.total_row_count - inserted_row_count - updated_row_count
+        statistics = (
+            f"Upsert Inserted: {inserted_row_count}; Updated: {updated_row_count}; "
+            f"Unchanged: {unchanged_row_count}"
+        )
+        if len(self.upsert_chunks) > 1:
+            longest_execute_time = max(chunk[3] for chunk in self.upsert_chunks)
+            statistics += f"; Chunks: {len(self.upsert_chunks)}; Longest Chunk: {longest_execute_time}"
+        return statistics + "."
+
+    def get_statement_statistics(self):
+        statements_compiled = 0
+        statements_executed = 0
+        statement_compile_time = timedelta(0)
+        statement_execute_time = timedelta(0)
+        for batch in self.batches:
+            statements_compiled += batch.statements_compiled
+            statements_executed += batch.statements_executed
+            statement_compile_time += batch.statement_compile_time
+            statement_execute_time += batch.statement_execute_time
+
+        return (
+            f"Source statements compiled: {statements_compiled} in {statement_compile_time}; "
+            f"Source statements executed: {statements_executed} in {statement_execute_time}."
+        )
+
     class Batch:
         row_count = 0
         extract_started = None
         extract_completed = None
+        load_started = None
         load_completed = None
         status = Constants.BatchExecutionStatus.STARTED
 
         extract_execution_time = None
         extract_rows_per_second = 0
+        queue_wait_time = None
         load_execution_time = None
         load_rows_per_second = 0
         total_rows_per_second = 0
         total_execution_time = None
 
+        statements_compiled = 0
+        statements_executed = 0
+        statement_compile_time = timedelta(0)
+        statement_execute_time = timedelta(0)
+
+        transform_times = None
+
         def __init__(self):
             self.extract_started = datetime.now()
             self.status = Constants.BatchExecutionStatus.STARTED
+            self.transform_times = {}
+
+        def transform_completed(self, transform_name, execute_time):
+            self.transform_times[transform_name] = (
+                self.transform_times.get(transform_name, timedelta(0)) + execute_time
+            )
+
+        def statement_executed(self, compile_time, execute_time):
+            # a zero compile time means the statement was already compiled for this model by an earlier batch
+            if compile_time:
+                self.statements_compiled += 1
+                self.statement_compile_time += compile_time
+            self.statements_executed += 1
+            self.statement_execute_time += execute_time
 
         def extract_completed_successfully(self, row_count):
             self.status = Constants.BatchExecutionStatus.EXTRACT_COMPLETED_SUCCESSFULLY
@@ -74,11 +133,18 @@ class DataLoadTracker:
                     self.row_count / self.extract_execution_time.total_seconds()
                 )
 
+        def load_started_successfully(self):
+            self.load_started = datetime.now()
+            # time the extracted batch spent waiting for the previous batch to be written
+            self.queue_wait_time = self.load_started - self.extract_completed
+
         def load_completed_successfully(self):
             self.status = Constants.BatchExecutionStatus.LOAD_COMPLETED_SUCCESSFULLY
             self.load_completed = datetime.now()
 
-            self.load_execution_time = self.load_completed - self.extract_completed
+            if self.load_started is None:
+                self.load_started_successfully()
+            self.load_execution_time = self.load_completed - self.load_started
             if self.load_execution_time.total_seconds() == 0:
                 self.load_rows_per_second = self.row_count
             else:
@@ -99,10 +165,16 @@ class DataLoadTracker:
             self.load_completed = datetime.now()
 
         def get_statistics(self):
+            transform_times = "".join(
+                f"Transform Time ({transform_name}): {transform_time}; "
+                for transform_name, transform_time in self.transform_times.items()
+            )
             return (
                 f"Rows: {self.row_count}; "
                 f"Extract Execution Time: {self.extract_execution_time} "
                 f"@ {self.extract_rows_per_second:.2f} rows per second; "
+                f"Queue Wait Time: {self.queue_wait_time}; "
+                f"{transform_times}"
                 f"Load Execution Time: {self.load_execution_time} "
                 f"@ {self.load_rows_per_second:.2f} rows per second; "
                 f"Total Execution Time: {self.total_execution_time} "
@@ -5,6 +5,7 @@ from rdl.shared import Constants
 
 from sqlalchemy import desc
 from sqlalchemy import func
+from sqlalchemy import case, cast, Float
 
 
 class DataLoadTrackerRepository(object):
@@ -25,6 +26,90 @@ class DataLoadTrackerRepository(object):
         session.close()
         return result
 
+    def get_last_successful_data_load_executions(self, model_names):
+        session = self.session_maker()
+        results = (
+            session.query(ExecutionModelEntity)
+            .filter(
+                ExecutionModelEntity.model_name.in_(model_names),
+                ExecutionModelEntity.status
+                == Constants.ExecutionModelStatus.SUCCESSFUL,
+            )
+            .distinct(ExecutionModelEntity.model_name)
+            .order_by(
+                ExecutionModelEntity.model_name,
+                desc(ExecutionModelEntity.completed_on),
+            )
+            .all()
+        )
+        session.close()
+        return {result.model_name: result for result in results}
+
+    # The average execution time and rows processed of each model's recent successful loads of each kind, along with
+    # their average time per row. Loads that processed no rows still take time, so they're left out of the time per
+    # row, rather than having it look dearer than it is.
+    def get_model_execution_statistics(self, model_names, executions_to_consider=10):
+        session = self.session_maker()
+        recent_executions = (
+            session.query(
+                ExecutionModelEntity.model_name,
+                ExecutionModelEntity.is_full_refresh,
+                ExecutionModelEntity.execution_time_ms,
+                ExecutionModelEntity.rows_processed,
+                func.row_number()
+                .over(
+                    partition_by=(
+                        ExecutionModelEntity.model_name,
+                        ExecutionModelEntity.is_full_refresh,
+                    ),
+                    order_by=desc(ExecutionModelEntity.completed_on),
+                )
+                .label("recency"),
+            )
+            .filter(
+                ExecutionModelEntity.model_name.in_(model_names),
+                ExecutionModelEntity.status
+                == Constants.ExecutionModelStatus.SUCCESSFUL,
+                ExecutionModelEntity.execution_time_ms.isnot(None),
+            )
+            .subquery()
+        )
+        results = (
+            session.query(
+                recent_executions.c.model_name,
+                recent_executions.c.is_full_refresh,
+                func.avg(recent_executions.c.execution_time_ms),
+                func.avg(recent_executions.c.rows_processed),
+                func.avg(
+                    case(
+                        [
+                            (
+                                recent_executions.c.rows_processed > 0,
+                                cast(recent_executions.c.execution_time_ms, Float)
+                                / recent_executions.c.rows_processed,
+                            )
+                        ],
+                        else_=None,
+                    )
+                ),
+            )
+            .filter(recent_executions.c.recency <= executions_to_consider)
+            .group_by(
+                recent_executions.c.model_name, recent_executions.c.is_full_refresh
+            )
+            .all()
+        )
+        session.close()
+
+        statistics = {}
+        for model_name, is_full_refresh, execution_time_ms, rows_processed, ms_per_row in results:
+            statistics[(model_name, is_full_refresh)] = (
+                float(execution_time_ms),
+                float(rows_processed or 0),
+                float(ms_per_row) if ms_per_row is not None else None,
+            )
+        return statistics
+
     def create_execution(self):
         session = self.session_maker()
         new_execution = ExecutionEntity()
@@ -91,6 +176,31 @@ class DataLoadTrackerRepository(object):
         session.commit()
         session.close()
 
+    # Records each of the models as having been skipped, unchanged at sync_version, without loading any rows
+    def create_skipped_execution_models(self, execution_id, model_checksums, sync_version):
+        session = self.session_maker()
+        completed_on = session.query(func.now()).scalar()
+        session.add_all(
+            [
+                ExecutionModelEntity(
+                    execution_id=execution_id,
+                    model_name=model_name,
+                    status=Constants.ExecutionModelStatus.SUCCESSFUL,
+                    last_sync_version=sync_version,
+                    sync_version=sync_version,
+                    is_full_refresh=False,
+                    full_refresh_reason=Constants.FullRefreshReason.NOT_APPLICABLE,
+                    model_checksum=model_checksum,
+                    completed_on=completed_on,
+                    rows_processed=0,
+                    batches_processed=0,
+                )
+                for model_name, model_checksum in model_checksums.items()
+            ]
+        )
+        session.commit()
+        session.close()
+
     def save_execution_model(self, data_load_tracker):
         session = self.session_maker()
         current_execution_model = (
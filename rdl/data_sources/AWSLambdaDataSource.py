@@ -1,10 +1,10 @@
 import logging
-import pandas
 import json
 import boto3
 import time
 import datetime
 from botocore.client import Config
+from rdl.ColumnTypeResolver import ColumnTypeResolver
 from rdl.data_sources.ChangeTrackingInfo import ChangeTrackingInfo
 from rdl.data_sources.SourceTableInfo import SourceTableInfo
 from rdl.shared import Providers, Constants
@@ -40,6 +40,8 @@ class AWSLambdaDataSource(object):
             .split(AWSLambdaDataSource.CONNECTION_STRING_GROUP_SEPARATOR)
         )
 
+        self.column_type_resolver = ColumnTypeResolver()
+
         self.aws_sts_client = boto3.client("sts")
         role_credentials = self.__assume_role(
             self.connection_data[self.CONNECTION_DATA_ROLE_KEY],
@@ -66,7 +68,10 @@ class AWSLambdaDataSource(object):
     def get_connection_string_prefix():
         return AWSLambdaDataSource.CONNECTION_STRING_PREFIX
 
-    def get_table_info(self, table_config, last_known_sync_version):
+    # the lambda doesn't count the changed rows, so changed_row_count_limit is ignored
+    def get_table_info(
+        self, table_config, last_known_sync_version, changed_row_count_limit=None
+    ):
         column_names, last_sync_version, sync_version, full_refresh_required, data_changed_since_last_sync = self.__get_table_info(
             table_config, last_known_sync_version
         )
@@ -80,6 +85,37 @@ class AWSLambdaDataSource(object):
         source_table_info = SourceTableInfo(columns_in_database, change_tracking_info)
         return source_table_info
 
+    # the lambda only reports the change tracking version of one table at a time, so its models are always checked one
+    # by one
+    def get_current_sync_version(self):
+        return None
+
+    # the lambda only reads the info of one table at a time
+    def get_table_infos(self, table_info_requests):
+        return [
+            self.get_table_info(
+                table_config, last_known_sync_version, changed_row_count_limit
+            )
+            for table_config, last_known_sync_version, changed_row_count_limit in table_info_requests
+        ]
+
+    # the lambda has no command to count the table's rows, so none of its models are ever found to be cheaper to
+    # reload than to load incrementally
+    def get_table_row_count(self, table_config):
+        return None
+
+    def get_table_row_counts(self, table_configs):
+        return [None for _ in table_configs]
+
+    def get_key_ranges(self, table_config, range_count):
+        # the lambda pages through the table by itself, so its key space can't be split between readers
+        if range_count > 1:
+            self.logger.warning(
+                f"Parallel readers are not supported for AWS Lambda sources, "
+                f"reading {table_config['schema']}.{table_config['name']} with a single reader"
+            )
+        return [None]
+
     @prevent_senstive_data_logging
     def get_table_data_frame(
         self,
@@ -102,10 +138,168 @@ class AWSLambdaDataSource(object):
         )
         self.logger.debug(f"Finished read data from lambda.. : \n{None}")
         # should we log size of data extracted?
-        data_frame = self.__get_data_frame(data, column_names)
+        data_frame = self.column_type_resolver.create_data_frame(
+            data, column_names, columns_config
+        )
         batch_tracker.extract_completed_successfully(len(data_frame))
         return data_frame
 
+    # Reads a batch as plain rows, with the configured columns in their configured order, followed by the change
+    # version and deletion flag audit columns for incremental loads.
+    @prevent_senstive_data_logging
+    def get_table_rows(
+        self,
+        table_config,
+        columns_config,
+        batch_config,
+        batch_tracker,
+        batch_key_tracker,
+        full_refresh,
+        change_tracking_info,
+    ):
+        self.logger.debug(f"Starting read data from lambda.. : \n{None}")
+        column_names, data = self.__get_table_data(
+            table_config,
+            batch_config,
+            change_tracking_info,
+            full_refresh,
+            columns_config,
+            batch_key_tracker,
+        )
+        self.logger.debug(f"Finished read data from lambda.. : \n{None}")
+
+        # the lambda doesn't promise to return the columns in the order they were requested in
+        expected_column_names = [column["source_name"] for column in columns_config]
+        if not full_refresh:
+            expected_column_names += [
+                Providers.AuditColumnsNames.CHANGE_VERSION,
+                Providers.AuditColumnsNames.IS_DELETED,
+            ]
+        column_indexes = [
+            column_names.index(column_name) for column_name in expected_column_names
+        ]
+        rows = [tuple(row[index] for index in column_indexes) for row in data]
+
+        batch_tracker.extract_completed_successfully(len(rows))
+        return rows
+
+    def stream_table_data_frames(
+        self,
+        table_config,
+        columns_config,
+        batch_config,
+        data_load_tracker,
+        batch_key_tracker,
+        change_tracking_info,
+    ):
+        return self.__stream_batches(
+            "Streamed full refreshes are not supported",
+            self.get_table_data_frame,
+            True,
+            table_config,
+            columns_config,
+            batch_config,
+            data_load_tracker,
+            batch_key_tracker,
+            change_tracking_info,
+        )
+
+    def stream_table_rows(
+        self,
+        table_config,
+        columns_config,
+        batch_config,
+        data_load_tracker,
+        batch_key_tracker,
+        change_tracking_info,
+    ):
+        return self.__stream_batches(
+            "Streamed full refreshes are not supported",
+            self.get_table_rows,
+            True,
+            table_config,
+            columns_config,
+            batch_config,
+            data_load_tracker,
+            batch_key_tracker,
+            change_tracking_info,
+        )
+
+    def stream_changed_table_data_frames(
+        self,
+        table_config,
+        columns_config,
+        batch_config,
+        data_load_tracker,
+        batch_key_tracker,
+        change_tracking_info,
+    ):
+        return self.__stream_batches(
+            "Reading changed keys first is not supported",
+            self.get_table_data_frame,
+            False,
+            table_config,
+            columns_config,
+            batch_config,
+            data_load_tracker,
+            batch_key_tracker,
+            change_tracking_info,
+        )
+
+    def stream_changed_table_rows(
+        self,
+        table_config,
+        columns_config,
+        batch_config,
+        data_load_tracker,
+        batch_key_tracker,
+        change_tracking_info,
+    ):
+        return self.__stream_batches(
+            "Reading changed keys first is not supported",
+            self.get_table_rows,
+            False,
+            table_config,
+            columns_config,
+            batch_config,
+            data_load_tracker,
+            batch_key_tracker,
+            change_tracking_info,
+        )
+
+    # the lambda can't keep a cursor open between invocations, and reads the changes of each batch by itself, so
+    # streams are read by requesting batch after batch. the caller advances the bookmarks between batches.
+    def __stream_batches(
+        self,
+        unsupported_warning,
+        get_table_batch,
+        full_refresh,
+        table_config,
+        columns_config,
+        batch_config,
+        data_load_tracker,
+        batch_key_tracker,
+        change_tracking_info,
+    ):
+        self.logger.warning(
+            f"{unsupported_warning} for AWS Lambda sources, "
+            f"reading {table_config['schema']}.{table_config['name']} batch by batch"
+        )
+        while batch_key_tracker.has_more_data:
+            batch_tracker = data_load_tracker.start_batch()
+            batch = get_table_batch(
+                table_config,
+                columns_config,
+                batch_config,
+                batch_tracker,
+                batch_key_tracker,
+                full_refresh,
+                change_tracking_info,
+            )
+            yield batch_tracker, batch
+            if len(batch) == 0:
+                break
+
     def __get_table_info(self, table_config, last_known_sync_version):
         pay_load = {
             "Command": "GetTableInfo",
@@ -167,9 +361,6 @@ class AWSLambdaDataSource(object):
 
         return result["ColumnNames"], data
 
-    def __get_data_frame(self, data: [[]], column_names: []):
-        return pandas.DataFrame(data=data, columns=column_names)
-
     def __assume_role(self, role_arn, session_name):
         self.logger.debug(f"\nAssuming role with ARN: {role_arn}")
 
@@ -5,8 +5,19 @@ class ChangeTrackingInfo:
         sync_version,
         force_full_load,
         data_changed_since_last_sync,
+        changed_row_count=None,
+        columns_tracked=False,
     ):
         self.last_sync_version = last_sync_version
         self.sync_version = sync_version
         self.force_full_load = force_full_load
         self.data_changed_since_last_sync = data_changed_since_last_sync
+        # the number of rows changed since the last sync, only counted up to the limit it was asked for with
+        self.changed_row_count = changed_row_count
+        # whether change tracking records which columns each update changed, ie TRACK_COLUMNS_UPDATED = ON
+        self.columns_tracked = columns_tracked
+
+    # Column level change tracking is used for the incremental loads of models that ask for it, when the table's
+    # change tracking records the columns each update changed
+    def tracks_column_changes(self, batch_config):
+        return bool(batch_config.get("column_change_tracking", False) and self.columns_tracked)
@@ -1,15 +1,15 @@
 import io
 import logging
-import pandas
 import pyodbc
 import re
 
+from datetime import datetime, timedelta
+
 import sqlalchemy.exc
 from sqlalchemy import create_engine
-from sqlalchemy import MetaData
-from sqlalchemy.schema import Table
 from sqlalchemy.sql import text
 
+from rdl.BatchKeyTracker import BatchKeyTracker
 from rdl.ColumnTypeResolver import ColumnTypeResolver
 from rdl.data_sources.ChangeTrackingInfo import ChangeTrackingInfo
 from rdl.data_sources.SourceTableInfo import SourceTableInfo
@@ -20,6 +20,11 @@ from rdl.shared.Utils import prevent_senstive_data_logging
 class MsSqlDataSource(object):
     SOURCE_TABLE_ALIAS = "src"
     CHANGE_TABLE_ALIAS = "chg"
+    CHANGED_KEYS_TABLE = "#rdl_changed_keys"
+    WATERMARK_TYPES = ["rowversion", "datetime"]
+    # every table of a change tracking info batch binds two parameters, and SQL Server takes at most 2100
+    MAX_TABLES_PER_INFO_BATCH = 1000
+    WATERMARK_EPOCH = datetime(1970, 1, 1)
     MSSQL_STRING_REGEX = (
         r"mssql\+pyodbc://"
         r"(?:(?P<username>[^@/?&:]+)?:(?P<password>[^@/?&:]+)?@)?"
@@ -35,6 +40,7 @@ class MsSqlDataSource(object):
             connection_string, creator=self.__create_connection_with_failover
         )
         self.column_type_resolver = ColumnTypeResolver()
+        self.select_statements = {}
 
     @staticmethod
     def can_handle_connection_string(connection_string):
@@ -47,13 +53,310 @@ class MsSqlDataSource(object):
     def get_connection_string_prefix():
         return "mssql+pyodbc://"
 
-    def get_table_info(self, table_config, last_known_sync_version):
-        columns_in_database = self.__get_table_columns(table_config)
-        change_tracking_info = self.__get_change_tracking_info(
-            table_config, last_known_sync_version
+    def get_current_sync_version(self):
+        return self.database_engine.execute(
+            text("SELECT CHANGE_TRACKING_CURRENT_VERSION() AS sync_version")
+        ).scalar()
+
+    def get_table_info(
+        self, table_config, last_known_sync_version, changed_row_count_limit=None
+    ):
+        return self.get_table_infos(
+            [(table_config, last_known_sync_version, changed_row_count_limit)]
+        )[0]
+
+    # Reads the columns and change tracking info of many tables in one round trip. Each request is a tuple of the
+    # table_config, last_known_sync_version and changed_row_count_limit of a table, and the tables' SourceTableInfos
+    # are returned in the same order.
+    def get_table_infos(self, table_info_requests):
+
+        # in the following we determine for each table:
+        # a) the current sync version - sourced straight up from the source db.
+        # b) the last valid sync version - derived from the last known sync version and its validity based on the
+        #    current state of the source data.
+        # c) whether a full refresh is needed - this is a derivative of the validity of the last known sync version
+        #    because if the last known sync version is no longer valid, then our target data is in-an-invalid-state /
+        #    out-of-sync and a full refresh must be forced to sync the data.
+        # d) whether any data has changed for the table synce the last sync - this is a derivative of the results of
+        #    the CHANGETABLE() call, which we perform later and join to the table to load in the changed rows.
+        #
+        # the following help us determining the above:
+        # a) sync_version: the current version of change tracking at source database.
+        #                  it's value IS sourced from CHANGE_TRACKING_CURRENT_VERSION()
+        #                  and it's value also becomes the last_known_sync_version for the next iteration.
+        # b) last_known_sync_version: the tracking number of the last time we ran rdl, if we did.
+        #                  it's value WAS sourced from CHANGE_TRACKING_CURRENT_VERSION().
+        # c) min_valid_version: the minimum version that is valid for use in obtaining change tracking information from
+        #                       the specified table.
+        #                       it's value IS sourced from CHANGE_TRACKING_MIN_VALID_VERSION(OBJECT_ID(..)).
+        # d) data_changed_since_last_sync: whether or not data has changed in the table since last_known_sync_version
+        #                       it's value is sourced from CHANGETABLE(table, last_known_sync_version).
+        # e) changed_row_count: the number of rows in CHANGETABLE(table, last_known_sync_version), only counted up to
+        #                       changed_row_count_limit, so it costs no more than checking for a change when not
+        #                       asked for.
+        # f) columns_tracked: whether the table's change tracking records the columns each update changed.
+        #
+        # CHANGETABLE() only takes a literal table name, so each table gets its own statement in the batch, with its
+        # last known version and changed row count limit bound as parameters. the columns of each table are then read
+        # from sys.columns along with its change tracking info, as a row per column. a batch takes as many tables as
+        # keep it under SQL Server's limit on the number of parameters.
+        #
+        # tables with a watermark aren't change tracked, so they're left out of the batch and read on their own.
+        change_tracked_table_indexes = [
+            table_index
+            for table_index, (table_config, _, _) in enumerate(table_info_requests)
+            if MsSqlDataSource.get_watermark(table_config) is None
+        ]
+        rows = []
+        for start in range(
+            0, len(change_tracked_table_indexes), MsSqlDataSource.MAX_TABLES_PER_INFO_BATCH
+        ):
+            rows += self.__get_change_tracking_rows(
+                table_info_requests,
+                change_tracked_table_indexes[
+                    start : start + MsSqlDataSource.MAX_TABLES_PER_INFO_BATCH
+                ],
+            )
+
+        column_names = [[] for _ in table_info_requests]
+        table_rows = {}
+        for row in rows:
+            table_rows[row["table_index"]] = row
+            if row["column_name"] is not None:
+                column_names[row["table_index"]].append(row["column_name"])
+
+        source_table_infos = []
+        for table_index, (
+            table_config,
+            last_known_sync_version,
+            changed_row_count_limit,
+        ) in enumerate(table_info_requests):
+            if MsSqlDataSource.get_watermark(table_config) is not None:
+                source_table_infos.append(
+                    self.__get_watermark_table_info(
+                        table_config, last_known_sync_version, changed_row_count_limit
+                    )
+                )
+                continue
+            row = table_rows[table_index]
+            last_known_sync_version_is_valid = (
+                row["last_known_sync_version"] is not None
+                and row["min_valid_version"] is not None
+                and row["last_known_sync_version"] >= row["min_valid_version"]
+            )
+            change_tracking_info = ChangeTrackingInfo(
+                row["last_known_sync_version"] if last_known_sync_version_is_valid else 0,
+                row["sync_version"],
+                not last_known_sync_version_is_valid,
+                row["changed_row_count"] > 0,
+                row["changed_row_count"] if changed_row_count_limit else None,
+                bool(row["columns_tracked"]),
+            )
+            source_table_infos.append(
+                SourceTableInfo(column_names[table_index], change_tracking_info)
+            )
+        return source_table_infos
+
+    # A table with a watermark is loaded incrementally by the rows whose watermark column has gone past the watermark
+    # of the last load, rather than by change tracking. Its sync version is the highest watermark in the table, kept
+    # as a bigint, so it's stored and compared just as a change tracking version is. For rowversion watermarks, it's
+    # held below MIN_ACTIVE_ROWVERSION(), so rows written by transactions still in flight aren't passed over. There is
+    # no record of deleted rows, and the last sync version is only invalid if the table's watermark has gone back.
+    def __get_watermark_table_info(
+        self, table_config, last_known_sync_version, changed_row_count_limit
+    ):
+        watermark = MsSqlDataSource.get_watermark(table_config)
+        qualified_table_name = f"{table_config['schema']}.{table_config['name']}"
+        min_active_rowversion_sql = (
+            "MIN_ACTIVE_ROWVERSION()" if watermark["type"] == "rowversion" else "NULL"
+        )
+        get_table_info_sql = (
+            f"SELECT c.name AS column_name, w.high_watermark, w.min_active_rowversion, w.changed_row_count \n"
+            f"FROM (SELECT MAX({watermark['column']}) AS high_watermark,"
+            f" {min_active_rowversion_sql} AS min_active_rowversion, \n"
+            f"  (SELECT COUNT_BIG(*) FROM ("
+            f"SELECT TOP ({int(changed_row_count_limit or 1)}) 1 AS changed"
+            f" FROM {qualified_table_name}"
+            f" WHERE {watermark['column']} {MsSqlDataSource.get_last_watermark_operator(watermark)} :last_watermark"
+            f") AS changes) AS changed_row_count \n"
+            f" FROM {qualified_table_name}) AS w \n"
+            f"LEFT JOIN sys.columns AS c ON c.object_id = OBJECT_ID('{qualified_table_name}') \n"
+            f"ORDER BY c.column_id;"
+        )
+        self.logger.debug(
+            f"Getting watermark info for {qualified_table_name}.\n{get_table_info_sql}"
+        )
+        rows = self.database_engine.execute(
+            text(get_table_info_sql),
+            last_watermark=MsSqlDataSource.from_watermark(
+                last_known_sync_version or 0, watermark["type"]
+            ),
+        ).fetchall()
+
+        row = rows[0]
+        sync_version = MsSqlDataSource.to_watermark(
+            row["high_watermark"], watermark["type"]
+        )
+        if sync_version is not None and row["min_active_rowversion"] is not None:
+            sync_version = min(
+                sync_version,
+                MsSqlDataSource.to_watermark(row["min_active_rowversion"], watermark["type"])
+                - 1,
+            )
+        if sync_version is None:
+            # an empty table is as far along as it was
+            sync_version = last_known_sync_version or 0
+
+        last_known_sync_version_is_valid = (
+            last_known_sync_version is not None
+            and last_known_sync_version <= sync_version
+        )
+        change_tracking_info = ChangeTrackingInfo(
+            last_known_sync_version if last_known_sync_version_is_valid else 0,
+            sync_version,
+            not last_known_sync_version_is_valid,
+            last_known_sync_version_is_valid and sync_version > last_known_sync_version,
+            row["changed_row_count"] if changed_row_count_limit else None,
+        )
+        column_names = [row["column_name"] for row in rows if row["column_name"] is not None]
+        return SourceTableInfo(column_names, change_tracking_info)
+
+    # The watermark config of a table, if it has one
+    @staticmethod
+    def get_watermark(table_config):
+        watermark = table_config.get("watermark")
+        if watermark is not None and watermark["type"] not in MsSqlDataSource.WATERMARK_TYPES:
+            raise ValueError(
+                f"Unknown watermark type '{watermark['type']}', choose from {MsSqlDataSource.WATERMARK_TYPES}"
+            )
+        return watermark
+
+    # A rowversion watermark is kept as the bigint of its 8 bytes, and a datetime one as the microseconds since
+    # WATERMARK_EPOCH, which floors datetime2's ticks. A kept watermark so stands for every value up to, but not
+    # including, the one after it, see get_watermark_range.
+    @staticmethod
+    def to_watermark(value, watermark_type):
+        if value is None:
+            return None
+        if watermark_type == "rowversion":
+            return int.from_bytes(value, "big")
+        return (value - MsSqlDataSource.WATERMARK_EPOCH) // timedelta(microseconds=1)
+
+    # The value of a watermark column that a kept watermark stands for, bound to the column's own type so
+    # predicates on the column can seek an index of it
+    @staticmethod
+    def from_watermark(watermark, watermark_type):
+        if watermark_type == "rowversion":
+            return int(watermark).to_bytes(8, "big")
+        return MsSqlDataSource.WATERMARK_EPOCH + timedelta(microseconds=int(watermark))
+
+    # The (lower, upper) bound values of the watermark column of an incremental load. The upper bound is exclusive
+    # and one past the load's watermark, so rows with more precision than the watermark keeps, at the highest value
+    # of the table, are still read. The lower bound is as per get_last_watermark_operator.
+    @staticmethod
+    def get_watermark_range(change_tracking_info, watermark):
+        return (
+            MsSqlDataSource.from_watermark(
+                change_tracking_info.last_sync_version, watermark["type"]
+            ),
+            MsSqlDataSource.from_watermark(
+                change_tracking_info.sync_version + 1, watermark["type"]
+            ),
+        )
+
+    # datetimes can tie, so the rows at the last watermark are read again in case any were written after it was taken
+    @staticmethod
+    def get_last_watermark_operator(watermark):
+        return ">" if watermark["type"] == "rowversion" else ">="
+
+    def __get_change_tracking_rows(self, table_info_requests, table_indexes):
+        sql_builder = io.StringIO()
+        sql_builder.write(
+            "SET NOCOUNT ON; \n"
+            "DECLARE @sync_version BIGINT = CHANGE_TRACKING_CURRENT_VERSION(); \n"
+            "DECLARE @tables TABLE (table_index INT, object_id INT, last_known_sync_version BIGINT,"
+            " min_valid_version BIGINT, changed_row_count BIGINT, columns_tracked BIT); \n"
+        )
+        parameters = {}
+        for table_index in table_indexes:
+            table_config, last_known_sync_version, changed_row_count_limit = table_info_requests[
+                table_index
+            ]
+            qualified_table_name = f"{table_config['schema']}.{table_config['name']}"
+            parameters[f"last_known_sync_version_{table_index}"] = last_known_sync_version
+            parameters[f"changed_row_count_limit_{table_index}"] = int(
+                changed_row_count_limit or 1
+            )
+            sql_builder.write(
+                f"INSERT INTO @tables \n"
+                f"SELECT {table_index}, OBJECT_ID('{qualified_table_name}'),"
+                f" CAST(:last_known_sync_version_{table_index} AS BIGINT), \n"
+                f"  CHANGE_TRACKING_MIN_VALID_VERSION(OBJECT_ID('{qualified_table_name}')), \n"
+                f"  (SELECT COUNT_BIG(*) FROM ("
+                f"SELECT TOP (:changed_row_count_limit_{table_index}) 1 AS changed"
+                f" FROM CHANGETABLE(CHANGES {qualified_table_name}, :last_known_sync_version_{table_index}) AS c"
+                f") AS changes), \n"
+                f"  ISNULL((SELECT is_track_columns_updated_on FROM sys.change_tracking_tables"
+                f" WHERE object_id = OBJECT_ID('{qualified_table_name}')), 0); \n"
+            )
+        sql_builder.write(
+            "SELECT t.table_index, @sync_version AS sync_version, t.last_known_sync_version, t.min_valid_version,"
+            " t.changed_row_count, t.columns_tracked, c.name AS column_name \n"
+            "FROM @tables AS t LEFT JOIN sys.columns AS c ON c.object_id = t.object_id \n"
+            "ORDER BY t.table_index, c.column_id;"
+        )
+        get_table_infos_sql = sql_builder.getvalue()
+        sql_builder.close()
+
+        self.logger.debug(
+            f"Getting ChangeTracking info for {len(table_indexes)} tables.\n"
+            f"{get_table_infos_sql}\nwith parameters: {parameters}"
+        )
+        return self.database_engine.execute(
+            text(get_table_infos_sql), **parameters
+        ).fetchall()
+
+    def get_table_row_count(self, table_config):
+        return self.get_table_row_counts([table_config])[0]
+
+    # The number of rows in each table as per its partition stats, which are read without scanning the tables
+    def get_table_row_counts(self, table_configs):
+        get_row_counts_sql = " UNION ALL \n".join(
+            f"SELECT {table_index} AS table_index, SUM(row_count) AS row_count FROM sys.dm_db_partition_stats"
+            f" WHERE object_id = OBJECT_ID(:table_name_{table_index}) AND index_id IN (0, 1)"
+            for table_index in range(len(table_configs))
+        )
+        self.logger.debug(
+            f"Getting the row counts of {len(table_configs)} tables.\n{get_row_counts_sql}"
+        )
+        rows = self.database_engine.execute(
+            text(get_row_counts_sql),
+            **{
+                f"table_name_{table_index}": f"{table_config['schema']}.{table_config['name']}"
+                for table_index, table_config in enumerate(table_configs)
+            },
+        ).fetchall()
+        row_counts = {row["table_index"]: row["row_count"] for row in rows}
+        return [row_counts[table_index] for table_index in range(len(table_configs))]
+
+    def get_key_ranges(self, table_config, range_count):
+        if range_count <= 1:
+            return [None]
+
+        leading_primary_key = table_config["primary_keys"][0]
+        get_key_bounds_sql = (
+            f"SELECT MIN({leading_primary_key}) AS min_key, MAX({leading_primary_key}) AS max_key "
+            f"FROM {table_config['schema']}.{table_config['name']}"
+        )
+        self.logger.debug(
+            f"Getting key bounds for {table_config['schema']}.{table_config['name']}.\n"
+            f"{get_key_bounds_sql}"
+        )
+        row = self.database_engine.execute(text(get_key_bounds_sql)).fetchone()
+
+        return BatchKeyTracker.split_key_range(
+            row["min_key"], row["max_key"], range_count
         )
-        source_table_info = SourceTableInfo(columns_in_database, change_tracking_info)
-        return source_table_info
 
     @prevent_senstive_data_logging
     def get_table_data_frame(
@@ -66,22 +369,333 @@ class MsSqlDataSource(object):
         full_refresh,
         change_tracking_info,
     ):
-        sql = self.__build_select_statement(
+        column_names, rows = self.__read_table_rows(
+            table_config,
+            columns,
+            batch_config,
+            batch_tracker,
+            batch_key_tracker,
+            full_refresh,
+            change_tracking_info,
+        )
+        if not full_refresh and change_tracking_info.tracks_column_changes(batch_config):
+            columns = MsSqlDataSource.as_nullable(table_config, columns)
+        data_frame = self.column_type_resolver.create_data_frame(
+            rows, column_names, columns
+        )
+        batch_tracker.extract_completed_successfully(len(data_frame))
+
+        return data_frame
+
+    # Reads a batch as plain row tuples, with the configured columns in their configured order, followed by the
+    # change version and deletion flag audit columns for incremental loads.
+    @prevent_senstive_data_logging
+    def get_table_rows(
+        self,
+        table_config,
+        columns,
+        batch_config,
+        batch_tracker,
+        batch_key_tracker,
+        full_refresh,
+        change_tracking_info,
+    ):
+        column_names, rows = self.__read_table_rows(
+            table_config,
+            columns,
+            batch_config,
+            batch_tracker,
+            batch_key_tracker,
+            full_refresh,
+            change_tracking_info,
+        )
+        batch_tracker.extract_completed_successfully(len(rows))
+
+        return rows
+
+    def __read_table_rows(
+        self,
+        table_config,
+        columns,
+        batch_config,
+        batch_tracker,
+        batch_key_tracker,
+        full_refresh,
+        change_tracking_info,
+    ):
+        statement, statement_compile_time = self.__get_select_statement(
             table_config,
             columns,
             batch_config,
             batch_key_tracker,
             full_refresh,
+            column_change_tracking=not full_refresh
+            and change_tracking_info.tracks_column_changes(batch_config),
+        )
+        parameters = self.__get_select_statement_parameters(
+            batch_key_tracker,
             change_tracking_info,
+            MsSqlDataSource.get_watermark(table_config),
         )
 
-        self.logger.debug(f"Starting read of SQL Statement: \n{sql}")
-        data_frame = pandas.read_sql_query(sql, self.database_engine)
+        self.logger.debug(
+            f"Starting read of SQL Statement: \n{statement}\nwith parameters: {parameters}"
+        )
+        execute_started = datetime.now()
+        with self.database_engine.connect() as connection:
+            result = connection.execute(statement, parameters)
+            statement_execute_time = datetime.now() - execute_started
+            column_names = result.keys()
+            rows = [tuple(row) for row in result.fetchall()]
         self.logger.debug("Completed read")
 
-        batch_tracker.extract_completed_successfully(len(data_frame))
+        batch_tracker.statement_executed(statement_compile_time, statement_execute_time)
+        return column_names, rows
 
-        return data_frame
+    # Streams a full refresh of the table from a single ordered, forward-only query, fetching `batch_config['size']`
+    # rows at a time, rather than issuing a new keyset query per batch.
+    @prevent_senstive_data_logging
+    def stream_table_data_frames(
+        self,
+        table_config,
+        columns,
+        batch_config,
+        data_load_tracker,
+        batch_key_tracker,
+        change_tracking_info,
+    ):
+        for batch_tracker, column_names, rows in self.__stream_table_rows(
+            table_config, columns, batch_config, data_load_tracker, batch_key_tracker
+        ):
+            data_frame = self.column_type_resolver.create_data_frame(
+                rows, column_names, columns
+            )
+            batch_tracker.extract_completed_successfully(len(data_frame))
+            yield batch_tracker, data_frame
+
+    # As stream_table_data_frames, yielding the rows of each batch as plain tuples in their configured order.
+    @prevent_senstive_data_logging
+    def stream_table_rows(
+        self,
+        table_config,
+        columns,
+        batch_config,
+        data_load_tracker,
+        batch_key_tracker,
+        change_tracking_info,
+    ):
+        for batch_tracker, column_names, rows in self.__stream_table_rows(
+            table_config, columns, batch_config, data_load_tracker, batch_key_tracker
+        ):
+            batch_tracker.extract_completed_successfully(len(rows))
+            yield batch_tracker, rows
+
+    def __stream_table_rows(
+        self, table_config, columns, batch_config, data_load_tracker, batch_key_tracker
+    ):
+        statement = text(
+            self.__build_stream_select_statement(
+                table_config, columns, batch_key_tracker
+            )
+        )
+        parameters = self.__get_select_statement_parameters(batch_key_tracker, None)
+
+        snapshot_isolation = self.__is_snapshot_isolation_allowed()
+        with self.database_engine.connect() as connection:
+            try:
+                if snapshot_isolation:
+                    connection.execute(text("SET TRANSACTION ISOLATION LEVEL SNAPSHOT;"))
+                else:
+                    self.logger.warning(
+                        "Snapshot isolation is not allowed on the source database, "
+                        f"streaming {table_config['schema']}.{table_config['name']} under read committed"
+                    )
+
+                self.logger.debug(
+                    f"Starting streamed read of SQL Statement: \n{statement}\nwith parameters: {parameters}"
+                )
+                batch_tracker = data_load_tracker.start_batch()
+                execute_started = datetime.now()
+                result = connection.execute(statement, parameters)
+                batch_tracker.statement_executed(
+                    timedelta(0), datetime.now() - execute_started
+                )
+                column_names = result.keys()
+
+                while batch_key_tracker.has_more_data:
+                    rows = [
+                        tuple(row) for row in result.fetchmany(batch_config["size"])
+                    ]
+                    yield batch_tracker, column_names, rows
+                    if len(rows) == 0:
+                        break
+                    batch_tracker = data_load_tracker.start_batch()
+
+                result.close()
+                self.logger.debug("Completed streamed read")
+            finally:
+                if snapshot_isolation:
+                    # the isolation level outlives the transaction, so end the streamed read's transaction and
+                    # reset it before the connection goes back to the pool
+                    connection.connection.rollback()
+                    connection.execute(
+                        text("SET TRANSACTION ISOLATION LEVEL READ COMMITTED;")
+                    )
+
+    # Reads an incremental load in two phases over one connection: the changed keys are first copied out of
+    # CHANGETABLE into a temp table once, then each batch pages through the temp table joined to the table, rather
+    # than every batch joining CHANGETABLE to the table again.
+    @prevent_senstive_data_logging
+    def stream_changed_table_data_frames(
+        self,
+        table_config,
+        columns,
+        batch_config,
+        data_load_tracker,
+        batch_key_tracker,
+        change_tracking_info,
+    ):
+        frame_columns = columns
+        if change_tracking_info.tracks_column_changes(batch_config):
+            frame_columns = MsSqlDataSource.as_nullable(table_config, columns)
+        for batch_tracker, column_names, rows in self.__stream_changed_table_rows(
+            table_config,
+            columns,
+            batch_config,
+            data_load_tracker,
+            batch_key_tracker,
+            change_tracking_info,
+        ):
+            data_frame = self.column_type_resolver.create_data_frame(
+                rows, column_names, frame_columns
+            )
+            batch_tracker.extract_completed_successfully(len(data_frame))
+            yield batch_tracker, data_frame
+
+    # As stream_changed_table_data_frames, yielding the rows of each batch as plain tuples in their configured order.
+    @prevent_senstive_data_logging
+    def stream_changed_table_rows(
+        self,
+        table_config,
+        columns,
+        batch_config,
+        data_load_tracker,
+        batch_key_tracker,
+        change_tracking_info,
+    ):
+        for batch_tracker, column_names, rows in self.__stream_changed_table_rows(
+            table_config,
+            columns,
+            batch_config,
+            data_load_tracker,
+            batch_key_tracker,
+            change_tracking_info,
+        ):
+            batch_tracker.extract_completed_successfully(len(rows))
+            yield batch_tracker, rows
+
+    def __stream_changed_table_rows(
+        self,
+        table_config,
+        columns,
+        batch_config,
+        data_load_tracker,
+        batch_key_tracker,
+        change_tracking_info,
+    ):
+        statement, statement_compile_time = self.__get_select_statement(
+            table_config,
+            columns,
+            batch_config,
+            batch_key_tracker,
+            False,
+            changes_table=MsSqlDataSource.CHANGED_KEYS_TABLE,
+            column_change_tracking=change_tracking_info.tracks_column_changes(
+                batch_config
+            ),
+        )
+        primary_key_list = ", ".join(table_config["primary_keys"])
+
+        # the temp table belongs to the connection, so every batch is read over the same one
+        with self.database_engine.connect() as connection:
+            try:
+                # parameterised statements run in a scope of their own through sp_prepexec, which would drop a
+                # temp table created in it as soon as it completed, so the table is created without parameters
+                # and only filled by a parameterised statement
+                changed_keys_columns = (
+                    f"{primary_key_list}, SYS_CHANGE_VERSION, SYS_CHANGE_OPERATION, SYS_CHANGE_COLUMNS"
+                )
+                change_table = f"CHANGETABLE(CHANGES {table_config['schema']}.{table_config['name']}"
+                create_changed_keys_sql = (
+                    f"SELECT TOP 0 {changed_keys_columns} \n"
+                    f" INTO {MsSqlDataSource.CHANGED_KEYS_TABLE} \n"
+                    f" FROM {change_table}, NULL) AS {MsSqlDataSource.CHANGE_TABLE_ALIAS};"
+                )
+                copy_changed_keys_sql = (
+                    f"INSERT INTO {MsSqlDataSource.CHANGED_KEYS_TABLE} ({changed_keys_columns}) \n"
+                    f" SELECT {changed_keys_columns} \n"
+                    f" FROM {change_table}, :last_sync_version) AS {MsSqlDataSource.CHANGE_TABLE_ALIAS};"
+                )
+                self.logger.debug(
+                    f"Copying changed keys, executing: \n{create_changed_keys_sql}\n{copy_changed_keys_sql}"
+                )
+                batch_tracker = data_load_tracker.start_batch()
+                execute_started = datetime.now()
+                connection.execute(text(create_changed_keys_sql))
+                connection.execute(
+                    text(copy_changed_keys_sql),
+                    last_sync_version=change_tracking_info.last_sync_version,
+                )
+                connection.execute(
+                    text(
+                        f"CREATE UNIQUE CLUSTERED INDEX ix_rdl_changed_keys"
+                        f" ON {MsSqlDataSource.CHANGED_KEYS_TABLE} ({primary_key_list});"
+                    )
+                )
+                batch_tracker.statement_executed(
+                    timedelta(0), datetime.now() - execute_started
+                )
+
+                while batch_key_tracker.has_more_data:
+                    parameters = self.__get_select_statement_parameters(
+                        batch_key_tracker, None
+                    )
+                    self.logger.debug(
+                        f"Starting read of SQL Statement: \n{statement}\nwith parameters: {parameters}"
+                    )
+                    execute_started = datetime.now()
+                    result = connection.execute(statement, parameters)
+                    batch_tracker.statement_executed(
+                        statement_compile_time, datetime.now() - execute_started
+                    )
+                    statement_compile_time = timedelta(0)
+                    column_names = result.keys()
+                    rows = [tuple(row) for row in result.fetchall()]
+                    yield batch_tracker, column_names, rows
+                    if len(rows) == 0:
+                        break
+                    batch_tracker = data_load_tracker.start_batch()
+                self.logger.debug("Completed read of changed rows")
+            finally:
+                # the connection goes back to the pool with its session, temp tables included
+                connection.execute(
+                    text(
+                        f"IF OBJECT_ID('tempdb..{MsSqlDataSource.CHANGED_KEYS_TABLE}') IS NOT NULL"
+                        f" DROP TABLE {MsSqlDataSource.CHANGED_KEYS_TABLE};"
+                    )
+                )
+
+    # Probed over a connection of its own, as the probe opens a transaction and the isolation level can't be
+    # switched to snapshot within one
+    def __is_snapshot_isolation_allowed(self):
+        return (
+            self.database_engine.execute(
+                text(
+                    "SELECT snapshot_isolation_state FROM sys.databases WHERE name = DB_NAME();"
+                )
+            ).scalar()
+            == 1
+        )
 
     @staticmethod
     def __connection_string_regex_match(connection_string):
@@ -124,105 +738,72 @@ class MsSqlDataSource(object):
                 return pyodbc.connect(dsn, server=failover)
             raise e
 
-    def __get_table_columns(self, table_config):
-        metadata = MetaData()
-        self.logger.debug(
-            f"Reading definition for source table "
-            f"{table_config['schema']}.{table_config['name']}"
-        )
-        table = Table(
+    # The batch statement of a model only differs by its bookmarks, key range and last_sync_version, which are bound
+    # as parameters. Building it once per model keeps its text stable, so SQL Server can reuse the cached plan for
+    # every batch instead of compiling a new one per batch.
+    def __get_select_statement(
+        self,
+        table_config,
+        columns,
+        batch_config,
+        batch_key_tracker,
+        full_refresh,
+        changes_table=None,
+        column_change_tracking=False,
+    ):
+        statement_key = (
+            table_config["schema"],
             table_config["name"],
-            metadata,
-            schema=table_config["schema"],
-            autoload=True,
-            autoload_with=self.database_engine,
-        )
-        return list(map(lambda column: column.name, table.columns))
-
-    def __get_change_tracking_info(self, table_config, last_known_sync_version):
-
-        if last_known_sync_version is None:
-            last_known_sync_version = "NULL"
-
-        # in the following we determine:
-        # a) the current sync version - sourced straight up from the source db.
-        # b) the last valid sync version - derived from the last known sync version and its validity based on the
-        #    current state of the source data.
-        # c) whether a full refresh is needed - this is a derivative of the validity of the last known sync version
-        #    because if the last known sync version is no longer valid, then our target data is in-an-invalid-state /
-        #    out-of-sync and a full refresh must be forced to sync the data.
-        # d) whether any data has changed for the table synce the last sync - this is a derivative of the results of
-        #    the CHANGETABLE() call, which we perform later and join to the table to load in the changed rows.
-        #
-        # the following help us determining the above:
-        # a) sync_version: the current version of change tracking at source database.
-        #                  it's value IS sourced from CHANGE_TRACKING_CURRENT_VERSION()
-        #                  and it's value also becomes the last_known_sync_version for the next iteration.
-        # b) last_known_sync_version: the tracking number of the last time we ran rdl, if we did.
-        #                  it's value WAS sourced from CHANGE_TRACKING_CURRENT_VERSION().
-        # c) min_valid_version: the minimum version that is valid for use in obtaining change tracking information from
-        #                       the specified table.
-        #                       it's value IS sourced from CHANGE_TRACKING_MIN_VALID_VERSION(OBJECT_ID(..)).
-        # d) data_changed_since_last_sync: whether or not data has changed in the table since last_known_sync_version
-        #                       it's value is sourced from CHANGETABLE(table, last_known_sync_version).
-
-        get_change_tracking_info_sql = (
-            f""
-            f"DECLARE @sync_version                     BIGINT  = CHANGE_TRACKING_CURRENT_VERSION(); \n"
-            f"DECLARE @min_valid_version                BIGINT  ="
-            f" CHANGE_TRACKING_MIN_VALID_VERSION(OBJECT_ID('{table_config['schema']}.{table_config['name']}')); \n"
-            f"DECLARE @last_known_sync_version          BIGINT  = {last_known_sync_version}; \n"
-            f"DECLARE @last_known_sync_version_is_valid BIT     ="
-            f" CASE WHEN @last_known_sync_version >= @min_valid_version THEN 1 ELSE 0 END; \n"
-            f"DECLARE @last_sync_version                BIGINT; \n"
-            f"DECLARE @force_full_load                  BIT; \n"
-            f"DECLARE @data_changed_since_last_sync     BIT; \n"
-            f" \n"
-            f"IF @last_known_sync_version_is_valid = 1 \n"
-            f"BEGIN \n"
-            f"    SET @force_full_load   = 0; \n"
-            f"    SET @last_sync_version = @last_known_sync_version; \n"
-            f"END \n"
-            f"ELSE \n"
-            f"BEGIN \n"
-            f"    SET @force_full_load   = 1; "
-            f"    SET @last_sync_version = 0; \n"
-            f"END \n"
-            f" \n"
-            f"IF EXISTS ( "
-            f"  SELECT 1"
-            f"  FROM CHANGETABLE(CHANGES "
-            f"      {table_config['schema']}.{table_config['name']}, {last_known_sync_version} ) "
-            f"  as c )"
-            f"BEGIN \n"
-            f"    SET @data_changed_since_last_sync = 1; \n"
-            f"END \n"
-            f"ELSE \n"
-            f"BEGIN \n"
-            f"    SET @data_changed_since_last_sync = 0; \n"
-            f"END \n"
-            f" \n"
-            f"SELECT @sync_version              AS sync_version \n"
-            f", @last_sync_version              AS last_sync_version \n"
-            f", @force_full_load                AS force_full_load \n"
-            f", @data_changed_since_last_sync   AS data_changed_since_last_sync; \n"
-        )
-
-        self.logger.debug(
-            f"Getting ChangeTracking info for {table_config['schema']}.{table_config['name']}.\n"
-            f"{get_change_tracking_info_sql}"
+            tuple(column["source_name"] for column in columns),
+            batch_config["size"],
+            tuple(batch_key_tracker.primary_keys),
+            batch_key_tracker.key_range is not None,
+            full_refresh,
+            changes_table,
+            column_change_tracking,
         )
+        statement = self.select_statements.get(statement_key)
+        if statement is not None:
+            return statement, timedelta(0)
 
-        result = self.database_engine.execute(text(get_change_tracking_info_sql))
-        row = result.fetchone()
+        compile_started = datetime.now()
+        statement = text(
+            self.__build_select_statement(
+                table_config,
+                columns,
+                batch_config,
+                batch_key_tracker,
+                full_refresh,
+                changes_table,
+                column_change_tracking,
+            )
+        ).compile(bind=self.database_engine)
+        self.select_statements[statement_key] = statement
+        return statement, datetime.now() - compile_started
 
-        return ChangeTrackingInfo(
-            row["last_sync_version"],
-            row["sync_version"],
-            row["force_full_load"],
-            row["data_changed_since_last_sync"],
-        )
+    @staticmethod
+    def __get_select_statement_parameters(
+        batch_key_tracker, change_tracking_info, watermark=None
+    ):
+        parameters = {}
+        for index, primary_key in enumerate(batch_key_tracker.bookmarks):
+            parameters[f"bookmark_{index}"] = batch_key_tracker.bookmarks[primary_key]
+        if batch_key_tracker.key_range is not None:
+            (parameters["lower_bound"], parameters["upper_bound"]) = batch_key_tracker.key_range
+        if change_tracking_info is not None and watermark is not None:
+            parameters["sync_version"] = change_tracking_info.sync_version
+            (
+                parameters["last_watermark"],
+                parameters["watermark_upper_bound"],
+            ) = MsSqlDataSource.get_watermark_range(change_tracking_info, watermark)
+        elif change_tracking_info is not None:
+            parameters["last_sync_version"] = change_tracking_info.last_sync_version
+        return parameters
 
+    # Incremental batches read the changes out of CHANGETABLE, unless a changes_table they've been copied to is given.
+    # With column_change_tracking, the columns an update didn't change are read as nulls, and flagged as unchanged
+    # in the CHANGED_COLUMNS audit column. Tables with a watermark are read directly, over the range of watermarks
+    # since the last load.
     def __build_select_statement(
         self,
         table_config,
@@ -230,22 +811,52 @@ class MsSqlDataSource(object):
         batch_config,
         batch_key_tracker,
         full_refresh,
-        change_tracking_info,
+        changes_table=None,
+        column_change_tracking=False,
     ):
+        watermark = MsSqlDataSource.get_watermark(table_config)
         column_array = list(
             map(
                 lambda cfg: MsSqlDataSource.prefix_column(
-                    cfg["source_name"], full_refresh, table_config["primary_keys"]
+                    cfg["source_name"],
+                    full_refresh or watermark is not None,
+                    table_config["primary_keys"],
                 ),
                 columns,
             )
         )
+        if column_change_tracking:
+            column_array, changed_columns_sql = self.__build_changed_columns(
+                table_config, columns, column_array
+            )
         column_names = ", ".join(column_array)
 
         if full_refresh:
             select_sql = f"SELECT TOP ({batch_config['size']}) {column_names}"
             from_sql = f"FROM {table_config['schema']}.{table_config['name']} AS {MsSqlDataSource.SOURCE_TABLE_ALIAS}"
-            where_sql = f"WHERE {self.__build_where_clause(batch_key_tracker, MsSqlDataSource.SOURCE_TABLE_ALIAS)}"
+            where_sql = f"WHERE ({self.__build_where_clause(batch_key_tracker, MsSqlDataSource.SOURCE_TABLE_ALIAS)})"
+            where_sql += self.__build_key_range_clause(table_config, batch_key_tracker)
+            order_by_sql = (
+                "ORDER BY "
+                + f", {MsSqlDataSource.SOURCE_TABLE_ALIAS}.".join(
+                    table_config["primary_keys"]
+                )
+            )
+        elif watermark is not None:
+            # the range is on the watermark column itself, so an index of it can be seeked
+            watermark_column = f"{MsSqlDataSource.SOURCE_TABLE_ALIAS}.{watermark['column']}"
+            last_watermark_operator = MsSqlDataSource.get_last_watermark_operator(watermark)
+            select_sql = (
+                f"SELECT TOP ({batch_config['size']}) {column_names}, "
+                f"CAST(:sync_version AS BIGINT) AS {Providers.AuditColumnsNames.CHANGE_VERSION}, "
+                f"0 AS {Providers.AuditColumnsNames.IS_DELETED}"
+            )
+            from_sql = f"FROM {table_config['schema']}.{table_config['name']} AS {MsSqlDataSource.SOURCE_TABLE_ALIAS}"
+            where_sql = (
+                f"WHERE ({self.__build_where_clause(batch_key_tracker, MsSqlDataSource.SOURCE_TABLE_ALIAS)})"
+                f" AND {watermark_column} {last_watermark_operator} :last_watermark"
+                f" AND {watermark_column} < :watermark_upper_bound"
+            )
             order_by_sql = (
                 "ORDER BY "
                 + f", {MsSqlDataSource.SOURCE_TABLE_ALIAS}.".join(
@@ -260,10 +871,16 @@ class MsSqlDataSource(object):
                 f"CASE {MsSqlDataSource.CHANGE_TABLE_ALIAS}.SYS_CHANGE_OPERATION WHEN 'D' THEN 1 ELSE 0 "
                 f"END AS {Providers.AuditColumnsNames.IS_DELETED}"
             )
+            if column_change_tracking:
+                select_sql += f", {changed_columns_sql}"
+            if changes_table is None:
+                changes_table = (
+                    f"CHANGETABLE(CHANGES"
+                    f" {table_config['schema']}.{table_config['name']},"
+                    f" :last_sync_version)"
+                )
             from_sql = (
-                f"FROM CHANGETABLE(CHANGES"
-                f" {table_config['schema']}.{table_config['name']},"
-                f" {change_tracking_info.last_sync_version})"
+                f"FROM {changes_table}"
                 f" AS {MsSqlDataSource.CHANGE_TABLE_ALIAS}"
                 f" LEFT JOIN {table_config['schema']}.{table_config['name']} AS {MsSqlDataSource.SOURCE_TABLE_ALIAS}"
                 f" ON {self.__build_change_table_on_clause(batch_key_tracker)}"
@@ -278,6 +895,78 @@ class MsSqlDataSource(object):
 
         return f"{select_sql} \n {from_sql} \n {where_sql} \n {order_by_sql};"
 
+    # Nulls out the columns other than the primary key that an update didn't change, and builds the CHANGED_COLUMNS
+    # of each row, a '1' or '0' per column other than the primary key, in their configured order, for whether it
+    # was read. Only updates with a column mask have unchanged columns.
+    def __build_changed_columns(self, table_config, columns, column_array):
+        column_ids = self.__get_column_ids(table_config)
+        change_columns = f"{MsSqlDataSource.CHANGE_TABLE_ALIAS}.SYS_CHANGE_COLUMNS"
+        selected_columns = []
+        changed_flags = []
+        for column, column_sql in zip(columns, column_array):
+            if column["source_name"] in table_config["primary_keys"]:
+                selected_columns.append(column_sql)
+                continue
+            column_id = column_ids[column["source_name"].lower()]
+            unchanged_sql = (
+                f"{MsSqlDataSource.CHANGE_TABLE_ALIAS}.SYS_CHANGE_OPERATION = 'U'"
+                f" AND {change_columns} IS NOT NULL"
+                f" AND CHANGE_TRACKING_IS_COLUMN_IN_MASK({column_id}, {change_columns}) = 0"
+            )
+            selected_columns.append(
+                f"CASE WHEN {unchanged_sql} THEN NULL ELSE {column_sql} END AS {column['source_name']}"
+            )
+            changed_flags.append(f"CASE WHEN {unchanged_sql} THEN '0' ELSE '1' END")
+
+        # CONCAT takes at least two arguments
+        changed_columns_sql = (
+            f"CONCAT('', {', '.join(changed_flags) or repr('')})"
+            f" AS {Providers.AuditColumnsNames.CHANGED_COLUMNS}"
+        )
+        return selected_columns, changed_columns_sql
+
+    # The columns of a batch read with column level change tracking, where anything but the primary key can be null
+    @staticmethod
+    def as_nullable(table_config, columns):
+        return [
+            column
+            if column["source_name"] in table_config["primary_keys"]
+            else dict(column, destination=dict(column["destination"], nullable=True))
+            for column in columns
+        ]
+
+    def __get_column_ids(self, table_config):
+        get_column_ids_sql = (
+            "SELECT name, column_id FROM sys.columns WHERE object_id = OBJECT_ID(:table_name)"
+        )
+        rows = self.database_engine.execute(
+            text(get_column_ids_sql),
+            table_name=f"{table_config['schema']}.{table_config['name']}",
+        ).fetchall()
+        # identifiers are matched case insensitively, as they are by sql server
+        return {row["name"].lower(): row["column_id"] for row in rows}
+
+    def __build_stream_select_statement(self, table_config, columns, batch_key_tracker):
+        column_names = ", ".join(
+            MsSqlDataSource.prefix_column(
+                cfg["source_name"], True, table_config["primary_keys"]
+            )
+            for cfg in columns
+        )
+        where_sql = f"WHERE ({self.__build_where_clause(batch_key_tracker, MsSqlDataSource.SOURCE_TABLE_ALIAS)})"
+        where_sql += self.__build_key_range_clause(table_config, batch_key_tracker)
+        order_by_sql = "ORDER BY " + ", ".join(
+            f"{MsSqlDataSource.SOURCE_TABLE_ALIAS}.{primary_key}"
+            for primary_key in table_config["primary_keys"]
+        )
+
+        return (
+            f"SELECT {column_names} \n"
+            f" FROM {table_config['schema']}.{table_config['name']} AS {MsSqlDataSource.SOURCE_TABLE_ALIAS} \n"
+            f" {where_sql} \n"
+            f" {order_by_sql};"
+        )
+
     @staticmethod
     def prefix_column(column_name, full_refresh, primary_key_column_names):
         if not isinstance(primary_key_column_names, (list, tuple)):
@@ -297,16 +986,16 @@ class MsSqlDataSource(object):
             sql_builder = io.StringIO()
             where_stack = io.StringIO()
             where_stack.write("1 = 1")
-            for primary_key in batch_key_tracker.bookmarks:
+            for index, primary_key in enumerate(batch_key_tracker.bookmarks):
                 if has_value:
                     sql_builder.write(" OR")
 
                 sql_builder.write(
-                    f" ({where_stack.getvalue()} AND {table_alias}.{primary_key} > {batch_key_tracker.bookmarks[primary_key]})"
+                    f" ({where_stack.getvalue()} AND {table_alias}.{primary_key} > :bookmark_{index})"
                 )
                 has_value = True
                 where_stack.write(
-                    f" AND {table_alias}.{primary_key} = {batch_key_tracker.bookmarks[primary_key]}"
+                    f" AND {table_alias}.{primary_key} = :bookmark_{index}"
                 )
 
             return sql_builder.getvalue()
@@ -314,6 +1003,17 @@ class MsSqlDataSource(object):
             sql_builder.close()
             where_stack.close()
 
+    @staticmethod
+    def __build_key_range_clause(table_config, batch_key_tracker):
+        if batch_key_tracker.key_range is None:
+            return ""
+
+        leading_primary_key = f"{MsSqlDataSource.SOURCE_TABLE_ALIAS}.{table_config['primary_keys'][0]}"
+        return (
+            f" AND {leading_primary_key} > :lower_bound"
+            f" AND {leading_primary_key} <= :upper_bound"
+        )
+
     @staticmethod
     def __build_change_table_on_clause(batch_key_tracker):
         has_value = False
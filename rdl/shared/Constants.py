@@ -11,12 +11,14 @@ class FullRefreshReason:
     FIRST_EXECUTION = "First Execution"
     MODEL_CHANGED = "Model Changed"
     INVALID_CHANGE_TRACKING = "Change Tracking Invalid"
+    CHEAPER_THAN_INCREMENTAL = "Estimated cheaper than an incremental load"
 
 
 class IncrementalSkipReason:
     NOT_APPLICABLE = "N/A"
     SYNC_VERSIONS_ARE_EQUAL = "last_sync_version is the same as sync_version"
     NO_DATA_CHANGED = "No data has changed since last sync"
+    SOURCE_UNCHANGED = "No data has changed in the source database since last sync"
 
 
 class ExecutionStatus:
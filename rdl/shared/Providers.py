@@ -21,5 +21,13 @@ class __AuditColumnsNames:
     def CHANGE_VERSION(self):
         return f"{self.audit_column_prefix}change_version"
 
+    @property
+    def CHANGED_COLUMNS(self):
+        return f"{self.audit_column_prefix}changed_columns"
+
+    @property
+    def ROW_HASH(self):
+        return f"{self.audit_column_prefix}row_hash"
+
 
 AuditColumnsNames = __AuditColumnsNames()
@@ -1,11 +1,13 @@
 import importlib
+import inspect
 import logging
 
 
-def create_type_instance(type_name):
-    module = importlib.import_module(type_name)
-    class_ = getattr(module, type_name)
-    instance = class_()
+def create_type_instance(type_name, *args, **kwargs):
+    module_name, class_name = type_name.rsplit(".", 1)
+    module = importlib.import_module(module_name)
+    class_ = getattr(module, class_name)
+    instance = class_(*args, **kwargs)
     return instance
 
 
@@ -18,6 +20,12 @@ class SensitiveDataError(BaseException):
 def prevent_senstive_data_logging(function):
     # https://stackoverflow.com/questions/2052390/manually-raising-throwing-an-exception-in-python
 
+    def to_sensitive_data_error(e):
+        err_str = f"A {e.__class__} occured in {function.__name__}. Re-run with --log-level DEBUG to override"
+        return SensitiveDataError(err_str).with_traceback(
+            e.__traceback__
+        ).add_sensitive_error_args(e.args)
+
     def wrapper(self, *args, **kwargs):
         logger = self.logger or logging.getLogger(__name__)
         if logger.getEffectiveLevel() == logging.DEBUG:
@@ -26,9 +34,20 @@ def prevent_senstive_data_logging(function):
         try:
             return function(self, *args, **kwargs)
         except Exception as e:
-            err_str = f"A {e.__class__} occured in {function.__name__}. Re-run with --log-level DEBUG to override"
-            raise SensitiveDataError(err_str).with_traceback(
-                e.__traceback__
-            ).add_sensitive_error_args(e.args) from None
+            raise to_sensitive_data_error(e) from None
+
+    # generators only raise once they are iterated, so the errors must be caught while yielding
+    def generator_wrapper(self, *args, **kwargs):
+        logger = self.logger or logging.getLogger(__name__)
+        if logger.getEffectiveLevel() == logging.DEBUG:
+            yield from function(self, *args, **kwargs)
+            return
+
+        try:
+            yield from function(self, *args, **kwargs)
+        except Exception as e:
+            raise to_sensitive_data_error(e) from None
 
+    if inspect.isgeneratorfunction(function):
+        return generator_wrapper
     return wrapper
@@ -0,0 +1,110 @@
+# Compares writing LargeTableTest-shaped batches to postgres with the csv and binary COPY formats, both from a data
+# frame and straight from source rows. The rows are generated, so only the destination database is needed.
+#
+# Setup: see the integration tests section of the README, and create ./tests/unit_tests/config/connection.json.
+# Execution: `py ./tests/benchmarks/benchmark_copy_formats.py` from the repository root.
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+
+from rdl.BatchDataLoader import BatchDataLoader
+from rdl.ColumnTypeResolver import ColumnTypeResolver
+from rdl.DestinationTableManager import DestinationTableManager
+from rdl.ModelPlan import ModelPlan
+
+TARGET_DB = "rdl_integration_test_target_db"
+PSQL_STRING_FORMAT = "postgresql+psycopg2://{username}:{password}@{server_string}/{db}"
+
+CONNECTION_CONFIG_PATH = "./tests/unit_tests/config/connection.json"
+MODEL_CONFIG_PATH = "./tests/integration_tests/mssql_source/config/LargeTableTest.json"
+TARGET_SCHEMA = "rdl_benchmarks"
+TARGET_TABLE = "copy_formats"
+BATCH_SIZES = [1000, 100000]
+ITERATIONS = 3
+
+
+def generate_rows(row_count):
+    random.seed(0)
+    started = datetime(2019, 2, 14, 1, 55, 54, 123456)
+    return [
+        (
+            row_id,
+            started + timedelta(seconds=random.randint(0, 10 ** 8)),
+            random.choice([None, random.randint(-(2 ** 31), 2 ** 31 - 1)]),
+            random.choice([None, started - timedelta(microseconds=random.randint(0, 10 ** 15))]),
+            "".join(random.choice("abcdefghij \t\"',\\") for _ in range(random.randint(0, 50))),
+            random.choice([None, str(uuid.UUID(int=random.getrandbits(128)))]),
+            str(uuid.UUID(int=random.getrandbits(128))),
+            random.choice([None, True, False]),
+        )
+        for row_id in range(1, row_count + 1)
+    ]
+
+
+def create_batch_data_loader(target_db, model_config, copy_format):
+    model_plan = ModelPlan(
+        dict(
+            model_config,
+            target_schema=TARGET_SCHEMA,
+            stage_table=TARGET_TABLE,
+            batch={"size": None, "copy_format": copy_format},
+        ),
+        True,
+    )
+    return BatchDataLoader(None, model_plan, None, target_db, None)
+
+
+def benchmark(write, destination_table_manager, model_config):
+    timings = []
+    for _ in range(ITERATIONS):
+        destination_table_manager.create_table(
+            TARGET_SCHEMA, TARGET_TABLE, model_config["columns"], drop_first=True
+        )
+        started = time.perf_counter()
+        write()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    with open(CONNECTION_CONFIG_PATH, "r", encoding="utf8") as f:
+        connection_config = json.loads(f.read())
+    target_db = create_engine(
+        PSQL_STRING_FORMAT.format(**connection_config["psql"], db=TARGET_DB)
+    )
+    destination_table_manager = DestinationTableManager(target_db)
+    destination_table_manager.create_schema(TARGET_SCHEMA)
+
+    with open(MODEL_CONFIG_PATH, "r") as f:
+        model_config = json.loads(f.read())
+    column_names = [column["source_name"] for column in model_config["columns"]]
+
+    for batch_size in BATCH_SIZES:
+        rows = generate_rows(batch_size)
+        data_frame = ColumnTypeResolver().create_data_frame(
+            rows, column_names, model_config["columns"]
+        )
+        for copy_format in BatchDataLoader.COPY_FORMATS:
+            batch_data_loader = create_batch_data_loader(
+                target_db, model_config, copy_format
+            )
+            for source, write in [
+                ("data frame", lambda: batch_data_loader.write_data_frame_to_table(data_frame)),
+                ("rows", lambda: batch_data_loader.write_rows_to_table(rows)),
+            ]:
+                seconds = benchmark(write, destination_table_manager, model_config)
+                print(
+                    f"batch size: {batch_size:>7} "
+                    f"format: {copy_format:<7} "
+                    f"from: {source:<11} "
+                    f"best of {ITERATIONS}: {seconds:8.3f}s "
+                    f"({batch_size / max(seconds, 0.001):,.0f} rows per second)"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# Compares the keyset (TOP-N per batch) and streamed (single ordered cursor) full refresh reads against the
+# integration test source database, for a single and a compound primary key.
+#
+# Setup: see the integration tests section of the README, and create ./tests/unit_tests/config/connection.json.
+# Execution: `py ./tests/benchmarks/benchmark_full_refresh_modes.py` from the repository root.
+import json
+import time
+
+from rdl.BatchKeyTracker import BatchKeyTracker
+from rdl.data_load_tracking.DataLoadTracker import DataLoadTracker
+from rdl.data_sources.MsSqlDataSource import MsSqlDataSource
+
+SOURCE_DB = "RDL_Integration_Test_Source_Db"
+MSSQL_STRING_FORMAT = "mssql+pyodbc://{username}:{password}@{server_string}/{db}?driver=SQL+Server+Native+Client+11.0"
+
+CONNECTION_CONFIG_PATH = "./tests/unit_tests/config/connection.json"
+MODEL_CONFIG_PATH = "./tests/integration_tests/mssql_source/config/"
+MODEL_CONFIG_FILES = ["LargeTableTest.json", "CompoundPkTest.json"]
+BATCH_SIZES = [1000, 100000]
+ITERATIONS = 3
+
+
+def read_keyset(data_source, model_config, batch_config):
+    data_load_tracker = DataLoadTracker(None, None, None, model_config, True, None, None)
+    batch_key_tracker = BatchKeyTracker(model_config["source_table"]["primary_keys"])
+    rows = 0
+    while True:
+        data_frame = data_source.get_table_data_frame(
+            model_config["source_table"],
+            model_config["columns"],
+            batch_config,
+            data_load_tracker.start_batch(),
+            batch_key_tracker,
+            True,
+            None,
+        )
+        if len(data_frame) == 0:
+            return rows
+        rows += len(data_frame)
+        for primary_key in batch_key_tracker.primary_keys:
+            batch_key_tracker.set_bookmark(
+                primary_key, int(data_frame.iloc[-1][primary_key])
+            )
+
+
+def read_stream(data_source, model_config, batch_config):
+    data_load_tracker = DataLoadTracker(None, None, None, model_config, True, None, None)
+    batch_key_tracker = BatchKeyTracker(model_config["source_table"]["primary_keys"])
+    rows = 0
+    for _, data_frame in data_source.stream_table_data_frames(
+        model_config["source_table"],
+        model_config["columns"],
+        batch_config,
+        data_load_tracker,
+        batch_key_tracker,
+        None,
+    ):
+        rows += len(data_frame)
+    return rows
+
+
+def benchmark(read, data_source, model_config, batch_config):
+    timings = []
+    for _ in range(ITERATIONS):
+        started = time.perf_counter()
+        rows = read(data_source, model_config, batch_config)
+        timings.append(time.perf_counter() - started)
+    return rows, min(timings)
+
+
+def main():
+    with open(CONNECTION_CONFIG_PATH, "r", encoding="utf8") as f:
+        connection_config = json.loads(f.read())
+    data_source = MsSqlDataSource(
+        MSSQL_STRING_FORMAT.format(**connection_config["mssql"], db=SOURCE_DB)
+    )
+
+    for model_config_file in MODEL_CONFIG_FILES:
+        with open(MODEL_CONFIG_PATH + model_config_file, "r") as f:
+            model_config = json.loads(f.read())
+
+        for batch_size in BATCH_SIZES:
+            batch_config = {"size": batch_size}
+            for mode, read in [("keyset", read_keyset), ("stream", read_stream)]:
+                rows, seconds = benchmark(read, data_source, model_config, batch_config)
+                print(
+                    f"{model_config_file:<22} "
+                    f"primary keys: {len(model_config['source_table']['primary_keys'])} "
+                    f"batch size: {batch_size:>7} "
+                    f"mode: {mode:<7} "
+                    f"rows: {rows:>8} "
+                    f"best of {ITERATIONS}: {seconds:8.3f}s "
+                    f"({rows / max(seconds, 0.001):,.0f} rows per second)"
+                )
+
+
+if __name__ == "__main__":
+    main()
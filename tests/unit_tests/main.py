@@ -1,11 +1,28 @@
 import test_MsSqlDataSource
 import test_DataLoadTrackerRepository
+import test_ModelScheduler
+import test_BatchKeyTracker
+import test_CopyWriters
+import test_TransformPlan
+import test_DestinationTableManager
+import test_DataLoadManager
+import test_BatchDataLoader
 import unittest
 import sys
 
 TEST_VERBOSITY_LEVEL = 2  # Verbose, see https://stackoverflow.com/a/1322648/8030743
 
-for module in [test_DataLoadTrackerRepository, test_MsSqlDataSource]:
+for module in [
+    test_DataLoadTrackerRepository,
+    test_MsSqlDataSource,
+    test_ModelScheduler,
+    test_BatchKeyTracker,
+    test_CopyWriters,
+    test_TransformPlan,
+    test_DestinationTableManager,
+    test_DataLoadManager,
+    test_BatchDataLoader,
+]:
     suite = unittest.TestLoader().loadTestsFromModule(module)
     result = unittest.TextTestRunner(verbosity=TEST_VERBOSITY_LEVEL).run(suite)
     if not result.wasSuccessful():
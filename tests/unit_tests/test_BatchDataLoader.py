@@ -0,0 +1,113 @@
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from rdl.BatchDataLoader import BatchDataLoader
+
+BATCH_COUNT = 10
+
+
+class TestBatchDataLoader(unittest.TestCase):
+    def create_batch_data_loader(self, **batch_config):
+        model_plan = MagicMock(
+            target_schema="rdl_test",
+            stage_table="stage_test",
+            batch_config=dict({"size": 100}, **batch_config),
+        )
+        model_plan.transform_plan.has_column_transformers = False
+        batch_data_loader = BatchDataLoader(
+            MagicMock(), model_plan, MagicMock(), MagicMock(), MagicMock()
+        )
+        batch_data_loader.written_batches = []
+
+        def write_batch(batch_tracker, batch, bookmarks):
+            batch_data_loader.written_batches.append(batch)
+
+        batch_data_loader.write_batch = write_batch
+        return batch_data_loader
+
+    @staticmethod
+    def extract_batches(batch_count, failure=None):
+        for batch_number in range(batch_count):
+            yield MagicMock(), [(batch_number,)], {"Id": batch_number}
+        if failure is not None:
+            raise failure
+
+    def assert_extractor_joined(self):
+        self.assertFalse(
+            [
+                thread
+                for thread in threading.enumerate()
+                if thread.name == "extract-rdl_test.stage_test"
+            ]
+        )
+
+    def test_load_batches_writes_every_batch(self):
+        for batch_config in [
+            {"pipeline_depth": 0},
+            {"pipeline_depth": 1},
+            {"pipeline_depth": 2, "parallel_writers": 3},
+        ]:
+            batch_data_loader = self.create_batch_data_loader(**batch_config)
+            batch_data_loader.extract_batches = lambda _: self.extract_batches(
+                BATCH_COUNT
+            )
+
+            batch_data_loader.load_batches(MagicMock())
+
+            self.assertCountEqual(
+                batch_data_loader.written_batches,
+                [[(batch_number,)] for batch_number in range(BATCH_COUNT)],
+                msg=f"Failed on: {batch_config}",
+            )
+            self.assert_extractor_joined()
+
+    def test_load_batches_raises_the_error_of_the_source(self):
+        for parallel_writers in [1, 3]:
+            batch_data_loader = self.create_batch_data_loader(
+                parallel_writers=parallel_writers
+            )
+            failure = ConnectionError("source went away")
+            batch_data_loader.extract_batches = lambda _: self.extract_batches(
+                2, failure
+            )
+
+            with self.assertRaises(ConnectionError) as context:
+                batch_data_loader.load_batches(MagicMock())
+
+            self.assertIs(context.exception, failure)
+            # the batches extracted before the error are still written
+            self.assertCountEqual(batch_data_loader.written_batches, [[(0,)], [(1,)]])
+            self.assert_extractor_joined()
+
+    def test_load_batches_raises_the_error_of_the_writer(self):
+        for parallel_writers in [1, 3]:
+            batch_data_loader = self.create_batch_data_loader(
+                parallel_writers=parallel_writers
+            )
+            extraction_closed = threading.Event()
+            failure = IOError("destination went away")
+
+            def extract_batches(_):
+                try:
+                    yield from self.extract_batches(BATCH_COUNT)
+                finally:
+                    extraction_closed.set()
+
+            def write_batch(batch_tracker, batch, bookmarks):
+                raise failure
+
+            batch_data_loader.extract_batches = extract_batches
+            batch_data_loader.write_batch = write_batch
+
+            with self.assertRaises(IOError) as context:
+                batch_data_loader.load_batches(MagicMock())
+
+            self.assertIs(context.exception, failure)
+            self.assert_extractor_joined()
+            # the extractor stops rather than reading the rest of the source
+            self.assertTrue(extraction_closed.is_set())
+
+
+if __name__ == "__main__":
+    unittest.main()
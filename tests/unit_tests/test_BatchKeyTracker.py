@@ -0,0 +1,27 @@
+import unittest
+
+from rdl.BatchKeyTracker import BatchKeyTracker
+
+
+class TestBatchKeyTracker(unittest.TestCase):
+    def test_split_key_range_covers_the_key_space_with_disjoint_ranges(self):
+        self.assertEqual(
+            BatchKeyTracker.split_key_range(1, 10, 3), [(0, 4), (4, 8), (8, 10)]
+        )
+        self.assertEqual(BatchKeyTracker.split_key_range(5, 5, 4), [(4, 5)])
+        self.assertEqual(
+            BatchKeyTracker.split_key_range(-3, 2, 2), [(-4, -1), (-1, 2)]
+        )
+
+    def test_split_key_range_falls_back_to_a_single_unbounded_range(self):
+        self.assertEqual(BatchKeyTracker.split_key_range(None, None, 4), [None])
+        self.assertEqual(BatchKeyTracker.split_key_range(1, 100, 1), [None])
+
+    def test_bookmarks_start_at_zero(self):
+        batch_key_tracker = BatchKeyTracker(["Id1", "Id2"], key_range=(0, 4))
+        self.assertEqual(batch_key_tracker.bookmarks, {"Id1": 0, "Id2": 0})
+        self.assertEqual(batch_key_tracker.key_range, (0, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import struct
+import unittest
+import uuid
+
+from datetime import datetime
+from decimal import Decimal
+from unittest import mock
+
+import pandas
+
+from rdl.copy_writers.CopyBinaryEncoder import CopyBinaryEncoder
+from rdl.copy_writers.CopyCsvEncoder import CopyCsvEncoder
+from rdl.copy_writers.CopyStream import CopyStream
+from rdl.copy_writers.CopyTextEncoder import CopyTextEncoder
+
+
+class TestCopyTextEncoder(unittest.TestCase):
+    def test_encode_row(self):
+        encoder = CopyTextEncoder(
+            ["int", "string", "datetime", "numeric", "guid", "boolean", "json"]
+        )
+        guid = uuid.UUID("12345678-1234-5678-1234-567812345678")
+        self.assertEqual(
+            encoder.encode_row(
+                (
+                    1,
+                    "tab\there\\ new\nline\r\x00",
+                    datetime(2019, 2, 14, 1, 55, 54, 123456),
+                    Decimal("1.50"),
+                    guid,
+                    True,
+                    '{"a": "b"}',
+                )
+            ),
+            "1\ttab\\there\\\\ new\\nline\\r\t2019-02-14 01:55:54.123456\t1.50\t"
+            '12345678-1234-5678-1234-567812345678\tt\t{"a": "b"}\n',
+        )
+
+    def test_encode_row_only_writes_null_for_none(self):
+        encoder = CopyTextEncoder(["int", "string", "boolean"])
+        self.assertEqual(encoder.encode_row((None, "", False)), "\\N\t\tf\n")
+        self.assertEqual(encoder.encode_row((0, "\\N", None)), "0\t\\\\N\t\\N\n")
+
+    def test_encode_rows_in_chunks(self):
+        encoder = CopyTextEncoder(["int"])
+        chunks = list(encoder.encode_rows((i,) for i in range(2500)))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(
+            b"".join(chunks), "".join(f"{i}\n" for i in range(2500)).encode("utf-8")
+        )
+
+
+class TestCopyBinaryEncoder(unittest.TestCase):
+    def test_encode_rows(self):
+        encoder = CopyBinaryEncoder(["int", "string", "boolean", "guid"])
+        guid = "12345678-1234-5678-1234-567812345678"
+        self.assertEqual(
+            b"".join(encoder.encode_rows([(1, "a\x00b", True, guid), (None, None, None, None)])),
+            b"PGCOPY\n\xff\r\n\x00"
+            + struct.pack(">ii", 0, 0)
+            + struct.pack(">hii", 4, 4, 1)
+            + struct.pack(">i", 2)
+            + b"ab"
+            + struct.pack(">i?i", 1, True, 16)
+            + uuid.UUID(guid).bytes
+            + struct.pack(">hiiii", 4, -1, -1, -1, -1)
+            + struct.pack(">h", -1),
+        )
+
+    def test_encode_timestamp(self):
+        self.assertEqual(
+            CopyBinaryEncoder.to_timestamp_microseconds(datetime(2000, 1, 2, 0, 0, 0, 1)),
+            86400000001,
+        )
+        self.assertEqual(
+            CopyBinaryEncoder.to_timestamp_microseconds(datetime(1999, 12, 31, 23, 59, 59)),
+            -1000000,
+        )
+
+    def test_encode_numeric(self):
+        self.assertEqual(
+            CopyBinaryEncoder.to_numeric_bytes(Decimal("12345.60")),
+            struct.pack(">hhHhhhh", 3, 1, 0x0000, 2, 1, 2345, 6000),
+        )
+        self.assertEqual(
+            CopyBinaryEncoder.to_numeric_bytes(-0.00001),
+            struct.pack(">hhHhh", 1, -2, 0x4000, 5, 1000),
+        )
+        self.assertEqual(
+            CopyBinaryEncoder.to_numeric_bytes(Decimal("0.00")),
+            struct.pack(">hhHh", 0, 0, 0x0000, 2),
+        )
+
+
+class TestCopyCsvEncoder(unittest.TestCase):
+    def test_encode_data_frame_in_chunks_of_chunk_size(self):
+        data_frame = pandas.DataFrame(
+            {"id": range(1000), "name": ["a" * 20] * 1000}, columns=["id", "name"]
+        )
+        with mock.patch.object(CopyCsvEncoder, "CHUNK_SIZE", 4096):
+            chunks = list(CopyCsvEncoder().encode_data_frame(data_frame))
+
+        # chunks are sized from the rows of the previous one, so they only approximate the chunk size
+        self.assertGreater(len(chunks), 5)
+        self.assertTrue(all(len(chunk) < 2 * 4096 for chunk in chunks))
+        self.assertEqual(
+            b"".join(chunks),
+            "".join(f'{i},"{"a" * 20}"\n' for i in range(1000)).encode("utf-8"),
+        )
+
+
+class TestCopyStream(unittest.TestCase):
+    def test_read(self):
+        stream = CopyStream([b"abc", b"", b"defgh", b"i"])
+        self.assertEqual(stream.read(2), b"ab")
+        self.assertEqual(stream.read(4), b"c")
+        self.assertEqual(stream.read(4), b"defg")
+        self.assertEqual(stream.read(), b"hi")
+        self.assertEqual(stream.read(4), b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,314 @@
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+from concurrent.futures import wait
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from rdl.DataLoadManager import DataLoadManager
+from rdl.data_sources.ChangeTrackingInfo import ChangeTrackingInfo
+
+SYNC_VERSION = 42
+# only ever waited out when a test is failing, so it fails rather than hangs
+TIMEOUT_SECONDS = 10
+
+
+class TestDataLoadManager(unittest.TestCase):
+    def setUp(self):
+        self.configuration_path = tempfile.mkdtemp()
+        self.source_db = MagicMock()
+        self.source_db.get_current_sync_version.return_value = SYNC_VERSION
+        self.target_db = MagicMock()
+        self.data_load_tracker_repository = MagicMock()
+        self.data_load_manager = DataLoadManager(
+            self.configuration_path,
+            self.source_db,
+            self.target_db,
+            self.data_load_tracker_repository,
+        )
+        self.data_load_manager.execution_id = "execution"
+
+    def tearDown(self):
+        shutil.rmtree(self.configuration_path)
+
+    def write_model(self, model_name, batch=None, **source_table):
+        model_file = Path(self.configuration_path) / f"{model_name}.json"
+        model_file.write_text(
+            json.dumps(
+                {
+                    "source_table": dict(
+                        {"name": model_name, "schema": "dbo", "primary_keys": ["Id"]},
+                        **source_table,
+                    ),
+                    "target_schema": "rdl_test",
+                    "stage_table": f"stage_{model_name}",
+                    "load_table": f"load_{model_name}",
+                    "batch": dict({"size": 100}, **(batch or {})),
+                    "columns": [],
+                }
+            )
+        )
+        return model_file
+
+    def given_last_loads(self, model_files, sync_version=SYNC_VERSION, checksum=None):
+        self.last_successful_data_load_executions = {
+            model_file.stem: MagicMock(
+                sync_version=sync_version,
+                model_checksum=checksum or DataLoadManager.get_model_checksum(model_file),
+            )
+            for model_file in model_files
+        }
+        self.data_load_tracker_repository.get_last_successful_data_load_executions.return_value = (
+            self.last_successful_data_load_executions
+        )
+
+    def given_load_tables(self, model_files):
+        self.target_db.execute.return_value.fetchall.return_value = [
+            {"table_schema": "rdl_test", "table_name": f"load_{model_file.stem}"}
+            for model_file in model_files
+        ]
+
+    def given_unchanged_models(self, *model_names):
+        model_files = [self.write_model(model_name) for model_name in model_names]
+        self.given_last_loads(model_files)
+        self.given_load_tables(model_files)
+        return {model_file.stem: (model_file, False) for model_file in model_files}
+
+    def skip_unchanged_source(self, all_model_files):
+        return self.data_load_manager.skip_unchanged_source(
+            all_model_files, self.last_successful_data_load_executions
+        )
+
+    def test_skip_unchanged_source_skips_every_model_at_once(self):
+        all_model_files = self.given_unchanged_models("jobs", "users")
+
+        self.assertTrue(self.skip_unchanged_source(all_model_files))
+        self.data_load_tracker_repository.create_skipped_execution_models.assert_called_once_with(
+            "execution",
+            {
+                model_name: DataLoadManager.get_model_checksum(model_file)
+                for model_name, (model_file, _) in all_model_files.items()
+            },
+            SYNC_VERSION,
+        )
+
+    def test_skip_unchanged_source_loads_models_when_the_source_has_changed(self):
+        all_model_files = self.given_unchanged_models("jobs", "users")
+        self.given_last_loads(
+            [model_file for model_file, _ in all_model_files.values()],
+            sync_version=SYNC_VERSION - 1,
+        )
+
+        self.assertFalse(self.skip_unchanged_source(all_model_files))
+        self.data_load_tracker_repository.create_skipped_execution_models.assert_not_called()
+
+    def test_skip_unchanged_source_loads_models_due_a_full_refresh(self):
+        all_model_files = self.given_unchanged_models("jobs", "users")
+        all_model_files["users"] = (all_model_files["users"][0], True)
+
+        self.assertFalse(self.skip_unchanged_source(all_model_files))
+        self.data_load_tracker_repository.create_skipped_execution_models.assert_not_called()
+
+    def test_skip_unchanged_source_loads_changed_models(self):
+        all_model_files = self.given_unchanged_models("jobs")
+        self.given_last_loads([all_model_files["jobs"][0]], checksum="changed")
+
+        self.assertFalse(self.skip_unchanged_source(all_model_files))
+
+    def test_skip_unchanged_source_loads_models_never_loaded(self):
+        all_model_files = self.given_unchanged_models("jobs", "users")
+        self.given_last_loads([all_model_files["jobs"][0]])
+
+        self.assertFalse(self.skip_unchanged_source(all_model_files))
+
+    def test_skip_unchanged_source_loads_models_without_a_load_table(self):
+        all_model_files = self.given_unchanged_models("jobs", "users")
+        self.given_load_tables([all_model_files["jobs"][0]])
+
+        self.assertFalse(self.skip_unchanged_source(all_model_files))
+
+    def test_skip_unchanged_source_loads_watermarked_models(self):
+        all_model_files = self.given_unchanged_models("jobs")
+        model_file = self.write_model(
+            "users", watermark={"column": "ModifiedAt", "type": "datetime"}
+        )
+        all_model_files["users"] = (model_file, False)
+        self.given_last_loads([model_file for model_file, _ in all_model_files.values()])
+        self.given_load_tables([model_file for model_file, _ in all_model_files.values()])
+
+        self.assertFalse(self.skip_unchanged_source(all_model_files))
+
+    def test_skip_unchanged_source_loads_models_of_sources_without_a_version(self):
+        all_model_files = self.given_unchanged_models("jobs")
+        self.source_db.get_current_sync_version.return_value = None
+
+        self.assertFalse(self.skip_unchanged_source(all_model_files))
+
+    def given_models_to_import(self, *model_names):
+        self.data_load_manager.parallelism = 2
+        self.data_load_tracker_repository.create_execution.return_value = "execution"
+        for model_name in model_names:
+            self.write_model(model_name)
+        self.source_db.get_current_sync_version.return_value = None
+        self.data_load_tracker_repository.get_last_successful_data_load_executions.return_value = {}
+        self.data_load_tracker_repository.get_model_execution_statistics.return_value = {}
+        self.data_load_manager.preflight = MagicMock(return_value={})
+
+    def test_start_imports_cancels_the_pending_models_once_one_fails(self):
+        self.given_models_to_import("a", "b", "c", "d", "e", "f")
+        failure = ValueError("a failed")
+        started_model_names = []
+        b_started = threading.Event()
+        pending_models_cancelled = threading.Event()
+
+        def start_single_import(model_file, *args):
+            started_model_names.append(model_file.stem)
+            if model_file.stem == "a":
+                b_started.wait(TIMEOUT_SECONDS)
+                raise failure
+            if model_file.stem == "b":
+                b_started.set()
+            # keeps the models in flight running until the pending ones are cancelled
+            pending_models_cancelled.wait(TIMEOUT_SECONDS)
+
+        def wait_for_models(futures, **kwargs):
+            # the models in flight are only waited for once the pending ones are cancelled
+            if "return_when" not in kwargs:
+                pending_models_cancelled.set()
+            return wait(futures, **kwargs)
+
+        self.data_load_manager.start_single_import = start_single_import
+
+        with patch("rdl.DataLoadManager.wait", wait_for_models):
+            with self.assertRaises(ValueError) as context:
+                self.data_load_manager.start_imports(None)
+
+        self.assertIs(context.exception, failure)
+        # "c" may still be picked up by the worker "a" failed on before the pending models are cancelled
+        self.assertIn("b", started_model_names)
+        self.assertFalse(set(started_model_names) - {"a", "b", "c"})
+        self.data_load_tracker_repository.fail_execution.assert_called_once_with(
+            "execution", len(started_model_names)
+        )
+        self.data_load_tracker_repository.complete_execution.assert_not_called()
+        # the scheduler, the unchanged source check and the preflight share the one read of the last loads
+        self.data_load_tracker_repository.get_last_successful_data_load_executions.assert_called_once()
+
+    def test_start_imports_disposes_the_engines_of_its_workers(self):
+        self.given_models_to_import("a", "b")
+        worker_target_dbs = []
+
+        def create_worker_target_db():
+            worker_target_dbs.append(MagicMock())
+            return worker_target_dbs[-1]
+
+        self.data_load_manager.target_db_factory = create_worker_target_db
+        self.data_load_manager.start_single_import = MagicMock()
+
+        self.data_load_manager.start_imports(None)
+
+        self.assertTrue(worker_target_dbs)
+        for worker_target_db in worker_target_dbs:
+            worker_target_db.dispose.assert_called_once_with()
+        self.assertEqual(self.data_load_manager.worker_target_dbs, [])
+
+    def test_is_small_change(self):
+        def is_small_change(changed_row_count, small_change_threshold):
+            return DataLoadManager.is_small_change(
+                ChangeTrackingInfo(1, 2, False, True, changed_row_count),
+                small_change_threshold,
+            )
+
+        self.assertTrue(is_small_change(0, 10))
+        self.assertTrue(is_small_change(10, 10))
+        self.assertFalse(is_small_change(11, 10))
+        # the changed rows weren't counted
+        self.assertFalse(is_small_change(None, 10))
+        self.assertFalse(is_small_change(0, None))
+
+    def test_is_large_change(self):
+        def is_large_change(changed_row_count, full_refresh_break_even):
+            return DataLoadManager.is_large_change(
+                ChangeTrackingInfo(1, 2, False, True, changed_row_count),
+                full_refresh_break_even,
+            )
+
+        self.assertTrue(is_large_change(601, 600))
+        self.assertFalse(is_large_change(600, 600))
+        self.assertFalse(is_large_change(0, 600))
+        # the changed rows weren't counted
+        self.assertFalse(is_large_change(None, 600))
+        self.assertFalse(is_large_change(1000000, None))
+
+    def test_get_changed_row_count_limit_counts_one_past_the_larger_threshold(self):
+        def get_changed_row_count_limit(small_change_threshold, full_refresh_break_even):
+            batch_config = {"size": 100}
+            if small_change_threshold is not None:
+                batch_config["small_change_threshold"] = small_change_threshold
+            return DataLoadManager.get_changed_row_count_limit(
+                {"batch": batch_config}, full_refresh_break_even
+            )
+
+        self.assertIsNone(get_changed_row_count_limit(None, None))
+        self.assertEqual(get_changed_row_count_limit(10, None), 11)
+        self.assertEqual(get_changed_row_count_limit(None, 600), 601)
+        self.assertEqual(get_changed_row_count_limit(10, 600), 601)
+        self.assertEqual(get_changed_row_count_limit(1000, 600), 1001)
+        self.assertEqual(get_changed_row_count_limit(0, None), 1)
+
+    def test_preflight_counts_the_changed_rows_of_the_models_that_need_them(self):
+        all_model_files = {
+            model_file.stem: (model_file, False)
+            for model_file in [
+                self.write_model("plain"),
+                self.write_model("small", batch={"small_change_threshold": 10}),
+                self.write_model("costed", batch={"cost_based_full_refresh": True}),
+                # without a previous load there's nothing to weigh a full refresh against
+                self.write_model("unloaded", batch={"cost_based_full_refresh": True}),
+            ]
+        }
+        self.given_last_loads(
+            [all_model_files[model_name][0] for model_name in ["plain", "small", "costed"]],
+            sync_version=7,
+        )
+        self.source_db.get_table_row_counts.return_value = [10000]
+        self.data_load_tracker_repository.get_model_execution_statistics.return_value = {
+            ("costed", True): (60000.0, 10000.0, 6.0),
+            ("costed", False): (1000.0, 10.0, 100.0),
+        }
+        source_table_infos = [MagicMock() for _ in all_model_files]
+        self.source_db.get_table_infos.return_value = source_table_infos
+
+        preflight_source_table_infos = self.data_load_manager.preflight(
+            all_model_files, self.last_successful_data_load_executions
+        )
+
+        def source_table(model_name):
+            return {"name": model_name, "schema": "dbo", "primary_keys": ["Id"]}
+
+        self.source_db.get_table_row_counts.assert_called_once_with(
+            [source_table("costed")]
+        )
+        self.source_db.get_table_infos.assert_called_once_with(
+            [
+                (source_table("plain"), 7, None),
+                (source_table("small"), 7, 11),
+                (source_table("costed"), 7, 601),
+                (source_table("unloaded"), 0, None),
+            ]
+        )
+        self.assertEqual(
+            preflight_source_table_infos,
+            {
+                "plain": (7, source_table_infos[0], None),
+                "small": (7, source_table_infos[1], None),
+                "costed": (7, source_table_infos[2], 600),
+                "unloaded": (0, source_table_infos[3], None),
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
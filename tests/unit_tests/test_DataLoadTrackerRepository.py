@@ -208,6 +208,63 @@ class TestDataLoadTrackerRepository(unittest.TestCase):
 
         self.fake_session.close()
 
+    def test_get_model_execution_statistics_leaves_runs_without_rows_out_of_the_time_per_row(self):
+        data_load_tracker = TestDataLoadTrackerRepository.data_load_tracker
+        session = data_load_tracker.session_maker()
+        completed_on = datetime.now()
+        for index, (execution_time_ms, rows_processed) in enumerate(
+            [(1000, 10), (1000, 0), (3000, 20), (1000, 0)]
+        ):
+            execution = ExecutionEntity()
+            session.add(execution)
+            session.commit()
+            session.add(
+                ExecutionModelEntity(
+                    model_name="fake_statistics",
+                    is_full_refresh=False,
+                    last_sync_version=1,
+                    sync_version=2,
+                    completed_on=completed_on + timedelta(seconds=index),
+                    execution_time_ms=execution_time_ms,
+                    rows_processed=rows_processed,
+                    execution_id=execution.execution_id,
+                    status=Constants.ExecutionModelStatus.SUCCESSFUL,
+                    model_checksum="checksum",
+                    full_refresh_reason=Constants.FullRefreshReason.NOT_APPLICABLE,
+                )
+            )
+            session.commit()
+        session.close()
+
+        statistics = data_load_tracker.get_model_execution_statistics(["fake_statistics"])
+
+        execution_time_ms, rows_processed, ms_per_row = statistics[("fake_statistics", False)]
+        self.assertEqual(execution_time_ms, 1500.0)
+        self.assertEqual(rows_processed, 7.5)
+        # (100ms + 150ms) / 2, where dividing the averages would make it 200ms
+        self.assertEqual(ms_per_row, 125.0)
+
+    def test_create_skipped_execution_models(self):
+        data_load_tracker = TestDataLoadTrackerRepository.data_load_tracker
+        execution_id = data_load_tracker.create_execution()
+        model_checksums = {"fake_skipped_jobs": "a", "fake_skipped_users": "b"}
+
+        data_load_tracker.create_skipped_execution_models(
+            execution_id, model_checksums, 42
+        )
+
+        results = data_load_tracker.get_last_successful_data_load_executions(
+            list(model_checksums.keys())
+        )
+        self.assertCountEqual(results.keys(), model_checksums.keys())
+        for model_name, result in results.items():
+            self.assertEqual(result.execution_id, execution_id)
+            self.assertEqual(result.sync_version, 42)
+            self.assertEqual(result.last_sync_version, 42)
+            self.assertEqual(result.model_checksum, model_checksums[model_name])
+            self.assertFalse(result.is_full_refresh)
+            self.assertEqual(result.rows_processed, 0)
+
     def __simulate_rdl_run(
         self, iteration_time, full_refresh_models, incremental_models
     ):
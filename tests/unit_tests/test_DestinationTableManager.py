@@ -0,0 +1,117 @@
+import unittest
+from unittest.mock import MagicMock
+
+from rdl.DestinationTableManager import DestinationTableManager
+
+COLUMNS = [
+    {
+        "source_name": "Id",
+        "destination": {"name": "id", "type": "int", "nullable": False, "primary_key": True},
+    },
+    {
+        "source_name": "Name",
+        "destination": {"name": "name", "type": "string", "nullable": True},
+    },
+]
+
+
+class TestDestinationTableManager(unittest.TestCase):
+    def test_build_upsert_sql_takes_the_whole_stage_table(self):
+        upsert_sql = DestinationTableManager.build_upsert_sql(
+            "load", "stage_test", "test", COLUMNS
+        )
+        self.assertIn(" SELECT id,name,", upsert_sql)
+        self.assertIn("FROM load.stage_test \n ON CONFLICT(id) DO UPDATE SET ", upsert_sql)
+        self.assertNotIn(":lower_bound", upsert_sql)
+
+    def test_build_upsert_sql_with_a_chunk_key_takes_a_range_of_the_stage_table(self):
+        upsert_sql = DestinationTableManager.build_upsert_sql(
+            "load", "stage_test", "test", COLUMNS, chunk_key="id"
+        )
+        self.assertIn(
+            " WHERE (:lower_bound IS NULL OR id > :lower_bound)"
+            " AND (:upper_bound IS NULL OR id <= :upper_bound) \n ON CONFLICT(id)",
+            upsert_sql,
+        )
+
+    def test_build_upsert_sql_returns_the_inserted_and_updated_row_counts(self):
+        upsert_sql = DestinationTableManager.build_upsert_sql(
+            "load", "stage_test", "test", COLUMNS
+        )
+        self.assertTrue(upsert_sql.startswith("WITH upserted AS ( \nINSERT INTO load.test"))
+        self.assertIn(" RETURNING (xmax = 0) AS inserted) \n", upsert_sql)
+        self.assertIn("AS inserted_row_count", upsert_sql)
+        self.assertIn("AS updated_row_count FROM upserted;", upsert_sql)
+
+    def test_build_upsert_sql_skipping_unchanged_rows_by_hash(self):
+        upsert_sql = DestinationTableManager.build_upsert_sql(
+            "load", "stage_test", "test", COLUMNS, skip_unchanged="hash"
+        )
+        self.assertIn(
+            "rdl_change_version,md5(ROW(id,name,rdl_is_deleted)::text)::uuid FROM load.stage_test",
+            upsert_sql,
+        )
+        self.assertIn(",rdl_row_hash = EXCLUDED.rdl_row_hash\n", upsert_sql)
+        self.assertIn(
+            " WHERE CASE WHEN test.rdl_row_hash IS NULL THEN "
+            "(test.id,test.name::text,test.rdl_is_deleted) IS DISTINCT FROM "
+            "((EXCLUDED.id),(EXCLUDED.name)::text,EXCLUDED.rdl_is_deleted)"
+            " ELSE test.rdl_row_hash IS DISTINCT FROM EXCLUDED.rdl_row_hash END\n",
+            upsert_sql,
+        )
+
+    def test_build_upsert_sql_skipping_unchanged_rows_by_comparing_columns(self):
+        upsert_sql = DestinationTableManager.build_upsert_sql(
+            "load", "stage_test", "test", COLUMNS, skip_unchanged="compare"
+        )
+        self.assertIn(
+            " WHERE (test.id,test.name::text,test.rdl_is_deleted) IS DISTINCT FROM "
+            "((EXCLUDED.id),(EXCLUDED.name)::text,EXCLUDED.rdl_is_deleted)\n",
+            upsert_sql,
+        )
+        self.assertNotIn("rdl_row_hash", upsert_sql)
+
+    def test_build_upsert_sql_with_changed_columns_keeps_the_loaded_values_of_unchanged_columns(self):
+        upsert_sql = DestinationTableManager.build_upsert_sql(
+            "load", "stage_test", "test", COLUMNS, chunk_key="id", changed_columns=True
+        )
+        self.assertIn(
+            " SELECT stage.id,CASE WHEN substring(stage.rdl_changed_columns, 1, 1) = '0'"
+            " THEN loaded.name ELSE stage.name END,stage.rdl_timestamp,",
+            upsert_sql,
+        )
+        self.assertIn(
+            " FROM load.stage_test AS stage LEFT JOIN load.test AS loaded ON loaded.id = stage.id \n",
+            upsert_sql,
+        )
+        self.assertIn("(:lower_bound IS NULL OR stage.id > :lower_bound)", upsert_sql)
+
+    def test_build_upsert_sql_rejects_unknown_skip_unchanged_modes(self):
+        with self.assertRaises(ValueError):
+            DestinationTableManager.build_upsert_sql(
+                "load", "stage_test", "test", COLUMNS, skip_unchanged="always"
+            )
+
+    def test_upsert_table_commits_the_upsert(self):
+        target_db = MagicMock()
+        transaction = target_db.begin.return_value
+        connection = transaction.__enter__.return_value
+        connection.execute.return_value.fetchone.return_value = {
+            "inserted_row_count": 1,
+            "updated_row_count": 2,
+        }
+        upsert_sql = DestinationTableManager.build_upsert_sql(
+            "load", "stage_test", "test", COLUMNS
+        )
+
+        self.assertEqual(
+            DestinationTableManager(target_db).upsert_table(upsert_sql), (1, 2)
+        )
+        connection.execute.assert_called_once_with(upsert_sql)
+        # the upsert is committed as the transaction completes without an error
+        transaction.__exit__.assert_called_once_with(None, None, None)
+        target_db.execute.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
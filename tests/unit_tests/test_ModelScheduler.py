@@ -0,0 +1,118 @@
+import unittest
+
+from rdl.ModelScheduler import ModelScheduler
+
+
+# Keyed by (model_name, is_full_refresh), each as the (execution_time_ms, rows_processed, ms_per_row) the
+# repository averages over a model's recent loads
+class FakeDataLoadTrackerRepository(object):
+    def __init__(self, statistics):
+        self.statistics = statistics
+
+    def get_model_execution_statistics(self, model_names):
+        return {
+            (model_name, is_full_refresh): statistics
+            for (model_name, is_full_refresh), statistics in self.statistics.items()
+            if model_name in model_names
+        }
+
+
+class TestModelScheduler(unittest.TestCase):
+    def test_estimate_costs_uses_history_of_the_expected_load_type(self):
+        scheduler = ModelScheduler(
+            FakeDataLoadTrackerRepository(
+                {
+                    ("jobs", True): (60000.0, 1000000.0, 0.06),
+                    ("jobs", False): (500.0, 10.0, 50.0),
+                    ("users", False): (2000.0, 100.0, 20.0),
+                }
+            )
+        )
+        costs = scheduler.estimate_costs({"jobs": True, "users": False, "new": True})
+        self.assertEqual(costs["jobs"], (60000.0, 1000000.0, 0.06))
+        self.assertEqual(costs["users"], (2000.0, 100.0, 20.0))
+        self.assertIsNone(costs["new"])
+
+    def test_order_by_cost_is_longest_first_with_unknown_models_leading(self):
+        costs = {
+            "small": (10.0, 1.0, 10.0),
+            "large": (1000.0, 5.0, 200.0),
+            "unknown": None,
+            "medium_more_rows": (100.0, 50.0, 2.0),
+            "medium": (100.0, 10.0, 10.0),
+        }
+        self.assertEqual(
+            ModelScheduler.order_by_cost(costs),
+            ["unknown", "large", "medium_more_rows", "medium", "small"],
+        )
+
+    def test_fill_unknown_costs_assumes_the_largest_known_cost(self):
+        costs = {"a": (10.0, 1.0, 10.0), "b": (30.0, 1.0, 30.0), "c": None}
+        self.assertEqual(
+            ModelScheduler.fill_unknown_costs(costs), {"a": 10.0, "b": 30.0, "c": 30.0}
+        )
+
+    def test_full_refresh_break_even_weighs_the_time_per_row_of_each_kind_of_load(self):
+        # 60ms per row to reload, 200ms per row to load incrementally
+        self.assertEqual(
+            ModelScheduler.get_full_refresh_break_even(
+                1000, (60000.0, 1000.0, 60.0), (2000.0, 10.0, 200.0)
+            ),
+            300,
+        )
+
+    def test_full_refresh_break_even_without_history_assumes_the_default_cost_ratio(self):
+        self.assertEqual(
+            ModelScheduler.get_full_refresh_break_even(3000, None, (2000.0, 10.0, 200.0)),
+            1000,
+        )
+        self.assertEqual(
+            ModelScheduler.get_full_refresh_break_even(3000, (60000.0, 0.0, None), None),
+            1000,
+        )
+        self.assertIsNone(
+            ModelScheduler.get_full_refresh_break_even(None, (60000.0, 1000.0, 60.0), None)
+        )
+
+    def test_full_refresh_break_even_goes_by_the_time_per_row_of_loads_that_processed_rows(self):
+        # incremental loads averaging 1000ms for 5 rows, as half of them processed none, still cost 100ms per row
+        self.assertEqual(
+            ModelScheduler.get_full_refresh_break_even(
+                1000, (60000.0, 1000.0, 60.0), (1000.0, 5.0, 100.0)
+            ),
+            600,
+        )
+
+    def test_estimate_full_refresh_break_even_reads_the_history_of_the_model(self):
+        scheduler = ModelScheduler(
+            FakeDataLoadTrackerRepository(
+                {
+                    ("jobs", True): (60000.0, 1000.0, 60.0),
+                    # half of the incremental loads processed no rows, which leaves them out of the time per row
+                    ("jobs", False): (1000.0, 5.0, 100.0),
+                    ("users", False): (10.0, 1.0, 10.0),
+                }
+            )
+        )
+        self.assertEqual(scheduler.estimate_full_refresh_break_even("jobs", 1000), 600)
+        # without a full refresh to weigh against, the default cost ratio is assumed
+        self.assertEqual(scheduler.estimate_full_refresh_break_even("users", 3000), 1000)
+
+    def test_predict_makespan(self):
+        execution_times = {"a": 7, "b": 5, "c": 4, "d": 3, "e": 3}
+        self.assertEqual(
+            ModelScheduler.predict_makespan(["a", "b", "c", "d", "e"], execution_times, 2),
+            12,
+        )
+        self.assertEqual(
+            ModelScheduler.predict_makespan(["a", "b", "c", "d", "e"], execution_times, 1),
+            22,
+        )
+        self.assertEqual(
+            ModelScheduler.predict_makespan(["e", "d", "c", "b", "a"], execution_times, 2),
+            14,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
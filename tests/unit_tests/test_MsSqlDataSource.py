@@ -1,8 +1,13 @@
 import unittest
 import json
+from datetime import datetime
 from sqlalchemy import create_engine
 from sqlalchemy.sql import text
+from rdl.BatchKeyTracker import BatchKeyTracker
+from rdl.data_load_tracking.DataLoadTracker import DataLoadTracker
+from rdl.data_sources.ChangeTrackingInfo import ChangeTrackingInfo
 from rdl.data_sources.MsSqlDataSource import MsSqlDataSource
+from rdl.shared import Constants
 
 TEST_DB = "RDLUnitTestSource"
 MSSQL_STRING_FORMAT = "mssql+pyodbc://{username}:{password}@{server_string}/{db}?driver=SQL+Server+Native+Client+11.0"
@@ -110,6 +115,61 @@ class TestMsSqlDataSource(unittest.TestCase):
             ).change_tracking_info
             self.assertEqual(results.force_full_load, True)
 
+    def test_get_table_info_counts_changed_rows_up_to_the_limit(self):
+        for table in TestMsSqlDataSource.table_configs:
+            results = TestMsSqlDataSource.data_source.get_table_info(
+                table["source_table"], None
+            ).change_tracking_info
+            self.assertIsNone(results.changed_row_count)
+
+            results = TestMsSqlDataSource.data_source.get_table_info(
+                table["source_table"], None, 1
+            ).change_tracking_info
+            self.assertLessEqual(results.changed_row_count, 1)
+            self.assertEqual(
+                bool(results.data_changed_since_last_sync),
+                results.changed_row_count == 1,
+            )
+
+    def test_stream_changed_table_rows_reads_the_changes_through_a_temp_table(self):
+        for table in TestMsSqlDataSource.table_configs:
+            change_tracking_info = TestMsSqlDataSource.data_source.get_table_info(
+                table["source_table"], None
+            ).change_tracking_info
+            TestMsSqlDataSource.data_source.database_engine.execute(
+                text(
+                    f"UPDATE {table['source_table']['name']} SET StringCol = 'Changed' "
+                    f"WHERE Id = (SELECT MAX(Id) FROM {table['source_table']['name']})"
+                ).execution_options(autocommit=True)
+            )
+            change_tracking_info = TestMsSqlDataSource.data_source.get_table_info(
+                table["source_table"], change_tracking_info.sync_version
+            ).change_tracking_info
+            data_load_tracker = DataLoadTracker(
+                None,
+                table["source_table"]["name"],
+                "",
+                table,
+                False,
+                Constants.FullRefreshReason.NOT_APPLICABLE,
+                change_tracking_info,
+            )
+
+            batches = list(
+                TestMsSqlDataSource.data_source.stream_changed_table_rows(
+                    table["source_table"],
+                    table["columns"],
+                    {"size": 100},
+                    data_load_tracker,
+                    BatchKeyTracker(table["source_table"]["primary_keys"]),
+                    change_tracking_info,
+                )
+            )
+
+            changed_rows = [row for _, rows in batches for row in rows]
+            self.assertEqual(len(changed_rows), 1)
+            self.assertEqual(changed_rows[0][1], "Changed")
+
     def test_can_handle_connection_string(self):
         self.assertFalse(
             MsSqlDataSource.can_handle_connection_string(
@@ -120,6 +180,88 @@ class TestMsSqlDataSource(unittest.TestCase):
             MsSqlDataSource.can_handle_connection_string(MSSQL_STRING_FORMAT)
         )
 
+    def test_watermarks_round_trip(self):
+        rowversion = b"\x00\x00\x00\x00\x00\x01\x86\xa0"
+        self.assertEqual(
+            MsSqlDataSource.to_watermark(rowversion, "rowversion"), 100000
+        )
+        self.assertEqual(
+            MsSqlDataSource.from_watermark(100000, "rowversion"), rowversion
+        )
+
+        modified_at = datetime(2019, 2, 14, 1, 55, 54, 123456)
+        watermark = MsSqlDataSource.to_watermark(modified_at, "datetime")
+        self.assertEqual(watermark, 1550109354123456)
+        self.assertEqual(
+            MsSqlDataSource.from_watermark(watermark, "datetime"), modified_at
+        )
+        self.assertIsNone(MsSqlDataSource.to_watermark(None, "datetime"))
+
+    def test_get_watermark_range_takes_in_the_ticks_past_the_watermark(self):
+        change_tracking_info = ChangeTrackingInfo(1550109354000000, 1550109354123456, False, True)
+        self.assertEqual(
+            MsSqlDataSource.get_watermark_range(
+                change_tracking_info, {"column": "ModifiedAt", "type": "datetime"}
+            ),
+            (datetime(2019, 2, 14, 1, 55, 54), datetime(2019, 2, 14, 1, 55, 54, 123457)),
+        )
+
+    def test_get_table_rows_reads_the_rows_at_the_highest_watermark(self):
+        database_engine = TestMsSqlDataSource.data_source.database_engine
+        database_engine.execute(
+            text(
+                "IF object_id('WatermarkTest') IS NOT NULL DROP TABLE WatermarkTest; "
+                "CREATE TABLE WatermarkTest (Id INT PRIMARY KEY, StringCol VARCHAR(100), ModifiedAt DATETIME2(7)); "
+                "INSERT INTO WatermarkTest SELECT 1, 'Frank', '2019-02-14 01:55:54.0000000' "
+                "UNION ALL SELECT 2, 'Walker', '2019-02-14 01:55:54.1234567';"
+            ).execution_options(autocommit=True)
+        )
+        table_config = {
+            "name": "WatermarkTest",
+            "schema": "dbo",
+            "primary_keys": ["Id"],
+            "watermark": {"column": "ModifiedAt", "type": "datetime"},
+        }
+        columns = TestMsSqlDataSource.table_configs[0]["columns"]
+        last_sync_version = MsSqlDataSource.to_watermark(
+            datetime(2019, 2, 14, 1, 55, 54), "datetime"
+        )
+
+        change_tracking_info = TestMsSqlDataSource.data_source.get_table_info(
+            table_config, last_sync_version, 10
+        ).change_tracking_info
+        self.assertTrue(change_tracking_info.data_changed_since_last_sync)
+        self.assertEqual(change_tracking_info.sync_version, last_sync_version + 123456)
+        # the rows at the last watermark are counted as they're read, again
+        self.assertEqual(change_tracking_info.changed_row_count, 2)
+
+        rows = TestMsSqlDataSource.data_source.get_table_rows(
+            table_config,
+            columns,
+            {"size": 100},
+            DataLoadTracker.Batch(),
+            BatchKeyTracker(table_config["primary_keys"]),
+            False,
+            change_tracking_info,
+        )
+        self.assertEqual([row[0] for row in rows], [1, 2])
+
+        change_tracking_info = TestMsSqlDataSource.data_source.get_table_info(
+            table_config, change_tracking_info.sync_version
+        ).change_tracking_info
+        self.assertFalse(change_tracking_info.data_changed_since_last_sync)
+
+    def test_get_watermark(self):
+        self.assertIsNone(MsSqlDataSource.get_watermark({"name": "SimpleTest"}))
+        watermark = {"column": "RowVersion", "type": "rowversion"}
+        self.assertEqual(
+            MsSqlDataSource.get_watermark({"watermark": watermark}), watermark
+        )
+        with self.assertRaises(ValueError):
+            MsSqlDataSource.get_watermark(
+                {"watermark": {"column": "Id", "type": "identity"}}
+            )
+
     def test_prefix_column(self):
         col = "foo"
         col_fail = "BAR"
@@ -0,0 +1,81 @@
+import hashlib
+import unittest
+from unittest import mock
+
+import pandas
+
+from rdl.column_transformers.ColumnTransformerRegistry import ColumnTransformerRegistry
+from rdl.column_transformers.TransformPlan import TransformPlan
+
+
+class TestTransformPlan(unittest.TestCase):
+    columns = [
+        {"source_name": "Id", "destination": {"type": "int"}},
+        {"source_name": "Name", "destination": {"type": "string"}},
+        {
+            "source_name": "Code",
+            "destination": {"type": "string"},
+            "column_transformer": "ToUpper",
+        },
+    ]
+
+    def test_only_text_columns_are_transformed(self):
+        transform_plan = TransformPlan(self.columns)
+        self.assertEqual(
+            [source_name for source_name, _ in transform_plan.column_transforms],
+            ["Name", "Code"],
+        )
+        self.assertTrue(transform_plan.has_column_transformers)
+
+    def test_apply(self):
+        data_frame = pandas.DataFrame(
+            {"Id": [1, 2, 3], "Name": ["a\x00b", None, "c"], "Code": ["x", "y\x00", "z"]},
+            columns=["Id", "Name", "Code"],
+        )
+        batch_tracker = mock.Mock()
+        TransformPlan(self.columns).apply(data_frame, batch_tracker)
+        self.assertEqual(list(data_frame["Id"]), [1, 2, 3])
+        self.assertEqual(list(data_frame["Name"]), ["ab", None, "c"])
+        self.assertEqual(list(data_frame["Code"]), ["X", "Y", "Z"])
+        self.assertEqual(
+            [call[0][0] for call in batch_tracker.transform_completed.call_args_list],
+            ["strip_null_characters", "strip_null_characters", "ToUpper"],
+        )
+
+
+class TestColumnTransformerRegistry(unittest.TestCase):
+    def transform(self, column_transformer, values):
+        _, transformer = ColumnTransformerRegistry.create_transformer(column_transformer)
+        return list(transformer.transform(pandas.Series(values, dtype=object)))
+
+    def test_builtin_transformers(self):
+        result = self.transform("trim", [" a ", None])
+        self.assertEqual(result[0], "a")
+        self.assertTrue(pandas.isna(result[1]))
+        self.assertEqual(
+            self.transform({"name": "truncate", "length": 2}, ["abc", "a"]), ["ab", "a"]
+        )
+        self.assertEqual(
+            self.transform({"name": "mask", "visible": 2}, ["abcd", "a"]), ["**cd", "a"]
+        )
+        self.assertEqual(
+            self.transform("hash", ["a"]), [hashlib.sha256(b"a").hexdigest()]
+        )
+        result = self.transform("null_if_empty", ["", "a"])
+        self.assertTrue(pandas.isna(result[0]))
+        self.assertEqual(result[1], "a")
+
+    def test_user_supplied_transformer(self):
+        name, transformer = ColumnTransformerRegistry.create_transformer(
+            {"name": "rdl.column_transformers.StringTransformers.Truncate", "length": 1}
+        )
+        self.assertEqual(name, "rdl.column_transformers.StringTransformers.Truncate")
+        self.assertEqual(transformer.length, 1)
+
+    def test_unknown_transformer(self):
+        with self.assertRaises(ValueError):
+            ColumnTransformerRegistry.create_transformer("lower")
+
+
+if __name__ == "__main__":
+    unittest.main()